@@ -1,89 +1,65 @@
 import json
 import re
+import time
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from supportdesk import metrics
+from .cache import get_cache
+from .local_model import get_model
+from .provider import (
+    ProviderError, RateLimited, acreate_response, create_response, get_async_client, get_client, stream_response,
+)
+from .rules import default_classifier
 
 def _fallback_ai(title: str, description: str):
-    text = (title + " " + description).lower()
-
-    category = "OTHER"
-    if any(k in text for k in [
-    "charge", "charged", "overcharged", "double charged", "billing",
-    "refund", "refunded", "invoice", "payment", "paid",
-    "card", "credit card", "debit card",
-    "transaction", "amount deducted", "money deducted",
-    "subscription", "plan", "pricing",
-    "renewal", "renewed",
-    "failed payment", "payment failed",
-    "receipt", "tax", "fee"
-]):
-        category = "BILLING"
-    elif any(k in text for k in [
-    "login", "log in", "signin", "sign in", "sign-in",
-    "password", "forgot password", "reset password",
-    "otp", "one time password",
-    "2fa", "two factor", "verification code",
-    "authentication", "auth",
-    "account locked", "locked out",
-    "cannot login", "unable to login",
-    "access denied", "session expired"
-]):
-        category = "LOGIN"
-    elif any(k in text for k in [
-    "bug", "issue", "error", "exception",
-    "500", "502", "503", "504",
-    "crash", "crashes", "crashed",
-    "not working", "doesn't work", "does not work",
-    "broken", "failure", "failed",
-    "timeout", "timed out",
-    "loading", "stuck", "hang", "freeze", "freezing",
-    "slow", "lag", "latency",
-    "page not loading", "blank page",
-    "server down", "service unavailable",
-    "api error", "backend error", "frontend issue"
-]):
-        category = "TECH"
-    elif any(k in text for k in [
-    "feature", "feature request",
-    "request", "enhancement",
-    "add", "support for",
-    "can you add", "would be nice",
-    "it would be helpful",
-    "improvement", "improve",
-    "new feature",
-    "enable", "option",
-    "export", "download",
-    "dark mode", "theme",
-    "integration", "api support"
-]):
-        category = "FEATURE"
-
-    sentiment = "NEUTRAL"
-    if any(k in text for k in ["angry", "worst", "terrible", "asap", "immediately", "hate"]):
-        sentiment = "ANGRY"
-    if any(k in text for k in ["thanks", "thank you", "love", "great"]):
-        sentiment = "POSITIVE"
-
-    priority = "MEDIUM"
-    if any(k in text for k in ["asap", "urgent", "immediately", "critical", "down"]):
-        priority = "HIGH"
-    if any(k in text for k in ["security", "breach", "charged twice", "fraud"]):
-        priority = "CRITICAL"
-
-    summary = f"User reports: {title}."[:200]
-    suggested = (
-        "Thanks for reaching out. I’m looking into this now and will update you shortly. "
-        "Could you share any screenshots or exact error messages if available?"
-    )
+    labels = default_classifier.classify(title, description)
+    category = labels["category"]
+    priority = labels["priority"]
+    sentiment = labels["sentiment"]
 
     return {
         "category": category,
         "priority": priority,
         "sentiment": sentiment,
-        "summary": summary,
-        "suggested_reply": suggested,
+        "summary": _template_summary(title),
+        "suggested_reply": TEMPLATE_REPLY,
         "confidence": 0.55,
     }
 
+TEMPLATE_REPLY = (
+    "Thanks for reaching out. I’m looking into this now and will update you shortly. "
+    "Could you share any screenshots or exact error messages if available?"
+)
+
+def _template_summary(title: str):
+    return f"User reports: {title}."[:200]
+
+def _local_ai(title: str, description: str):
+    # Local model tier: answer without the LLM when it is confident enough.
+    model = get_model()
+    if model is None:
+        return None
+    with metrics.stage("local"):
+        labels, confidence = model.predict(title, description)
+    if confidence < settings.LOCAL_MODEL_THRESHOLD:
+        return None
+    result = dict(
+        labels, summary=_template_summary(title), suggested_reply=TEMPLATE_REPLY, confidence=round(confidence, 3),
+    )
+    return _record(result, "local")
+
+def _record(result: dict, source: str, reason: str = ""):
+    # A copy tagged with where it came from, saved as Ticket.ai_source.
+    metrics.record_result(result, source, reason)
+    return dict(result, source=source)
+
+def _fallback(title: str, description: str, reason: str):
+    result = _record(_fallback_ai(title, description), "fallback", reason)
+    if reason != "no_api_key":
+        # Stands in for a model answer: saved without a version so re-triage picks it up.
+        result["stale"] = True
+    return result
+
 def _json_extract(text: str):
     try:
         return json.loads(text)
@@ -97,52 +73,299 @@ def _json_extract(text: str):
             return None
     return None
 
-def analyze_ticket(title: str, description: str):
-    if not settings.OPENAI_API_KEY:
-        return _fallback_ai(title, description)
+# Bump when the prompts below change so cached triage results are not reused
+# (and tickets triaged with the old prompts count as stale for re-triage).
+PROMPT_VERSION = "1"
 
-    # OpenAI SDK reads OPENAI_API_KEY from env; we pass it explicitly too.
-    from openai import OpenAI
+def triage_version():
+    """What produces triage results right now, saved on each ticket as ``ai_version``.
 
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    Covers the model and prompt version (when an API key is set), the keyword
+    rules and the local model; ``retriage_tickets`` redoes tickets with any
+    other value.
+    """
+    parts = []
+    if settings.OPENAI_API_KEY:
+        parts.append(f"{settings.OPENAI_MODEL}:p{PROMPT_VERSION}")
+    parts.append(f"rules:{default_classifier.version}")
+    model = get_model()
+    if model is not None:
+        parts.append(f"local:{model.version}@{settings.LOCAL_MODEL_THRESHOLD:g}")
+    return " ".join(parts)
 
-    system = (
-        "You are an AI support triage assistant. Return ONLY a JSON object with keys: "
-        "category, priority, sentiment, summary, suggested_reply, confidence. "
-        "category must be one of: BILLING, LOGIN, TECH, FEATURE, OTHER. "
-        "priority must be one of: LOW, MEDIUM, HIGH, CRITICAL. "
-        "sentiment must be one of: ANGRY, NEUTRAL, POSITIVE. "
-        "confidence must be between 0 and 1."
-    )
+FIELD_RULES = (
+    "category must be one of: BILLING, LOGIN, TECH, FEATURE, OTHER. "
+    "priority must be one of: LOW, MEDIUM, HIGH, CRITICAL. "
+    "sentiment must be one of: ANGRY, NEUTRAL, POSITIVE. "
+    "confidence must be between 0 and 1."
+)
 
-    user = (
+SYSTEM_PROMPT = (
+    "You are an AI support triage assistant. Return ONLY a JSON object with keys: "
+    "category, priority, sentiment, summary, suggested_reply, confidence. "
+    + FIELD_RULES
+)
+
+FIELDS_SYSTEM_PROMPT = (
+    "You are an AI support triage assistant. Return ONLY a JSON object with keys: "
+    "category, priority, sentiment, summary, confidence. "
+    + FIELD_RULES
+)
+
+REPLY_SYSTEM_PROMPT = (
+    "You are a helpful support agent. Write the reply to send to the customer for the "
+    "ticket below: plain text, no preamble, at most 2000 characters."
+)
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an AI support triage assistant. You receive a JSON array of tickets, each with "
+    "id, title and description. Return ONLY a JSON object of the form {\"results\": [...]} with "
+    "one item per ticket, each with keys: id, category, priority, sentiment, summary, "
+    "suggested_reply, confidence. "
+    + FIELD_RULES
+)
+
+def _pick(val, allowed, default):
+    val = str(val or "").strip().upper()
+    return val if val in allowed else default
+
+def _normalize(data: dict):
+    return {
+        "category": _pick(data.get("category"), {"BILLING","LOGIN","TECH","FEATURE","OTHER"}, "OTHER"),
+        "priority": _pick(data.get("priority"), {"LOW","MEDIUM","HIGH","CRITICAL"}, "MEDIUM"),
+        "sentiment": _pick(data.get("sentiment"), {"ANGRY","NEUTRAL","POSITIVE"}, "NEUTRAL"),
+        "summary": str(data.get("summary") or "")[:800],
+        "suggested_reply": str(data.get("suggested_reply") or "")[:2000],
+        "confidence": float(data.get("confidence") or 0.6),
+    }
+
+def _ticket_prompt(title: str, description: str):
+    return (
         f"Ticket title: {title}\n\n"
         f"Ticket description: {description}\n\n"
         "Return ONLY JSON."
     )
 
-    resp = client.responses.create(
+def _before_model(title: str, description: str, has_client: bool):
+    # Local model, no-key fallback and cache: a result that needs no model call, or None.
+    local = _local_ai(title, description)
+    if local is not None:
+        return local
+
+    if not has_client and not settings.OPENAI_API_KEY:
+        return _fallback(title, description, "no_api_key")
+
+    cached = get_cache().get(title, description, settings.OPENAI_MODEL, PROMPT_VERSION)
+    if cached is not None:
+        return _record(cached, "cache")
+    return None
+
+def _single_request(title: str, description: str):
+    return dict(
         model=settings.OPENAI_MODEL,
         input=[
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": _ticket_prompt(title, description)},
         ],
     )
 
-    raw = getattr(resp, "output_text", "") or ""
-    data = _json_extract(raw)
-    if not isinstance(data, dict):
-        return _fallback_ai(title, description)
+def _after_model(title: str, description: str, resp):
+    metrics.record_usage(resp)
 
-    def pick(val, allowed, default):
-        val = str(val or "").strip().upper()
-        return val if val in allowed else default
+    with metrics.stage("parse"):
+        raw = getattr(resp, "output_text", "") or ""
+        data = _json_extract(raw)
+        result = _normalize(data) if isinstance(data, dict) else None
+    if result is None:
+        return _fallback(title, description, "parse_error")
 
-    return {
-        "category": pick(data.get("category"), {"BILLING","LOGIN","TECH","FEATURE","OTHER"}, "OTHER"),
-        "priority": pick(data.get("priority"), {"LOW","MEDIUM","HIGH","CRITICAL"}, "MEDIUM"),
-        "sentiment": pick(data.get("sentiment"), {"ANGRY","NEUTRAL","POSITIVE"}, "NEUTRAL"),
-        "summary": str(data.get("summary") or "")[:800],
-        "suggested_reply": str(data.get("suggested_reply") or "")[:2000],
-        "confidence": float(data.get("confidence") or 0.6),
-    }
+    get_cache().set(title, description, settings.OPENAI_MODEL, PROMPT_VERSION, result)
+    return _record(result, "model")
+
+def analyze_ticket(title: str, description: str, client=None):
+    result = _before_model(title, description, client is not None)
+    if result is not None:
+        return result
+
+    if client is None:
+        client = get_client()
+
+    try:
+        with metrics.stage("llm"):
+            resp = create_response(client, **_single_request(title, description))
+    except ProviderError:
+        return _fallback(title, description, "provider_error")
+    return _after_model(title, description, resp)
+
+async def analyze_ticket_async(title: str, description: str, client=None):
+    """``analyze_ticket`` with an ``AsyncOpenAI`` client.
+
+    The model call is awaited; the cache lookups (Redis) run in a worker thread.
+    """
+    result = await sync_to_async(_before_model, thread_sensitive=False)(title, description, client is not None)
+    if result is not None:
+        return result
+
+    if client is None:
+        client = get_async_client()
+
+    try:
+        with metrics.stage("llm"):
+            resp = await acreate_response(client, **_single_request(title, description))
+    except ProviderError:
+        return _fallback(title, description, "provider_error")
+    return await sync_to_async(_after_model, thread_sensitive=False)(title, description, resp)
+
+def analyze_ticket_stream(title: str, description: str, client=None):
+    """Triage one ticket, yielding the result before the reply is written.
+
+    The first item is the result dict. When it comes from the model its
+    ``suggested_reply`` is empty and str chunks of the reply follow as they
+    are generated; local, cached and fallback results are complete and
+    nothing follows. The full result is cached once the reply ends.
+    """
+    result = _before_model(title, description, client is not None)
+    if result is not None:
+        yield result
+        return
+
+    if client is None:
+        client = get_client()
+
+    try:
+        with metrics.stage("llm"):
+            resp = create_response(
+                client,
+                model=settings.OPENAI_MODEL,
+                input=[
+                    {"role": "system", "content": FIELDS_SYSTEM_PROMPT},
+                    {"role": "user", "content": _ticket_prompt(title, description)},
+                ],
+            )
+    except ProviderError:
+        yield _fallback(title, description, "provider_error")
+        return
+    metrics.record_usage(resp)
+
+    with metrics.stage("parse"):
+        data = _json_extract(getattr(resp, "output_text", "") or "")
+        result = _normalize(dict(data, suggested_reply="")) if isinstance(data, dict) else None
+    if result is None:
+        yield _fallback(title, description, "parse_error")
+        return
+    result["source"] = "model"
+    yield result
+
+    user = (
+        f"Ticket title: {title}\n\n"
+        f"Ticket description: {description}\n\n"
+        f"Category: {result['category']}, priority: {result['priority']}, sentiment: {result['sentiment']}."
+    )
+    reply = ""
+    start = time.perf_counter()
+    try:
+        with metrics.stage("reply"):
+            for delta in stream_response(
+                client,
+                model=settings.OPENAI_MODEL,
+                input=[
+                    {"role": "system", "content": REPLY_SYSTEM_PROMPT},
+                    {"role": "user", "content": user},
+                ],
+            ):
+                delta = delta[:2000 - len(reply)]
+                if not delta:
+                    continue
+                if not reply:
+                    metrics.STAGE_SECONDS.labels("reply_first_token").observe(time.perf_counter() - start)
+                reply += delta
+                yield delta
+    except (ProviderError, RateLimited):
+        # Keep a partial reply the agent may already be reading, but do not cache it.
+        metrics.FALLBACKS.labels("reply_error").inc()
+        complete = False
+    else:
+        complete = bool(reply)
+    if not reply:
+        yield TEMPLATE_REPLY
+    result["suggested_reply"] = reply or TEMPLATE_REPLY
+    if complete:
+        get_cache().set(title, description, settings.OPENAI_MODEL, PROMPT_VERSION, result)
+    metrics.record_result(result, "model")
+
+def analyze_tickets(tickets, client=None):
+    """Triage several tickets in one model call.
+
+    ``tickets`` is a list of ``(id, title, description)``; returns ``{id: result}``.
+    Tickets the local model is confident about and cached tickets are not sent
+    to the model. Items missing from the response or failing validation use
+    ``_fallback_ai``.
+    """
+    results = {}
+    remaining = []
+    for tid, title, description in tickets:
+        local = _local_ai(title, description)
+        if local is not None:
+            results[tid] = local
+        else:
+            remaining.append((tid, title, description))
+    if not remaining:
+        return results
+    if client is None and not settings.OPENAI_API_KEY:
+        results.update({tid: _fallback(title, description, "no_api_key") for tid, title, description in remaining})
+        return results
+
+    cache = get_cache()
+    pending = []
+    for tid, title, description in remaining:
+        cached = cache.get(title, description, settings.OPENAI_MODEL, PROMPT_VERSION)
+        if cached is not None:
+            results[tid] = _record(cached, "cache")
+        else:
+            pending.append((tid, title, description))
+    if not pending:
+        return results
+
+    if client is None:
+        client = get_client()
+
+    user = (
+        json.dumps([{"id": tid, "title": title, "description": description} for tid, title, description in pending])
+        + "\n\nReturn ONLY JSON."
+    )
+
+    try:
+        with metrics.stage("llm"):
+            resp = create_response(
+                client,
+                model=settings.OPENAI_MODEL,
+                input=[
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": user},
+                ],
+            )
+    except ProviderError:
+        for tid, title, description in pending:
+            results[tid] = _fallback(title, description, "provider_error")
+        return results
+    metrics.record_usage(resp)
+
+    with metrics.stage("parse"):
+        raw = getattr(resp, "output_text", "") or ""
+        data = _json_extract(raw)
+        items = data.get("results") if isinstance(data, dict) else None
+
+        by_id = {}
+        for item in items if isinstance(items, list) else []:
+            if isinstance(item, dict) and "id" in item:
+                by_id[str(item["id"])] = item
+
+    for tid, title, description in pending:
+        try:
+            result = _normalize(by_id[str(tid)])
+        except (KeyError, TypeError, ValueError):
+            results[tid] = _fallback(title, description, "parse_error" if items is None else "invalid_item")
+            continue
+        cache.set(title, description, settings.OPENAI_MODEL, PROMPT_VERSION, result)
+        results[tid] = _record(result, "model")
+    return results
@@ -1,5 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+def _start_background_runner(**kwargs):
+    from .background import runner
+
+    request_started.disconnect(_start_background_runner)
+    runner.start()
 
 class AiEngineConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "ai_engine"
+
+    def ready(self):
+        # Without a Celery worker, start the in-process runner with the first
+        # request so tickets left pending by a restart are picked up again.
+        if not settings.AI_ASYNC and settings.AI_BACKGROUND:
+            request_started.connect(_start_background_runner)
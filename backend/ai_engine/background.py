@@ -0,0 +1,150 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from tickets import etags
+from tickets.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRunner:
+    """Run AI triage on a bounded in-process thread pool (``AI_ASYNC=0``).
+
+    Tickets keep ``ai_status="PENDING"`` until triage is saved, so the ticket
+    table doubles as the persistent queue: twice every ``AI_BACKGROUND_STALE_AFTER``
+    seconds (and when a process starts) the runner picks up pending tickets
+    that nobody has touched for that long, e.g. because a process died mid-job
+    or before a scheduled retry fired. Retries are only timers in memory, so
+    that sweep is what brings back the ones a restart loses.
+
+    Provider errors do not reach ``_retry``: triage saves the keyword fallback
+    instead, without a version, so ``retriage_tickets`` redoes it later.
+
+    At most ``AI_BACKGROUND_QUEUE_SIZE`` tickets are queued, running or waiting
+    for a retry in a process. Each sweep touches those so no process claims
+    them again, and tickets submitted while the queue is full are left for a
+    later sweep.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._sweep = None
+        self._queued = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.AI_BACKGROUND_THREADS,
+                    thread_name_prefix="ai-triage",
+                )
+                self._executor.submit(self._recover)
+        return self._executor
+
+    def submit(self, ticket_id: int):
+        """Queue a ticket; False if it is already queued here or the queue is full."""
+        with self._lock:
+            if ticket_id in self._queued or len(self._queued) >= settings.AI_BACKGROUND_QUEUE_SIZE:
+                return False
+            self._queued.add(ticket_id)
+        self._submit(ticket_id)
+        return True
+
+    def _submit(self, ticket_id: int):
+        self.start().submit(self._run, ticket_id)
+
+    def join(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if self._sweep is not None:
+                self._sweep.cancel()
+                self._sweep = None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _run(self, ticket_id: int):
+        from .tasks import process_ticket_ai
+
+        retrying = False
+        try:
+            process_ticket_ai.run(ticket_id)
+        except Exception:
+            logger.exception("AI triage failed for ticket %s", ticket_id)
+            retrying = self._retry(ticket_id)
+        finally:
+            if not retrying:
+                with self._lock:
+                    self._queued.discard(ticket_id)
+            # Pool threads are long-lived: do not keep a connection per thread.
+            connection.close()
+
+    def _retry(self, ticket_id: int):
+        # Returns True when a retry is scheduled; the ticket stays in _queued
+        # until it runs. Touching updated_at keeps other processes' sweeps off it.
+        Ticket.objects.filter(id=ticket_id, ai_status="PENDING").update(
+            ai_attempts=F("ai_attempts") + 1, updated_at=timezone.now(),
+        )
+        attempts = Ticket.objects.filter(id=ticket_id, ai_status="PENDING").values_list("ai_attempts", flat=True).first()
+        if attempts is None:
+            return False
+        if attempts >= settings.AI_MAX_ATTEMPTS:
+            Ticket.objects.filter(id=ticket_id).update(ai_status="FAILED")
+            etags.touch([ticket_id])
+            return False
+
+        timer = threading.Timer(settings.AI_RETRY_DELAY * 2 ** (attempts - 1), self._submit, args=[ticket_id])
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def _schedule_sweep(self):
+        with self._lock:
+            if self._executor is None:
+                return
+            self._sweep = threading.Timer(settings.AI_BACKGROUND_STALE_AFTER / 2, self._run_sweep)
+            self._sweep.daemon = True
+            self._sweep.start()
+
+    def _run_sweep(self):
+        # On the timer thread, not the pool: a backlog must not delay it.
+        with self._lock:
+            running = self._executor is not None
+        if running:
+            self._recover()
+
+    def _recover(self):
+        try:
+            cutoff = timezone.now() - timedelta(seconds=settings.AI_BACKGROUND_STALE_AFTER)
+            with self._lock:
+                queued = set(self._queued)
+            if queued:
+                # Still ours, however long they wait in the pool.
+                Ticket.objects.filter(id__in=queued, ai_status="PENDING").update(updated_at=timezone.now())
+            room = settings.AI_BACKGROUND_QUEUE_SIZE - len(queued)
+            stale = (
+                Ticket.objects.filter(ai_status="PENDING", updated_at__lt=cutoff)
+                .exclude(id__in=queued)
+                .order_by("updated_at")
+                .values_list("id", "updated_at")[:max(room, 0)]
+            )
+            for ticket_id, updated_at in list(stale):
+                # Touch the row conditionally so only one process claims it.
+                claimed = Ticket.objects.filter(id=ticket_id, updated_at=updated_at).update(updated_at=timezone.now())
+                if claimed and not self.submit(ticket_id):
+                    break
+        except Exception:
+            logger.exception("Could not recover pending AI triage jobs")
+        finally:
+            connection.close()
+            self._schedule_sweep()
+
+
+runner = BackgroundRunner()
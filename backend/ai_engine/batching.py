@@ -0,0 +1,23 @@
+from .redis_client import get_redis
+
+PENDING_KEY = "ai:batch:pending"
+TIMER_KEY = "ai:batch:timer"
+
+def push(ticket_id: int):
+    """Buffer a ticket id and return the number of ids now pending."""
+    return get_redis().rpush(PENDING_KEY, ticket_id)
+
+def arm_timer(window: float):
+    """Return True for the caller that should schedule the time-window flush."""
+    return bool(get_redis().set(TIMER_KEY, 1, nx=True, px=max(int(window * 1000), 1)))
+
+def reset_timer():
+    get_redis().delete(TIMER_KEY)
+
+def drain(limit: int):
+    # LRANGE + LTRIM in one MULTI rather than LPOP with a count, which needs Redis 6.2.
+    pipe = get_redis().pipeline()
+    pipe.lrange(PENDING_KEY, 0, limit - 1)
+    pipe.ltrim(PENDING_KEY, limit, -1)
+    ids, _ = pipe.execute()
+    return [int(i) for i in ids]
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+from .redis_client import get_redis
+
+KEY_PREFIX = "ai:triage:"
+STATS_KEY = "ai:triage:stats"
+
+# SimHash fingerprints are split into SIM_BANDS bands; two fingerprints within
+# SIM_BANDS - 1 bits of each other always share at least one band exactly.
+SIM_BITS = 64
+SIM_BANDS = 4
+SIM_MAX_TOKENS = 400
+
+_WS = re.compile(r"\s+")
+
+def normalize_text(text: str):
+    return _WS.sub(" ", (text or "").lower()).strip()
+
+def cache_key(title: str, description: str, model: str, prompt_version: str):
+    raw = "\x1f".join([normalize_text(title), normalize_text(description), model, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def simhash(text: str):
+    tokens = normalize_text(text).split()[:SIM_MAX_TOKENS]
+    shingles = [" ".join(tokens[i:i + 3]) for i in range(max(len(tokens) - 2, 1))]
+    weights = [0] * SIM_BITS
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIM_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+    return sum(1 << bit for bit in range(SIM_BITS) if weights[bit] > 0)
+
+def _bands(fingerprint: int):
+    width = SIM_BITS // SIM_BANDS
+    mask = (1 << width) - 1
+    return [(fingerprint >> (i * width)) & mask for i in range(SIM_BANDS)]
+
+
+class LRUCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TriageCache:
+    """Two-tier (in-process LRU, then Redis) cache of LLM triage results.
+
+    Redis errors are treated as misses so the cache never breaks triage.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(settings.AI_CACHE_LOCAL_SIZE, settings.AI_CACHE_TTL)
+        self.counts = Counter()
+
+    @property
+    def enabled(self):
+        return settings.AI_CACHE_TTL > 0
+
+    def _count(self, name):
+        self.counts[name] += 1
+        try:
+            get_redis().hincrby(STATS_KEY, name, 1)
+        except Exception:
+            pass
+
+    def _redis_get(self, key):
+        try:
+            raw = get_redis().get(KEY_PREFIX + key)
+        except Exception:
+            return None
+        return json.loads(raw) if raw else None
+
+    def _near_get(self, title, description):
+        fingerprint = simhash(title + " " + description)
+        try:
+            r = get_redis()
+            members = r.sunion([f"{KEY_PREFIX}sim:{i}:{band}" for i, band in enumerate(_bands(fingerprint))])
+        except Exception:
+            return None
+        for member in members:
+            other, key = member.decode().split(":", 1)
+            if bin(int(other, 16) ^ fingerprint).count("1") <= settings.AI_CACHE_NEAR_DUP_DISTANCE:
+                value = self.local.get(key) or self._redis_get(key)
+                if value is not None:
+                    return value
+        return None
+
+    def get(self, title: str, description: str, model: str, prompt_version: str):
+        if not self.enabled:
+            return None
+        key = cache_key(title, description, model, prompt_version)
+
+        value = self.local.get(key)
+        if value is None:
+            value = self._redis_get(key)
+            if value is not None:
+                self.local.set(key, value)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        if settings.AI_CACHE_NEAR_DUP:
+            value = self._near_get(title, description)
+            if value is not None:
+                self.local.set(key, value)
+                self._count("near_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, title: str, description: str, model: str, prompt_version: str, result: dict):
+        if not self.enabled:
+            return
+        key = cache_key(title, description, model, prompt_version)
+        self.local.set(key, result)
+        ttl = int(settings.AI_CACHE_TTL)
+        try:
+            r = get_redis()
+            pipe = r.pipeline()
+            pipe.set(KEY_PREFIX + key, json.dumps(result), ex=ttl)
+            if settings.AI_CACHE_NEAR_DUP:
+                fingerprint = simhash(title + " " + description)
+                for i, band in enumerate(_bands(fingerprint)):
+                    band_key = f"{KEY_PREFIX}sim:{i}:{band}"
+                    pipe.sadd(band_key, f"{fingerprint:x}:{key}")
+                    pipe.expire(band_key, ttl)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def stats(self):
+        try:
+            raw = get_redis().hgetall(STATS_KEY)
+            counts = {k.decode(): int(v) for k, v in raw.items()}
+        except Exception:
+            counts = dict(self.counts)
+        hits = counts.get("hits", 0)
+        near_hits = counts.get("near_hits", 0)
+        misses = counts.get("misses", 0)
+        lookups = hits + near_hits + misses
+        return {
+            "hits": hits,
+            "near_hits": near_hits,
+            "misses": misses,
+            "hit_rate": (hits + near_hits) / lookups if lookups else None,
+        }
+
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = TriageCache()
+    return _cache
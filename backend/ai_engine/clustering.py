@@ -0,0 +1,130 @@
+import hashlib
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from tickets.models import Ticket
+from .cache import normalize_text
+from .models import TicketBand, TicketSignature
+
+# 96 MinHash permutations in 32 LSH bands of 3 rows: tickets whose shingle
+# sets have Jaccard similarity 0.4 share a band with probability ~0.88
+# (0.2 -> ~0.23, 0.05 -> ~0.004), so few dissimilar tickets are compared.
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE = 4
+MAX_CHARS = 2000
+MAX_CANDIDATES = 50
+DUPLICATE_SIMILARITY = 0.8
+
+_PRIME = (1 << 61) - 1
+
+
+def _hash64(data: bytes):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+# Permutations are (a * x + b) mod p on 32-bit shingle hashes, with a and b
+# drawn from [1, p). The product wraps at 2**64 like datasketch's MinHash;
+# small a would keep it nearly monotonic in x and break the min-wise property.
+_A = np.array([_hash64(f"minhash:a:{i}".encode()) % (_PRIME - 1) + 1 for i in range(NUM_PERM)], dtype=np.uint64)
+_B = np.array([_hash64(f"minhash:b:{i}".encode()) % _PRIME for i in range(NUM_PERM)], dtype=np.uint64)
+
+
+def shingles(text: str):
+    text = normalize_text(text)[:MAX_CHARS]
+    if len(text) <= SHINGLE:
+        return {text}
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+def minhash(text: str):
+    x = np.fromiter(
+        (_hash64(s.encode("utf-8")) & 0xFFFFFFFF for s in shingles(text)),
+        dtype=np.uint64,
+    )
+    return ((np.outer(_A, x) + _B[:, None]) % _PRIME & 0xFFFFFFFF).min(axis=1)
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(band.to_bytes(2, "big") + rows, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(a == b))
+
+
+def find_cluster(ticket_id: int, signature, keys):
+    """Return ``(cluster_id, similarity)`` of the most similar open ticket, or None.
+
+    Candidates come from the band index, so the cost depends on how many open
+    tickets collide with this one, not on how many are open.
+    """
+    since = timezone.now() - timedelta(hours=settings.CLUSTER_WINDOW_HOURS)
+    candidates = (
+        TicketBand.objects
+        .filter(key__in=keys, ticket__created_at__gte=since)
+        .exclude(ticket__status="RESOLVED")
+        .exclude(ticket_id=ticket_id)
+        .values("ticket_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared")[:MAX_CANDIDATES]
+    )
+    ids = [c["ticket_id"] for c in candidates]
+    if not ids:
+        return None
+
+    best, best_score = None, settings.CLUSTER_THRESHOLD
+    for other_id, raw in TicketSignature.objects.filter(ticket_id__in=ids).values_list("ticket_id", "minhash"):
+        score = similarity(signature, np.frombuffer(bytes(raw), dtype=np.uint64))
+        if score >= best_score:
+            best, best_score = other_id, score
+    if best is None:
+        return None
+    cluster_id = Ticket.objects.filter(id=best).values_list("cluster_id", flat=True).first()
+    return cluster_id or best, best_score
+
+
+def assign(ticket_id: int, title: str, description: str):
+    """Return the ticket's cluster id (its own id if nothing similar is open)."""
+    signature = minhash(f"{title}\n{description}")
+    keys = band_keys(signature)
+    match = find_cluster(ticket_id, signature, keys)
+
+    TicketBand.objects.filter(ticket_id=ticket_id).delete()
+    if match is not None and match[1] >= DUPLICATE_SIMILARITY:
+        # A near-exact copy adds nothing the cluster cannot already match;
+        # not indexing it keeps buckets small when an outage floods in
+        # hundreds of identical tickets.
+        TicketSignature.objects.filter(ticket_id=ticket_id).delete()
+        return match[0]
+
+    TicketSignature.objects.update_or_create(ticket_id=ticket_id, defaults={"minhash": signature.tobytes()})
+    TicketBand.objects.bulk_create([TicketBand(ticket_id=ticket_id, key=k) for k in keys])
+    return match[0] if match is not None else ticket_id
+
+
+def prune(batch_size=1000):
+    """Drop signatures and bands that can no longer match: of resolved tickets
+    or of tickets created before ``CLUSTER_WINDOW_HOURS``. Returns how many
+    tickets were dropped from the index."""
+    since = timezone.now() - timedelta(hours=settings.CLUSTER_WINDOW_HOURS)
+    stale = TicketSignature.objects.filter(Q(ticket__status="RESOLVED") | Q(ticket__created_at__lt=since))
+    n = 0
+    while True:
+        ids = list(stale.values_list("ticket_id", flat=True)[:batch_size])
+        if not ids:
+            return n
+        TicketBand.objects.filter(ticket_id__in=ids).delete()
+        TicketSignature.objects.filter(ticket_id__in=ids).delete()
+        n += len(ids)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import re
+import time
+from types import SimpleNamespace
+
+from .rules import default_classifier
+
+_SINGLE = re.compile(r"Ticket title: (.*?)\n\nTicket description: (.*)\n\nReturn ONLY JSON\.\Z", re.DOTALL)
+_REPLY = re.compile(r"Ticket title: (.*?)\n\nTicket description: ", re.DOTALL)
+
+
+class FakeOpenAI:
+    # Stand-in for the OpenAI client used by benchmarks: answers single and
+    # batch triage prompts with keyword-engine labels after a fixed round
+    # trip plus a per-ticket cost. Streamed replies arrive a word every
+    # ``per_chunk`` seconds after the round trip.
+    def __init__(self, latency: float = 0.05, per_ticket: float = 0.002, per_chunk: float = 0.02):
+        self.latency = latency
+        self.per_ticket = per_ticket
+        self.per_chunk = per_chunk
+        self.responses = SimpleNamespace(create=self._create)
+        self.calls = 0
+
+    def _answer(self, title, description):
+        return dict(
+            default_classifier.classify(title, description),
+            summary=title, suggested_reply="Thanks for reaching out!", confidence=0.9,
+        )
+
+    def _create(self, model, input, stream=False, **kwargs):
+        self.calls += 1
+        user = input[-1]["content"]
+        if stream:
+            return self._stream(user)
+        m = _SINGLE.match(user)
+        if m:
+            time.sleep(self.latency + self.per_ticket)
+            return self._response(user, json.dumps(self._answer(m.group(1), m.group(2))))
+
+        tickets = json.loads(user[:user.rindex("]") + 1])
+        time.sleep(self.latency + self.per_ticket * len(tickets))
+        results = [dict(self._answer(t["title"], t["description"]), id=t["id"]) for t in tickets]
+        return self._response(user, json.dumps({"results": results}))
+
+    def _response(self, prompt, text):
+        # Rough token counts (~4 characters each) so usage metrics move.
+        usage = SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=len(text) // 4)
+        return SimpleNamespace(output_text=text, usage=usage)
+
+    def _stream(self, prompt):
+        title = _REPLY.match(prompt).group(1)
+        words = (
+            f"Hi, thanks for reporting \"{title}\". We are looking into it and will follow up "
+            "with an update as soon as we know more. If you can, please send screenshots or the "
+            "exact error message you see."
+        ).split(" ")
+        time.sleep(self.latency)
+        for i, word in enumerate(words):
+            time.sleep(self.per_chunk)
+            yield SimpleNamespace(type="response.output_text.delta", delta=word if i == 0 else " " + word)
+        yield SimpleNamespace(type="response.completed", response=self._response(prompt, " ".join(words)))
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    # AsyncOpenAI stand-in for single-ticket triage: the round trip is an
+    # asyncio.sleep, so concurrent calls overlap on one event loop.
+    def __init__(self, latency: float = 0.05, per_ticket: float = 0.002):
+        super().__init__(latency, per_ticket)
+        self.responses = SimpleNamespace(create=self._acreate)
+
+    async def _acreate(self, model, input, **kwargs):
+        self.calls += 1
+        user = input[-1]["content"]
+        m = _SINGLE.match(user)
+        await asyncio.sleep(self.latency + self.per_ticket)
+        return self._response(user, json.dumps(self._answer(m.group(1), m.group(2))))
@@ -0,0 +1,184 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TRIAGEM1"
+FIELDS = {
+    "category": ["BILLING", "LOGIN", "TECH", "FEATURE", "OTHER"],
+    "priority": ["LOW", "MEDIUM", "HIGH", "CRITICAL"],
+    "sentiment": ["ANGRY", "NEUTRAL", "POSITIVE"],
+}
+MAX_TOKENS = 400
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def features(title: str, description: str, dim: int):
+    """Hashed binary features: title words, body words and bigrams, plus a bias.
+
+    Returns ``(indices, values)`` with values scaled to unit L2 norm.
+    """
+    title_words = _TOKEN.findall((title or "").lower())[:MAX_TOKENS]
+    words = title_words + _TOKEN.findall((description or "").lower())[:MAX_TOKENS]
+    grams = ["\x00bias"]
+    grams += ["t:" + w for w in title_words]
+    grams += words
+    grams += [a + " " + b for a, b in zip(words, words[1:])]
+    # crc32 is stable across processes, unlike hash().
+    mask = dim - 1
+    hashed = {zlib.crc32(g.encode()) & mask for g in grams}
+    idx = np.fromiter(hashed, dtype=np.int64, count=len(hashed))
+    return idx, np.full(len(idx), 1.0 / math.sqrt(len(idx)), dtype=np.float32)
+
+
+def _blocks():
+    out = {}
+    start = 0
+    for field, labels in FIELDS.items():
+        out[field] = (start, start + len(labels))
+        start += len(labels)
+    return out, start
+
+
+BLOCKS, NUM_OUTPUTS = _blocks()
+
+
+def _softmax(scores):
+    e = np.exp(scores - scores.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class LocalModel:
+    """Multinomial logistic regression per field over hashed n-grams.
+
+    Weights are one ``(dim, outputs)`` matrix shared by all fields, so a
+    prediction is a single gather of the ticket's feature rows.
+    """
+
+    def __init__(self, weights, dim: int, meta=None, version: str = ""):
+        self.weights = weights
+        self.dim = dim
+        self.meta = meta or {}
+        # Checksum of the saved file; part of ai_client.triage_version().
+        self.version = version
+
+    def predict(self, title: str, description: str):
+        """Return ``({field: label}, confidence)``; confidence is the least sure field's probability."""
+        idx, val = features(title, description, self.dim)
+        scores = (self.weights[idx].sum(axis=0, dtype=np.float32) * val[0]).tolist()
+        labels = {}
+        confidence = 1.0
+        # A dozen outputs: plain floats beat per-field NumPy calls here.
+        for field, (lo, hi) in BLOCKS.items():
+            block = scores[lo:hi]
+            top = max(block)
+            exps = [math.exp(x - top) for x in block]
+            best = exps.index(1.0)
+            labels[field] = FIELDS[field][best]
+            confidence = min(confidence, 1.0 / sum(exps))
+        return labels, confidence
+
+    def save(self, path: str):
+        """Write the model as a header and float16 weights, atomically replacing ``path``."""
+        header = json.dumps({"dim": self.dim, "fields": FIELDS, "meta": self.meta}).encode()
+        offset = -(-(len(MAGIC) + 4 + len(header)) // 64) * 64
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + len(header).to_bytes(4, "little") + header)
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(np.ascontiguousarray(self.weights, dtype="<f2").tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory-map a saved model; pages are shared by every process that loads it."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a triage model file")
+            size = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(size))
+        if header["fields"] != FIELDS:
+            raise ValueError(f"{path} was trained for different labels")
+        offset = -(-(len(MAGIC) + 4 + size) // 64) * 64
+        with open(path, "rb") as f:
+            crc = 0
+            while block := f.read(1 << 20):
+                crc = zlib.crc32(block, crc)
+        weights = np.memmap(path, dtype="<f2", mode="r", offset=offset, shape=(header["dim"], NUM_OUTPUTS))
+        # A plain ndarray view of the mapping skips np.memmap's per-index overhead.
+        return cls(weights.view(np.ndarray), header["dim"], header.get("meta"), crc.to_bytes(4, "big").hex())
+
+
+def train(rows, dim: int = 1 << 18, epochs: int = 5, lr: float = 0.5, l2: float = 1e-6, batch: int = 256, seed: int = 0):
+    """Fit a model on ``[(title, description, {field: label})]`` with mini-batch Adagrad."""
+    rng = np.random.default_rng(seed)
+    feats = [features(t, d, dim) for t, d, _ in rows]
+    targets = np.array([[FIELDS[f].index(labels[f]) for f in FIELDS] for _, _, labels in rows], dtype=np.int64)
+
+    weights = np.zeros((dim, NUM_OUTPUTS), dtype=np.float32)
+    squares = np.full((dim, NUM_OUTPUTS), 1e-8, dtype=np.float32)
+    for _ in range(epochs):
+        order = rng.permutation(len(rows))
+        for i in range(0, len(order), batch):
+            part = order[i:i + batch]
+            idx = np.concatenate([feats[j][0] for j in part])
+            val = np.concatenate([feats[j][1] for j in part])
+            lengths = np.array([len(feats[j][0]) for j in part])
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            row_of = np.repeat(np.arange(len(part)), lengths)
+
+            scores = np.add.reduceat(weights[idx] * val[:, None], starts)
+            grad = np.empty_like(scores)
+            for k, (lo, hi) in enumerate(BLOCKS.values()):
+                probs = _softmax(scores[:, lo:hi])
+                probs[np.arange(len(part)), targets[part, k]] -= 1.0
+                grad[:, lo:hi] = probs
+            grad /= len(part)
+
+            uniq, inv = np.unique(idx, return_inverse=True)
+            g = np.zeros((len(uniq), NUM_OUTPUTS), dtype=np.float32)
+            np.add.at(g, inv, grad[row_of] * val[:, None])
+            g += l2 * weights[uniq]
+            squares[uniq] += g * g
+            weights[uniq] -= lr * g / np.sqrt(squares[uniq])
+    return LocalModel(weights, dim)
+
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """The model at ``LOCAL_MODEL_PATH``, reloaded when the file is replaced.
+
+    None if unset, missing or unreadable; a file that fails to load is logged
+    once and retried only when it changes.
+    """
+    global _model, _model_mtime
+    path = settings.LOCAL_MODEL_PATH
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    if mtime != _model_mtime:
+        with _model_lock:
+            if mtime != _model_mtime:
+                try:
+                    model = LocalModel.load(path)
+                except Exception:
+                    logger.exception("Could not load local triage model %s; triaging without it", path)
+                    model = None
+                _model, _model_mtime = model, mtime
+    return _model
@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from ai_engine import queues
+from ai_engine.tasks import enqueue_tickets_ai
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "List AI triage dead letters, or requeue the FAILED tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--requeue", action="store_true",
+                            help="Reset every FAILED ticket to PENDING, queue it again and clear the list.")
+
+    def handle(self, *args, **opts):
+        if opts["requeue"]:
+            tickets = list(Ticket.objects.filter(ai_status="FAILED").only("id", "title", "description"))
+            Ticket.objects.filter(id__in=[t.id for t in tickets]).update(ai_status="PENDING", ai_attempts=0)
+            queues.release([t.id for t in tickets])
+            enqueue_tickets_ai(tickets)
+            queues.clear_dead_letters()
+            self.stdout.write(f"Requeued {len(tickets)} tickets")
+            return
+
+        depths, dead = queues.depths()
+        self.stdout.write("Queues: " + " ".join(f"{name}={count}" for name, count in depths.items()) + f" dead={dead}")
+        for entry in queues.dead_letters(opts["limit"]):
+            at = datetime.datetime.fromtimestamp(entry["at"]).isoformat(timespec="seconds")
+            self.stdout.write(f"{at} {entry['task']} tickets={entry['ticket_ids']} {entry['error']}")
@@ -0,0 +1,112 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ai_engine.ai_client import analyze_tickets
+from ai_engine.fake_client import FakeOpenAI
+from ai_engine.rules import CATEGORY_RULES, SENTIMENT_RULES, PRIORITY_RULES, default_classifier
+
+FILLER = (
+    "the app shows a spinner then nothing happens when i open the dashboard on my laptop "
+    "i tried another browser and cleared the cache but it still behaves the same way "
+    "stack trace line module handler request id user agent timestamp level info debug "
+).split()
+
+SAMPLES = [
+    ("Charged twice", "I was charged twice for my subscription, please refund asap"),
+    ("Cannot login", "Forgot password and the OTP never arrives"),
+    ("Dashboard broken", "Page not loading, 502 from the server"),
+    ("Dark mode", "It would be nice to have a dark mode option. Thanks!"),
+    ("Hello", "Just checking in about my account"),
+    ("Security", "Possible breach on my account, the site is down"),
+]
+
+
+def _naive_classify(title: str, description: str):
+    # Reference: scan every keyword list in full, as the original inline
+    # implementation of _fallback_ai did.
+    text = (title + " " + description).lower()
+    category = "OTHER"
+    for label, keywords in CATEGORY_RULES:
+        if any(k in text for k in keywords):
+            category = label
+            break
+    sentiment = "NEUTRAL"
+    for label, keywords in reversed(SENTIMENT_RULES):
+        if any(k in text for k in keywords):
+            sentiment = label
+    priority = "MEDIUM"
+    for label, keywords in reversed(PRIORITY_RULES):
+        if any(k in text for k in keywords):
+            priority = label
+    return {"category": category, "priority": priority, "sentiment": sentiment}
+
+
+def _make_ticket(rng, size):
+    title, description = rng.choice(SAMPLES)
+    words = []
+    n = len(description)
+    while n < size:
+        w = rng.choice(FILLER)
+        words.append(w)
+        n += len(w) + 1
+    # Bury the signal in the middle of the pasted log.
+    mid = len(words) // 2
+    return title, " ".join(words[:mid] + [description] + words[mid:])
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark the keyword triage engine against a naive full scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="200,51200", help="Comma separated ticket sizes in bytes.")
+        parser.add_argument("--tickets", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-sizes", default="", help="Also benchmark batched LLM triage, e.g. 1,8,32.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Fake model round trip in seconds.")
+        parser.add_argument("--per-ticket", type=float, default=0.002, help="Fake model cost per ticket in seconds.")
+
+    def _time(self, fn, tickets):
+        start = time.perf_counter()
+        for title, description in tickets:
+            fn(title, description)
+        return (time.perf_counter() - start) / len(tickets)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        for size in [int(s) for s in opts["sizes"].split(",") if s.strip()]:
+            tickets = [_make_ticket(rng, size) for _ in range(opts["tickets"])]
+
+            for title, description in tickets:
+                if _naive_classify(title, description) != default_classifier.classify(title, description):
+                    raise CommandError(f"Engine disagrees with naive scan on {title!r} ({size} bytes)")
+
+            naive = self._time(_naive_classify, tickets)
+            engine = self._time(default_classifier.classify, tickets)
+            self.stdout.write(
+                f"{size:>8} bytes  naive={naive * 1e6:9.1f}us  engine={engine * 1e6:9.1f}us  "
+                f"speedup={naive / engine:5.2f}x"
+            )
+
+        batch_sizes = [int(s) for s in opts["batch_sizes"].split(",") if s.strip()]
+        if batch_sizes:
+            # Every batch size sees the same tickets, so keep the triage cache out of it.
+            override = override_settings(AI_CACHE_TTL=0)
+            override.enable()
+            tickets = [(i, *_make_ticket(rng, 200)) for i in range(opts["tickets"])]
+            analyze_tickets(tickets[:1], client=FakeOpenAI(0, 0))  # warm up lazy SDK imports
+            for n in batch_sizes:
+                client = FakeOpenAI(opts["latency"], opts["per_ticket"])
+                start = time.perf_counter()
+                for i in range(0, len(tickets), n):
+                    chunk = tickets[i:i + n]
+                    results = analyze_tickets(chunk, client=client)
+                    if len(results) != len(chunk):
+                        raise CommandError(f"Batch of {len(chunk)} returned {len(results)} results")
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"batch={n:<4} requests={client.calls:<5} {len(tickets) / elapsed:8.1f} tickets/s"
+                )
+            override.disable()
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ai_engine import clustering
+from analytics_app import rollups
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Assign incident clusters to open tickets that do not have one (e.g. created before clustering)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Recluster every open ticket in the window, not only unclustered ones.")
+        parser.add_argument("--prune", action="store_true",
+                            help="Only drop the bands of resolved tickets and tickets outside the window (hourly under Celery beat).")
+
+    def handle(self, *args, **opts):
+        if opts["prune"]:
+            self.stdout.write(f"Pruned {clustering.prune()} ticket(s) from the cluster index.")
+            return
+        since = timezone.now() - timedelta(hours=settings.CLUSTER_WINDOW_HOURS)
+        qs = Ticket.objects.filter(created_at__gte=since).exclude(status="RESOLVED")
+        if not opts["all"]:
+            qs = qs.filter(cluster_id__isnull=True)
+
+        # Oldest first, so each incident is named after its first ticket.
+        n = 0
+        clusters = set()
+        for ticket_id, title, description in qs.order_by("created_at", "id").values_list("id", "title", "description").iterator():
+            with transaction.atomic():
+                old = rollups.snapshot(ticket_id, lock=True)
+                if old is None:
+                    continue
+                cluster_id = clustering.assign(ticket_id, title, description)
+                Ticket.objects.filter(id=ticket_id).update(cluster_id=cluster_id)
+                rollups.record_change(old, dict(old, cluster_id=cluster_id))
+            clusters.add(cluster_id)
+            n += 1
+        self.stdout.write(f"Clustered {n} ticket(s) into {len(clusters)} incident(s).")
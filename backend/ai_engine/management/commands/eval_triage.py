@@ -0,0 +1,212 @@
+import json
+import os
+import resource
+import statistics
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ai_engine import ai_client
+from ai_engine.fake_client import FakeOpenAI
+from ai_engine.local_model import LocalModel
+
+FIELDS = ("category", "priority", "sentiment")
+LABELS = {
+    "category": ["BILLING", "LOGIN", "TECH", "FEATURE", "OTHER"],
+    "priority": ["LOW", "MEDIUM", "HIGH", "CRITICAL"],
+    "sentiment": ["ANGRY", "NEUTRAL", "POSITIVE"],
+}
+BACKENDS = ("rules", "local", "fake", "llm")
+
+_worker = {}
+
+
+def _init_worker(backend, latency, cache, model_path):
+    # Runs once per pool process: settings overrides and clients are per process.
+    if not cache:
+        override_settings(AI_CACHE_TTL=0).enable()
+    _worker["backend"] = backend
+    _worker["client"] = FakeOpenAI(latency=latency) if backend == "fake" else None
+    _worker["model"] = LocalModel.load(model_path) if backend == "local" else None
+
+
+def _triage_chunk(rows):
+    """Triage ``[(title, description)]`` in a pool process; returns ``[(result, seconds)]``."""
+    out = []
+    for title, description in rows:
+        start = time.perf_counter()
+        if _worker["backend"] == "rules":
+            result = ai_client._fallback_ai(title, description)
+        elif _worker["backend"] == "local":
+            labels, confidence = _worker["model"].predict(title, description)
+            result = dict(labels, confidence=confidence)
+        else:
+            result = ai_client.analyze_ticket(title, description, client=_worker["client"])
+        out.append((result, time.perf_counter() - start))
+    return out
+
+
+def _read(path, limit):
+    """Yield ``(title, description, expected)`` from a JSONL file without loading it."""
+    with open(path, encoding="utf-8") as f:
+        n = 0
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f"{path}:{lineno}: invalid JSON ({exc})")
+            title = str(row.get("title") or "")
+            # "body" lets issue/request style corpora be replayed as-is.
+            description = str(row.get("description") or row.get("body") or "")
+            expected = {f: str(row[f]).upper() for f in FIELDS if row.get(f)}
+            yield title, description, expected
+            n += 1
+            if limit and n >= limit:
+                return
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _max_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux.
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a JSONL corpus of tickets through a triage backend in a process pool. "
+        "Reports tickets/s, memory and, for lines carrying category/priority/sentiment "
+        "labels, agreement and confusion matrices."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="JSONL file: one object per line with title and description (or body).")
+        parser.add_argument("--backend", choices=BACKENDS, default="rules",
+                            help="rules: keyword fallback; local: the local model alone (no threshold); "
+                                 "fake: analyze_ticket with a fake LLM client; llm: real OpenAI calls.")
+        parser.add_argument("--model", default=settings.LOCAL_MODEL_PATH, help="Model file for the local backend.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--chunk", type=int, default=200, help="Tickets per pool task.")
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many tickets.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Fake model round trip in seconds.")
+        parser.add_argument("--cache", action="store_true", help="Use the AI result cache (off by default).")
+        parser.add_argument("--record", help="Write each ticket with the backend's labels to this JSONL file, "
+                                             "e.g. to replay an llm run as the reference for rules.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **opts):
+        if not os.path.exists(opts["corpus"]):
+            raise CommandError(f"No such file: {opts['corpus']}")
+        if opts["backend"] == "llm" and not settings.OPENAI_API_KEY:
+            raise CommandError("The llm backend needs OPENAI_API_KEY; without it every ticket would use the fallback.")
+        if opts["backend"] == "local" and not (opts["model"] and os.path.exists(opts["model"])):
+            raise CommandError("The local backend needs --model or LOCAL_MODEL_PATH pointing at a trained model.")
+
+        confusion = {f: defaultdict(Counter) for f in FIELDS}
+        predicted = {f: Counter() for f in FIELDS}
+        timings = []
+        record = open(opts["record"], "w", encoding="utf-8") if opts["record"] else None
+
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max(1, opts["workers"]),
+                initializer=_init_worker,
+                initargs=(opts["backend"], opts["latency"], opts["cache"], opts["model"]),
+            ) as pool:
+                # Keep a bounded number of chunks in flight so the corpus is streamed.
+                pending = deque()
+                chunks = _chunks(_read(opts["corpus"], opts["limit"]), max(1, opts["chunk"]))
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(_triage_chunk, [(t, d) for t, d, _ in chunk])))
+                    if len(pending) >= 2 * opts["workers"]:
+                        self._collect(*pending.popleft(), confusion, predicted, timings, record)
+                while pending:
+                    self._collect(*pending.popleft(), confusion, predicted, timings, record)
+        finally:
+            if record:
+                record.close()
+        elapsed = time.perf_counter() - start
+
+        report = self._report(opts, elapsed, timings, confusion, predicted)
+        if opts["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self._print(report)
+
+    def _collect(self, chunk, future, confusion, predicted, timings, record):
+        for (title, description, expected), (result, seconds) in zip(chunk, future.result()):
+            timings.append(seconds)
+            for f in FIELDS:
+                predicted[f][result[f]] += 1
+                if f in expected:
+                    confusion[f][expected[f]][result[f]] += 1
+            if record:
+                record.write(json.dumps({
+                    "title": title, "description": description,
+                    **{f: result[f] for f in FIELDS}, "confidence": result["confidence"],
+                }) + "\n")
+
+    def _report(self, opts, elapsed, timings, confusion, predicted):
+        timings.sort()
+        n = len(timings)
+        report = {
+            "backend": opts["backend"],
+            "workers": opts["workers"],
+            "tickets": n,
+            "seconds": round(elapsed, 3),
+            "tickets_per_s": round(n / elapsed, 1) if elapsed else None,
+            "p50_ms": round(statistics.median(timings) * 1e3, 3) if n else None,
+            "p99_ms": round(timings[min(n - 1, int(n * 0.99))] * 1e3, 3) if n else None,
+            "max_rss_mb": {
+                "main": _max_rss_mb(resource.RUSAGE_SELF),
+                "workers": _max_rss_mb(resource.RUSAGE_CHILDREN),
+            },
+            "fields": {},
+        }
+        for f in FIELDS:
+            rows = confusion[f]
+            labelled = sum(sum(c.values()) for c in rows.values())
+            agree = sum(rows[label][label] for label in rows)
+            report["fields"][f] = {
+                "predicted": dict(predicted[f]),
+                "labelled": labelled,
+                "agreement": round(agree / labelled, 4) if labelled else None,
+                "confusion": {exp: dict(got) for exp, got in sorted(rows.items())},
+            }
+        return report
+
+    def _print(self, r):
+        self.stdout.write(
+            f"backend={r['backend']} workers={r['workers']} tickets={r['tickets']} "
+            f"{r['seconds']:.2f}s {r['tickets_per_s']} tickets/s p50={r['p50_ms']}ms p99={r['p99_ms']}ms "
+            f"max_rss main={r['max_rss_mb']['main']}MB workers={r['max_rss_mb']['workers']}MB"
+        )
+        for f in FIELDS:
+            info = r["fields"][f]
+            if not info["labelled"]:
+                dist = ", ".join(f"{k}={v}" for k, v in sorted(info["predicted"].items()))
+                self.stdout.write(f"\n{f}: no labels in corpus; predicted {dist}")
+                continue
+            labels = [l for l in LABELS[f] if l in info["confusion"] or l in info["predicted"]]
+            self.stdout.write(f"\n{f}: agreement {info['agreement']:.1%} over {info['labelled']} labelled (rows: expected, columns: predicted)")
+            width = max(len(l) for l in labels) + 2
+            self.stdout.write(" " * width + "".join(l.rjust(width) for l in labels))
+            for exp in labels:
+                got = info["confusion"].get(exp, {})
+                self.stdout.write(exp.ljust(width) + "".join(str(got.get(l, 0)).rjust(width) for l in labels))
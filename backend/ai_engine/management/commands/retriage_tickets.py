@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from ai_engine import retriage
+from ai_engine.models import RetriageJob
+from ai_engine.tasks import dispatch_retriage
+from supportdesk.celery import app as celery_app
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-triage every ticket whose ai_version differs from the current model, prompt, "
+        "keyword rules and local model. Progress is checkpointed; running it again resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=100, help="Tickets per task (one bulk_update each).")
+        parser.add_argument("--parallel", type=int, default=4, help="Chunks in flight at once.")
+        parser.add_argument("--inline", action="store_true",
+                            help="Run in this process with --parallel threads instead of on the Celery worker.")
+        parser.add_argument("--stale-after", type=float, default=900,
+                            help="Seconds without a checkpoint after which a queued run is presumed dead and resumed.")
+        parser.add_argument("--status", action="store_true", help="Show recent jobs and exit.")
+
+    def _show(self, job):
+        self.stdout.write(
+            f"#{job.id} {job.status} version={job.version!r} processed={job.processed}/{job.total} "
+            f"failed={job.failed} last_id={job.last_id} updated={job.updated_at.isoformat(timespec='seconds')}"
+        )
+
+    def handle(self, *args, **opts):
+        if opts["status"]:
+            for job in RetriageJob.objects.order_by("-id")[:10]:
+                self._show(job)
+            return
+
+        job, created = retriage.start(max(1, opts["chunk_size"]), max(1, opts["parallel"]))
+        self.stdout.write(
+            f"{'Started' if created else 'Resuming'} job #{job.id} for {job.version!r}: "
+            f"{job.total} stale tickets, continuing after id {job.last_id}"
+        )
+
+        if opts["inline"] or celery_app.conf.task_always_eager:
+            self._run_inline(job)
+            return
+
+        idle = (timezone.now() - job.updated_at).total_seconds()
+        if not created and idle < opts["stale_after"]:
+            self.stdout.write(f"Already queued (last checkpoint {idle:.0f}s ago); follow it with --status")
+            return
+        if dispatch_retriage(job.id):
+            self.stdout.write("Queued on the worker; follow it with --status")
+        else:
+            self.stdout.write("Nothing to do")
+
+    def _run_inline(self, job):
+        def work(ids):
+            try:
+                return retriage.run_chunk(ids, job.version)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(job.parallel) as pool:
+            while chunks := retriage.next_window(job):
+                results = list(pool.map(work, chunks))
+                retriage.checkpoint(job.id, chunks[-1][-1], results)
+                job.refresh_from_db()
+                self._show(job)
+        retriage.finish(job.id)
+        job.refresh_from_db()
+        self._show(job)
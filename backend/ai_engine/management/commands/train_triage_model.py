@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_engine.local_model import FIELDS, train
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Train the local triage classifier on stored LLM triage results (or a labelled JSONL "
+        "corpus) and export it for LOCAL_MODEL_PATH."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=settings.LOCAL_MODEL_PATH or "triage_model.bin")
+        parser.add_argument("--corpus", help="Labelled JSONL (title, description, category, priority, sentiment) "
+                                             "instead of the ticket table, e.g. from eval_triage --record.")
+        parser.add_argument("--min-confidence", type=float, default=0.6,
+                            help="Ignore stored results below this confidence.")
+        parser.add_argument("--limit", type=int, default=200000, help="Train on at most this many recent tickets.")
+        parser.add_argument("--dim-bits", type=int, default=18, help="Hash 2**N features.")
+        parser.add_argument("--epochs", type=int, default=5)
+        parser.add_argument("--holdout", type=float, default=0.1, help="Fraction kept aside for the report.")
+        parser.add_argument("--threshold", type=float, default=settings.LOCAL_MODEL_THRESHOLD)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _rows(self, opts):
+        if opts["corpus"]:
+            with open(opts["corpus"], encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        yield row.get("title") or "", row.get("description") or row.get("body") or "", row
+            return
+        qs = (
+            # Only labels the LLM produced: training on the local model's own
+            # (or the keyword rules') answers would just reinforce them.
+            Ticket.objects.filter(
+                ai_status="DONE", ai_source__in=("model", "cache"), ai_confidence__gte=opts["min_confidence"],
+            )
+            .order_by("-id")
+            .values("title", "description", *FIELDS)[:opts["limit"]]
+        )
+        for row in qs.iterator(chunk_size=2000):
+            yield row["title"], row["description"], row
+
+    def handle(self, *args, **opts):
+        rows = []
+        for title, description, row in self._rows(opts):
+            labels = {f: str(row.get(f) or "").upper() for f in FIELDS}
+            if all(labels[f] in FIELDS[f] for f in FIELDS):
+                rows.append((title, description, labels))
+        if len(rows) < 10:
+            raise CommandError(f"Only {len(rows)} labelled tickets; need at least 10 to train.")
+
+        rng = np.random.default_rng(opts["seed"])
+        order = rng.permutation(len(rows))
+        n_test = int(len(rows) * opts["holdout"])
+        test = [rows[i] for i in order[:n_test]]
+        fit = [rows[i] for i in order[n_test:]]
+
+        start = time.perf_counter()
+        model = train(fit, dim=1 << opts["dim_bits"], epochs=opts["epochs"], seed=opts["seed"])
+        self.stdout.write(f"Trained on {len(fit)} tickets in {time.perf_counter() - start:.1f}s")
+
+        if test:
+            correct = {f: 0 for f in FIELDS}
+            confident = confident_correct = 0
+            start = time.perf_counter()
+            for title, description, labels in test:
+                predicted, confidence = model.predict(title, description)
+                hits = [predicted[f] == labels[f] for f in FIELDS]
+                for f, hit in zip(FIELDS, hits):
+                    correct[f] += hit
+                if confidence >= opts["threshold"]:
+                    confident += 1
+                    confident_correct += all(hits)
+            per_ticket = (time.perf_counter() - start) / len(test)
+            self.stdout.write(
+                "Holdout accuracy: "
+                + " ".join(f"{f}={correct[f] / len(test):.1%}" for f in FIELDS)
+                + f" ({per_ticket * 1e6:.0f}us/ticket)"
+            )
+            self.stdout.write(
+                f"At threshold {opts['threshold']}: {confident / len(test):.1%} of tickets skip the LLM, "
+                f"{confident_correct / confident:.1%} of those fully correct" if confident else
+                f"At threshold {opts['threshold']}: no ticket is confident enough to skip the LLM"
+            )
+
+        model.meta = {"trained_on": len(fit), "dim_bits": opts["dim_bits"], "trained_at": int(time.time())}
+        model.save(opts["output"])
+        self.stdout.write(f"Wrote {opts['output']} ({os.path.getsize(opts['output']) / 1e6:.1f} MB)")
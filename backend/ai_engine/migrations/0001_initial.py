@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("tickets", "0004_ticket_cluster_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketSignature",
+            fields=[
+                ("ticket", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="signature", serialize=False, to="tickets.ticket")),
+                ("minhash", models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TicketBand",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.BigIntegerField()),
+                ("ticket", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="lsh_bands", to="tickets.ticket")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["key"], name="ticket_band_key_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_engine", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetriageJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.CharField(max_length=120)),
+                ("status", models.CharField(choices=[("RUNNING", "Running"), ("DONE", "Done")], default="RUNNING", max_length=20)),
+                ("chunk_size", models.PositiveIntegerField()),
+                ("parallel", models.PositiveIntegerField()),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("total", models.PositiveIntegerField(default=0)),
+                ("processed", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import models
+
+from tickets.models import Ticket
+
+class TicketSignature(models.Model):
+    """MinHash signature of a ticket's text, used to cluster incidents."""
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, primary_key=True, related_name="signature")
+    minhash = models.BinaryField()
+
+class TicketBand(models.Model):
+    """One LSH band of a signature; tickets sharing a key are cluster candidates."""
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="lsh_bands")
+    key = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["key"], name="ticket_band_key_idx"),
+        ]
+
+class RetriageJob(models.Model):
+    """Progress of a ``retriage_tickets`` run, checkpointed after every window of chunks.
+
+    Tickets up to ``last_id`` have been handled; a restarted run for the same
+    ``version`` continues after it.
+    """
+    STATUS_CHOICES = [
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+    ]
+
+    version = models.CharField(max_length=120)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="RUNNING")
+    chunk_size = models.PositiveIntegerField()
+    parallel = models.PositiveIntegerField()
+    last_id = models.BigIntegerField(default=0)
+    # Stale tickets when the job started; processed/failed count tickets.
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"retriage #{self.id} {self.version} {self.status} {self.processed}/{self.total}"
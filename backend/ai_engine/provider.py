@@ -0,0 +1,314 @@
+import asyncio
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+from supportdesk import metrics
+
+# One OpenAI client per process: the SDK keeps a pooled keep-alive HTTP
+# connection and retries 429/5xx/connection errors with exponential backoff
+# and jitter, so reusing it avoids a TLS handshake per ticket.
+_client = None
+_client_lock = threading.Lock()
+_slots = None
+# The async client and its call slots belong to one event loop each.
+_async_clients = weakref.WeakKeyDictionary()
+_async_slots = weakref.WeakKeyDictionary()
+
+
+class ProviderError(Exception):
+    """The provider could not be called or returned an error."""
+
+
+class RateLimited(Exception):
+    """No ``OPENAI_RATE_LIMIT`` call could be taken in time.
+
+    Not a ``ProviderError``: the provider is fine, so callers retry the
+    ticket later instead of saving a fallback result.
+    """
+
+
+class CircuitBreaker:
+    """Stop calling the provider after ``threshold`` consecutive failures.
+
+    While open, calls are refused for ``cooldown`` seconds; after that a
+    single trial call is let through and closes the breaker on success.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """End a trial call that had no outcome, e.g. one that was cancelled."""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+breaker = CircuitBreaker(
+    threshold=settings.OPENAI_BREAKER_THRESHOLD,
+    cooldown=settings.OPENAI_BREAKER_COOLDOWN,
+)
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    timeout=settings.OPENAI_TIMEOUT,
+                    max_retries=settings.OPENAI_MAX_RETRIES,
+                )
+    return _client
+
+
+def set_client(client):
+    """Replace the shared client (e.g. with a fake for benchmarks); returns the old one."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    return previous
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        from openai import AsyncOpenAI
+
+        client = _async_clients[loop] = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.OPENAI_TIMEOUT,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+    return client
+
+
+def set_async_client(client):
+    """Replace the current event loop's async client; returns the old one."""
+    loop = asyncio.get_running_loop()
+    previous = _async_clients.get(loop)
+    _async_clients[loop] = client
+    return previous
+
+
+def _get_slots():
+    global _slots
+    if _slots is None:
+        with _client_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(settings.OPENAI_MAX_CONCURRENCY)
+    return _slots
+
+
+def _acquire_rate(deadline: float):
+    """Take one of the OPENAI_RATE_LIMIT calls per second shared by every process.
+
+    Fixed one-second windows counted in Redis; waits for the next window until
+    ``deadline`` (monotonic). Returns False if no call could be taken by then.
+    """
+    limit = settings.OPENAI_RATE_LIMIT
+    if limit <= 0:
+        return True
+    from .redis_client import get_redis
+
+    r = get_redis()
+    while True:
+        now = time.time()
+        window = int(now)
+        pipe = r.pipeline()
+        pipe.incr(f"ai:ratelimit:{window}")
+        pipe.expire(f"ai:ratelimit:{window}", 2)
+        count, _ = pipe.execute()
+        if count <= limit:
+            return True
+        wait = window + 1 - now
+        if time.monotonic() + wait > deadline:
+            return False
+        time.sleep(wait)
+
+
+def _is_outage(exc):
+    import openai
+
+    return isinstance(exc, (
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    ))
+
+
+def _take_slot():
+    if breaker.state == "open":
+        raise ProviderError("circuit open")
+    # Waits come before breaker.allow(): a refusal (or a Redis error) while
+    # waiting must not leave a half-open trial claimed with no call to end it.
+    if not _acquire_rate(time.monotonic() + settings.OPENAI_TIMEOUT):
+        raise RateLimited("rate limited")
+
+    slots = _get_slots()
+    if not slots.acquire(timeout=settings.OPENAI_TIMEOUT):
+        # Every slot has been busy for a full request timeout: treat the
+        # provider as degraded rather than queueing more callers behind it.
+        breaker.record_failure()
+        raise ProviderError("too many concurrent requests")
+    if not breaker.allow():
+        slots.release()
+        raise ProviderError("circuit open")
+    return slots
+
+
+def _record_error(exc):
+    if _is_outage(exc):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return ProviderError(str(exc))
+
+
+def create_response(client, **kwargs):
+    """Call ``client.responses.create`` behind the breaker and concurrency limit.
+
+    Raises ``ProviderError`` instead of waiting when the breaker is open or no
+    call slot frees up within ``OPENAI_TIMEOUT``, and for any error once the
+    SDK's own retries are exhausted; ``RateLimited`` when no rate limit
+    window frees up within ``OPENAI_TIMEOUT``.
+    """
+    from openai import OpenAIError
+
+    slots = _take_slot()
+    try:
+        resp = client.responses.create(**kwargs)
+    except OpenAIError as exc:
+        raise _record_error(exc) from exc
+    except Exception as exc:
+        # Anything else still ends the call (and a half-open trial) as a failure.
+        breaker.record_failure()
+        raise ProviderError(repr(exc)) from exc
+    finally:
+        slots.release()
+
+    breaker.record_success()
+    return resp
+
+
+async def acreate_response(client, **kwargs):
+    """``create_response`` for an ``AsyncOpenAI`` client: waits without holding a thread.
+
+    Shares the breaker and rate limit with the sync path; the concurrency
+    limit is a separate ``OPENAI_MAX_CONCURRENCY`` per event loop.
+    """
+    from openai import OpenAIError
+
+    if breaker.state == "open":
+        raise ProviderError("circuit open")
+    if settings.OPENAI_RATE_LIMIT > 0:
+        if not await asyncio.to_thread(_acquire_rate, time.monotonic() + settings.OPENAI_TIMEOUT):
+            raise RateLimited("rate limited")
+
+    loop = asyncio.get_running_loop()
+    slots = _async_slots.get(loop)
+    if slots is None:
+        slots = _async_slots[loop] = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+    # The slot is taken before breaker.allow(), so a request cancelled while
+    # it waits (e.g. the client disconnected) holds no half-open trial.
+    try:
+        await asyncio.wait_for(slots.acquire(), settings.OPENAI_TIMEOUT)
+    except asyncio.TimeoutError:
+        breaker.record_failure()
+        raise ProviderError("too many concurrent requests")
+    if not breaker.allow():
+        slots.release()
+        raise ProviderError("circuit open")
+    try:
+        resp = await client.responses.create(**kwargs)
+    except OpenAIError as exc:
+        raise _record_error(exc) from exc
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as exc:
+        breaker.record_failure()
+        raise ProviderError(repr(exc)) from exc
+    finally:
+        slots.release()
+
+    breaker.record_success()
+    return resp
+
+
+def stream_response(client, **kwargs):
+    """Like ``create_response`` with ``stream=True``: yields output text deltas.
+
+    The call slot is held until the stream ends. Usage from the final event is
+    recorded in the metrics. Any error while streaming raises ``ProviderError``.
+    """
+    from openai import OpenAIError
+
+    slots = _take_slot()
+    try:
+        for event in client.responses.create(stream=True, **kwargs):
+            if event.type == "response.output_text.delta":
+                yield event.delta
+            elif event.type == "response.completed":
+                metrics.record_usage(event.response)
+            elif event.type in ("response.failed", "error"):
+                breaker.record_failure()
+                raise ProviderError(f"stream {event.type}")
+    except OpenAIError as exc:
+        raise _record_error(exc) from exc
+    except ProviderError:
+        raise
+    except GeneratorExit:
+        # Closed early by the caller: no outcome for the breaker.
+        breaker.release()
+        raise
+    except Exception as exc:
+        breaker.record_failure()
+        raise ProviderError(repr(exc)) from exc
+    finally:
+        slots.release()
+
+    breaker.record_success()
@@ -0,0 +1,82 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from realtime import events
+from tickets import etags
+from tickets.models import Ticket
+from .redis_client import get_redis
+from .rules import default_classifier
+
+logger = logging.getLogger(__name__)
+
+HIGH = "ai-high"
+NORMAL = "ai-normal"
+LOW = "ai-low"
+QUEUES = (HIGH, NORMAL, LOW)
+
+CLAIM_PREFIX = "ai:queued:"
+DEAD_LETTER_KEY = "ai:deadletter"
+DEAD_LETTER_MAX = 10000
+
+
+def queue_for(title: str, description: str):
+    """Route with the keyword rules: likely HIGH/CRITICAL tickets jump the line."""
+    priority = default_classifier.priority.match((title + " " + description).lower())
+    return HIGH if priority in ("HIGH", "CRITICAL") else NORMAL
+
+
+def claim(ticket_ids):
+    """Mark tickets as queued; returns the ids that were not already queued."""
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return []
+    pipe = get_redis().pipeline(transaction=False)
+    for ticket_id in ticket_ids:
+        pipe.set(f"{CLAIM_PREFIX}{ticket_id}", 1, nx=True, ex=settings.AI_DEDUPE_TTL)
+    return [ticket_id for ticket_id, ok in zip(ticket_ids, pipe.execute()) if ok]
+
+
+def release(ticket_ids):
+    if ticket_ids:
+        get_redis().delete(*[f"{CLAIM_PREFIX}{ticket_id}" for ticket_id in ticket_ids])
+
+
+def dead_letter(ticket_ids, task: str, exc: Exception):
+    """Give up on tickets: mark them FAILED and keep a record for ``ai_dead_letters``."""
+    logger.error("AI triage gave up on tickets %s in %s: %r", ticket_ids, task, exc)
+    with transaction.atomic():
+        Ticket.objects.filter(id__in=ticket_ids, ai_status="PENDING").update(ai_status="FAILED")
+        etags.touch(ticket_ids)
+        for ticket_id in ticket_ids:
+            transaction.on_commit(lambda ticket_id=ticket_id: events.ticket_updated(ticket_id))
+    try:
+        entry = json.dumps({"ticket_ids": list(ticket_ids), "task": task, "error": repr(exc)[:500], "at": time.time()})
+        pipe = get_redis().pipeline()
+        pipe.lpush(DEAD_LETTER_KEY, entry)
+        pipe.ltrim(DEAD_LETTER_KEY, 0, DEAD_LETTER_MAX - 1)
+        pipe.execute()
+    except Exception:
+        # FAILED status is the durable record; the list is for inspection.
+        logger.exception("Could not record dead letter for tickets %s", ticket_ids)
+
+
+def dead_letters(limit: int = 100):
+    return [json.loads(raw) for raw in get_redis().lrange(DEAD_LETTER_KEY, 0, limit - 1)]
+
+
+def clear_dead_letters():
+    get_redis().delete(DEAD_LETTER_KEY)
+
+
+def depths():
+    """Messages waiting per AI queue, plus the dead-letter list length."""
+    pipe = get_redis().pipeline(transaction=False)
+    for name in QUEUES:
+        pipe.llen(name)
+    pipe.llen(DEAD_LETTER_KEY)
+    *counts, dead = pipe.execute()
+    return dict(zip(QUEUES, counts)), dead
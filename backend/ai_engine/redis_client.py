@@ -0,0 +1,10 @@
+import redis
+from django.conf import settings
+
+_conn = None
+
+def get_redis():
+    global _conn
+    if _conn is None:
+        _conn = redis.Redis.from_url(settings.REDIS_URL)
+    return _conn
@@ -0,0 +1,133 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from analytics_app import rollups
+from search import index as search_index
+from tickets import etags
+from tickets.models import Ticket
+from .ai_client import analyze_ticket, analyze_tickets, triage_version
+from .models import RetriageJob
+
+logger = logging.getLogger(__name__)
+
+SAVED_FIELDS = (
+    "category", "priority", "sentiment", "ai_summary", "ai_suggested_reply", "ai_confidence", "ai_status", "ai_version",
+    "ai_source",
+)
+
+
+def result_fields(result: dict, version: str = None):
+    """Ticket field values for a triage result."""
+    return dict(
+        category=result["category"],
+        priority=result["priority"],
+        sentiment=result["sentiment"],
+        ai_summary=result["summary"],
+        ai_suggested_reply=result["suggested_reply"],
+        ai_confidence=result["confidence"],
+        ai_status="DONE",
+        ai_version="" if result.get("stale") else (version or triage_version()),
+        ai_source=result.get("source", ""),
+    )
+
+
+def stale(version: str):
+    # PENDING tickets have never been triaged; the regular pipeline owns them.
+    return Ticket.objects.exclude(ai_version=version).exclude(ai_status="PENDING")
+
+
+def start(chunk_size: int, parallel: int):
+    """The running job for the current triage version, or a new one; returns ``(job, created)``."""
+    version = triage_version()
+    job = RetriageJob.objects.filter(version=version, status="RUNNING").order_by("-id").first()
+    if job is not None:
+        RetriageJob.objects.filter(id=job.id).update(chunk_size=chunk_size, parallel=parallel)
+        job.chunk_size, job.parallel = chunk_size, parallel
+        return job, False
+    job = RetriageJob.objects.create(
+        version=version, chunk_size=chunk_size, parallel=parallel, total=stale(version).count(),
+    )
+    return job, True
+
+
+def next_window(job):
+    """The next ``parallel`` chunks of stale ticket ids after the checkpoint, in id order."""
+    ids = list(
+        stale(job.version).filter(id__gt=job.last_id)
+        .order_by("id").values_list("id", flat=True)[:job.chunk_size * job.parallel]
+    )
+    return [ids[i:i + job.chunk_size] for i in range(0, len(ids), job.chunk_size)]
+
+
+def _save(tickets, results):
+    texts = {tid: (title, description) for tid, title, description in tickets}
+    version = triage_version()
+    with transaction.atomic():
+        rows = list(
+            Ticket.objects.select_for_update()
+            .filter(id__in=list(results))
+            .only("title", "description", *rollups.ROLLUP_FIELDS)
+        )
+        saved = []
+        changes = []
+        for ticket in rows:
+            if (ticket.title, ticket.description) != texts[ticket.id]:
+                # Edited since it was read: the result is for the old text.
+                continue
+            old = rollups.values_of(ticket)
+            for name, value in result_fields(results[ticket.id], version).items():
+                setattr(ticket, name, value)
+            saved.append(ticket)
+            changes.append((old, rollups.values_of(ticket)))
+
+        # The text is unchanged, so incidents (cluster_id) are kept.
+        Ticket.objects.bulk_update(saved, SAVED_FIELDS, batch_size=500)
+        ids = [t.id for t in saved]
+        rollups.record_changes(changes)
+        etags.touch(ids)
+        transaction.on_commit(lambda: search_index.update_tickets(ids))
+    return len(saved)
+
+
+def run_chunk(ticket_ids, version: str):
+    """Re-triage the tickets still stale for ``version``; returns ``(saved, failed)``.
+
+    Errors are logged rather than raised so a window always reaches its
+    checkpoint; failed tickets stay stale for the next run.
+    """
+    try:
+        tickets = list(
+            stale(version).filter(id__in=ticket_ids).order_by("id").values_list("id", "title", "description")
+        )
+        size = settings.AI_BATCH_SIZE
+        if size > 1:
+            results = {}
+            for i in range(0, len(tickets), size):
+                results.update(analyze_tickets(tickets[i:i + size]))
+        else:
+            results = {tid: analyze_ticket(title, description) for tid, title, description in tickets}
+        # A fallback standing in for a failed model call would overwrite a
+        # good result; leave those tickets stale for the next run.
+        fresh = {tid: result for tid, result in results.items() if not result.get("stale")}
+        return _save(tickets, fresh), len(results) - len(fresh)
+    except Exception:
+        logger.exception("Re-triage failed for tickets %s..%s", ticket_ids[0], ticket_ids[-1])
+        return 0, len(ticket_ids)
+
+
+def checkpoint(job_id: int, last_id: int, results):
+    RetriageJob.objects.filter(id=job_id).update(
+        last_id=last_id,
+        processed=F("processed") + sum(saved for saved, _ in results),
+        failed=F("failed") + sum(failed for _, failed in results),
+        updated_at=timezone.now(),
+    )
+
+
+def finish(job_id: int):
+    now = timezone.now()
+    RetriageJob.objects.filter(id=job_id).update(status="DONE", finished_at=now, updated_at=now)
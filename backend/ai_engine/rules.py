@@ -0,0 +1,106 @@
+import zlib
+
+# Ordered (label, keywords) rules per field, highest precedence first. The
+# first rule with a keyword found in the lowercased ticket text wins.
+CATEGORY_RULES = [
+    ("BILLING", [
+        "charge", "charged", "overcharged", "double charged", "billing",
+        "refund", "refunded", "invoice", "payment", "paid",
+        "card", "credit card", "debit card",
+        "transaction", "amount deducted", "money deducted",
+        "subscription", "plan", "pricing",
+        "renewal", "renewed",
+        "failed payment", "payment failed",
+        "receipt", "tax", "fee",
+    ]),
+    ("LOGIN", [
+        "login", "log in", "signin", "sign in", "sign-in",
+        "password", "forgot password", "reset password",
+        "otp", "one time password",
+        "2fa", "two factor", "verification code",
+        "authentication", "auth",
+        "account locked", "locked out",
+        "cannot login", "unable to login",
+        "access denied", "session expired",
+    ]),
+    ("TECH", [
+        "bug", "issue", "error", "exception",
+        "500", "502", "503", "504",
+        "crash", "crashes", "crashed",
+        "not working", "doesn't work", "does not work",
+        "broken", "failure", "failed",
+        "timeout", "timed out",
+        "loading", "stuck", "hang", "freeze", "freezing",
+        "slow", "lag", "latency",
+        "page not loading", "blank page",
+        "server down", "service unavailable",
+        "api error", "backend error", "frontend issue",
+    ]),
+    ("FEATURE", [
+        "feature", "feature request",
+        "request", "enhancement",
+        "add", "support for",
+        "can you add", "would be nice",
+        "it would be helpful",
+        "improvement", "improve",
+        "new feature",
+        "enable", "option",
+        "export", "download",
+        "dark mode", "theme",
+        "integration", "api support",
+    ]),
+]
+
+SENTIMENT_RULES = [
+    ("POSITIVE", ["thanks", "thank you", "love", "great"]),
+    ("ANGRY", ["angry", "worst", "terrible", "asap", "immediately", "hate"]),
+]
+
+PRIORITY_RULES = [
+    ("CRITICAL", ["security", "breach", "charged twice", "fraud"]),
+    ("HIGH", ["asap", "urgent", "immediately", "critical", "down"]),
+]
+
+
+def _minimize(keywords):
+    # A keyword that contains another keyword of the same rule can never
+    # change the outcome of ``any(k in text ...)``, so it is dropped. Shorter
+    # keywords are also the most likely to hit, so they are tried first.
+    kept = []
+    for k in sorted(set(keywords), key=lambda k: (len(k), k)):
+        if not any(s in k for s in kept):
+            kept.append(k)
+    return tuple(kept)
+
+
+class KeywordRule:
+    def __init__(self, rules, default):
+        self.default = default
+        self.rules = tuple((label, _minimize(keywords)) for label, keywords in rules)
+
+    def match(self, text: str):
+        for label, keywords in self.rules:
+            for k in keywords:
+                if k in text:
+                    return label
+        return self.default
+
+
+class KeywordClassifier:
+    def __init__(self, category_rules, sentiment_rules, priority_rules):
+        # Changes whenever the tables do; part of ai_client.triage_version().
+        self.version = zlib.crc32(repr((category_rules, sentiment_rules, priority_rules)).encode()).to_bytes(4, "big").hex()
+        self.category = KeywordRule(category_rules, "OTHER")
+        self.sentiment = KeywordRule(sentiment_rules, "NEUTRAL")
+        self.priority = KeywordRule(priority_rules, "MEDIUM")
+
+    def classify(self, title: str, description: str):
+        text = (title + " " + description).lower()
+        return {
+            "category": self.category.match(text),
+            "priority": self.priority.match(text),
+            "sentiment": self.sentiment.match(text),
+        }
+
+
+default_classifier = KeywordClassifier(CATEGORY_RULES, SENTIMENT_RULES, PRIORITY_RULES)
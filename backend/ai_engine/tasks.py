@@ -1,22 +1,260 @@
-from celery import shared_task
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from celery import chord, group, shared_task
+from django.conf import settings
 from django.db import transaction
+from tickets import etags
 from tickets.models import Ticket
-from .ai_client import analyze_ticket
+from analytics_app import rollups
+from realtime import events
+from search import index as search_index
+from supportdesk import metrics
+from . import batching, clustering, queues, retriage
+from .ai_client import TEMPLATE_REPLY, analyze_ticket, analyze_ticket_async, analyze_ticket_stream, analyze_tickets
+from .models import RetriageJob
 
-@shared_task
-def process_ticket_ai(ticket_id: int):
-    ticket = Ticket.objects.filter(id=ticket_id).first()
+logger = logging.getLogger(__name__)
+
+def _save_result(ticket_id: int, title: str, description: str, result: dict):
+    # Must run inside a transaction: the row is locked so the rollup delta
+    # matches what was actually overwritten.
+    old = rollups.snapshot(ticket_id, lock=True)
+    if old is None:
+        return
+    cluster_id = None
+    if settings.CLUSTER_ENABLED:
+        with metrics.stage("cluster"):
+            cluster_id = clustering.assign(ticket_id, title, description)
+    Ticket.objects.filter(id=ticket_id).update(**retriage.result_fields(result), cluster_id=cluster_id)
+    rollups.record_change(old, dict(
+        old, category=result["category"], priority=result["priority"], sentiment=result["sentiment"], cluster_id=cluster_id,
+    ))
+    etags.touch([ticket_id])
+    transaction.on_commit(lambda: search_index.update_tickets([ticket_id]))
+    transaction.on_commit(lambda: events.ticket_updated(ticket_id))
+
+def _triage_one(ticket_id: int):
+    with metrics.stage("db_read"):
+        ticket = Ticket.objects.filter(id=ticket_id).first()
     if not ticket:
         return
+    if settings.AI_STREAM_REPLY:
+        _triage_streaming(ticket)
+        return
 
     result = analyze_ticket(ticket.title, ticket.description)
 
-    with transaction.atomic():
-        Ticket.objects.filter(id=ticket_id).update(
-            category=result["category"],
-            priority=result["priority"],
-            sentiment=result["sentiment"],
-            ai_summary=result["summary"],
-            ai_suggested_reply=result["suggested_reply"],
-            ai_confidence=result["confidence"],
-        )
+    _save_in_transaction(ticket_id, ticket.title, ticket.description, result)
+
+def _save_in_transaction(ticket_id: int, title: str, description: str, result: dict):
+    with metrics.stage("db_write"), transaction.atomic():
+        _save_result(ticket_id, title, description, result)
+
+async def triage_ticket_async(ticket_id: int):
+    """Inline triage for async views: the model call is awaited, not run on a thread.
+
+    Streamed replies (``AI_STREAM_REPLY``) use the sync client, so they do run
+    on a worker thread.
+    """
+    if settings.AI_STREAM_REPLY:
+        await sync_to_async(_triage_one, thread_sensitive=False)(ticket_id)
+        return
+    ticket = await Ticket.objects.filter(id=ticket_id).only("title", "description").afirst()
+    if not ticket:
+        return
+    result = await analyze_ticket_async(ticket.title, ticket.description)
+    await sync_to_async(_save_in_transaction)(ticket_id, ticket.title, ticket.description, result)
+
+def _save_reply(ticket, text: str, done: bool):
+    Ticket.objects.filter(id=ticket.id).update(ai_suggested_reply=text)
+    etags.touch([ticket.id], ticket.created_by_id)
+    events.ticket_reply(ticket.id, ticket.created_by_id, text, done)
+
+def _triage_streaming(ticket):
+    # Fields are saved (and pushed) as soon as the short structured call
+    # returns; the reply is then written into the ticket as it streams.
+    stream = analyze_ticket_stream(ticket.title, ticket.description)
+    result = next(stream)
+    with metrics.stage("db_write"), transaction.atomic():
+        _save_result(ticket.id, ticket.title, ticket.description, result)
+    if result["suggested_reply"]:
+        # Local, cached or fallback result: already complete.
+        return
+
+    reply = ""
+    flushed = 0.0  # push the first chunk right away
+    try:
+        for delta in stream:
+            reply += delta
+            if time.monotonic() - flushed >= settings.AI_STREAM_FLUSH_INTERVAL:
+                _save_reply(ticket, reply, done=False)
+                flushed = time.monotonic()
+    finally:
+        # Whatever breaks off the stream, never leave the reply empty.
+        stream.close()
+        _save_reply(ticket, reply or TEMPLATE_REPLY, done=True)
+
+def _triage_batch(ticket_ids):
+    with metrics.stage("db_read"):
+        tickets = list(Ticket.objects.filter(id__in=ticket_ids).values_list("id", "title", "description"))
+    if not tickets:
+        return
+
+    results = analyze_tickets(tickets)
+
+    with metrics.stage("db_write"), transaction.atomic():
+        for ticket_id, title, description in tickets:
+            if ticket_id in results:
+                _save_result(ticket_id, title, description, results[ticket_id])
+
+def _retry_or_dead_letter(task, ticket_ids, exc, **options):
+    # Retries go back to the task's own queue with exponential backoff; after
+    # AI_MAX_ATTEMPTS the tickets are dead-lettered. Called directly (not from
+    # a worker), retry() re-raises exc for the caller to handle.
+    retries = task.request.retries or 0
+    if retries + 1 < settings.AI_MAX_ATTEMPTS:
+        raise task.retry(exc=exc, countdown=settings.AI_RETRY_DELAY * 2 ** retries, **options)
+    queues.dead_letter(ticket_ids, task.name, exc)
+
+@shared_task(bind=True, max_retries=None)
+def process_ticket_ai(self, ticket_id: int, claimed: bool = False):
+    metrics.record_queue_wait(self.request)
+    try:
+        _triage_one(ticket_id)
+    except Exception as exc:
+        _retry_or_dead_letter(self, [ticket_id], exc)
+    if claimed:
+        queues.release([ticket_id])
+
+@shared_task(bind=True, max_retries=None)
+def process_ticket_ai_batch(self, ticket_ids, claimed: bool = False):
+    metrics.record_queue_wait(self.request)
+    try:
+        _triage_batch(ticket_ids)
+    except Exception as exc:
+        _retry_or_dead_letter(self, ticket_ids, exc)
+    if claimed:
+        queues.release(ticket_ids)
+
+@shared_task
+def flush_ticket_ai_batch():
+    metrics.record_queue_wait(flush_ticket_ai_batch.request)
+    batching.reset_timer()
+    claimed = not _eager()
+    while True:
+        ticket_ids = batching.drain(settings.AI_BATCH_SIZE)
+        if not ticket_ids:
+            return
+        process_ticket_ai_batch.apply_async((ticket_ids,), {"claimed": claimed}, queue=queues.NORMAL)
+
+@shared_task(bind=True, max_retries=None)
+def process_tickets_ai(self, ticket_ids, claimed: bool = False):
+    metrics.record_queue_wait(self.request)
+    # One message for a whole chunk of tickets, e.g. from a bulk import. Only
+    # the tickets that failed are retried.
+    size = getattr(settings, "AI_BATCH_SIZE", 1)
+    parts = [ticket_ids[i:i + size] for i in range(0, len(ticket_ids), size)] if size > 1 else [[t] for t in ticket_ids]
+    failed = []
+    error = None
+    for part in parts:
+        try:
+            if size > 1:
+                _triage_batch(part)
+            else:
+                _triage_one(part[0])
+        except Exception as exc:
+            logger.warning("AI triage failed for tickets %s: %r", part, exc)
+            failed += part
+            error = exc
+        else:
+            if claimed:
+                queues.release(part)
+    if failed:
+        _retry_or_dead_letter(self, failed, error, args=[failed], kwargs={"claimed": claimed})
+        if claimed:
+            queues.release(failed)
+
+@shared_task
+def prune_cluster_index():
+    return clustering.prune()
+
+@shared_task
+def retriage_chunk(ticket_ids, version: str):
+    return retriage.run_chunk(ticket_ids, version)
+
+@shared_task
+def retriage_window_done(results, job_id: int, last_id: int):
+    retriage.checkpoint(job_id, last_id, results)
+    dispatch_retriage(job_id)
+
+def dispatch_retriage(job_id: int):
+    """Queue the job's next window as a chord; returns False once nothing is left.
+
+    The window's ``parallel`` chunks run side by side on the low queue, and the
+    chord callback checkpoints the job and dispatches the following window, so
+    at most one window per job is in flight.
+    """
+    job = RetriageJob.objects.get(id=job_id)
+    if job.status != "RUNNING":
+        return False
+    chunks = retriage.next_window(job)
+    if not chunks:
+        retriage.finish(job.id)
+        return False
+    header = [retriage_chunk.signature((ids, job.version), queue=queues.LOW) for ids in chunks]
+    chord(header)(retriage_window_done.signature((job.id, chunks[-1][-1]), queue=queues.LOW))
+    return True
+
+def _eager():
+    return process_ticket_ai.app.conf.task_always_eager
+
+def _dedupe(ticket_ids):
+    # Eager tasks finish before enqueueing returns, so nothing is in flight
+    # to dedupe against (and no broker or Redis is needed).
+    if _eager():
+        return list(ticket_ids), False
+    return queues.claim(ticket_ids), True
+
+def enqueue_tickets_ai(tickets):
+    """Queue triage for many new tickets, e.g. a bulk import.
+
+    Likely urgent tickets go to the high queue and the rest to the low queue,
+    so a backfill does not hold up tickets created interactively.
+    """
+    wanted, claimed = _dedupe(t.id for t in tickets)
+    wanted = set(wanted)
+    by_queue = {queues.HIGH: [], queues.LOW: []}
+    for t in tickets:
+        if t.id in wanted:
+            urgent = queues.queue_for(t.title, t.description) == queues.HIGH
+            by_queue[queues.HIGH if urgent else queues.LOW].append(t.id)
+
+    chunk = settings.AI_ENQUEUE_CHUNK
+    signatures = [
+        process_tickets_ai.signature((ids[i:i + chunk],), {"claimed": claimed}, queue=queue)
+        for queue, ids in by_queue.items()
+        for i in range(0, len(ids), chunk)
+    ]
+    if signatures:
+        group(signatures).apply_async()
+
+def enqueue_ticket_ai(ticket):
+    """Queue triage for one ticket; returns False if it is already queued."""
+    ids, claimed = _dedupe([ticket.id])
+    if not ids:
+        return False
+
+    queue = queues.queue_for(ticket.title, ticket.description)
+    size = getattr(settings, "AI_BATCH_SIZE", 1)
+    if size <= 1 or queue == queues.HIGH:
+        process_ticket_ai.apply_async((ticket.id,), {"claimed": claimed}, queue=queue)
+        return True
+
+    pending = batching.push(ticket.id)
+    if pending >= size:
+        flush_ticket_ai_batch.apply_async(queue=queues.NORMAL)
+    elif batching.arm_timer(settings.AI_BATCH_WINDOW):
+        flush_ticket_ai_batch.apply_async(countdown=settings.AI_BATCH_WINDOW, queue=queues.NORMAL)
+    return True
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from tickets.models import Ticket
+from . import provider, tasks
+from .ai_client import TEMPLATE_REPLY, analyze_tickets
+
+
+def _item(tid, category="BILLING", **fields):
+    item = dict(
+        id=tid, category=category, priority="HIGH", sentiment="ANGRY",
+        summary=f"Summary {tid}", suggested_reply=f"Reply {tid}", confidence=0.9,
+    )
+    return dict(item, **fields)
+
+
+class FakeBatchClient:
+    """Answers every call with ``text`` and keeps the prompts it was sent."""
+
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+        self.responses = SimpleNamespace(create=self._create)
+
+    def _create(self, model, input, **kwargs):
+        self.prompts.append(input[-1]["content"])
+        return SimpleNamespace(output_text=self.text, usage=None)
+
+
+@override_settings(AI_CACHE_TTL=0, LOCAL_MODEL_PATH="", OPENAI_RATE_LIMIT=0)
+class BatchTriageTests(TestCase):
+    TICKETS = [
+        (1, "Charged twice", "My card was billed twice"),
+        (2, "Cannot log in", "Password reset link fails"),
+        (3, "Feature idea", "Please add dark mode"),
+    ]
+
+    def _analyze(self, payload):
+        text = payload if isinstance(payload, str) else json.dumps(payload)
+        client = FakeBatchClient(text)
+        return analyze_tickets(self.TICKETS, client=client), client
+
+    def _assert_fallback(self, result):
+        self.assertEqual(result["source"], "fallback")
+        self.assertEqual(result["suggested_reply"], TEMPLATE_REPLY)
+        self.assertTrue(result["stale"])
+
+    def test_results_are_mapped_back_by_id(self):
+        results, client = self._analyze({"results": [_item(1), _item(2, "LOGIN"), _item(3, "FEATURE")]})
+        self.assertEqual(len(client.prompts), 1)
+        sent = json.loads(client.prompts[0][:client.prompts[0].rindex("]") + 1])
+        self.assertEqual([t["id"] for t in sent], [1, 2, 3])
+        self.assertEqual({tid: r["category"] for tid, r in results.items()}, {1: "BILLING", 2: "LOGIN", 3: "FEATURE"})
+        self.assertEqual(results[2]["summary"], "Summary 2")
+        self.assertEqual({r["source"] for r in results.values()}, {"model"})
+
+    def test_reordered_extra_and_missing_ids(self):
+        # Ticket 2 is missing, 99 was never sent and the order is reversed;
+        # ids may come back as strings.
+        results, _ = self._analyze({"results": [_item("3", "FEATURE"), _item(99, "TECH"), _item(1)]})
+        self.assertEqual(set(results), {1, 2, 3})
+        self.assertEqual(results[1]["category"], "BILLING")
+        self.assertEqual(results[3]["category"], "FEATURE")
+        self._assert_fallback(results[2])
+
+    def test_invalid_item_falls_back_for_that_ticket_only(self):
+        results, _ = self._analyze({"results": [_item(1), _item(2, confidence="very"), _item(3, "FEATURE")]})
+        self.assertEqual(results[1]["source"], "model")
+        self.assertEqual(results[3]["source"], "model")
+        self._assert_fallback(results[2])
+        self.assertEqual(results[2]["category"], "LOGIN")  # from the keyword rules
+
+    def test_response_without_an_array_falls_back_per_ticket(self):
+        for payload in ("Sorry, I cannot help with that.", {"results": "none"}, {"answer": [_item(1)]}):
+            with self.subTest(payload=payload):
+                results, _ = self._analyze(payload)
+                self.assertEqual(set(results), {1, 2, 3})
+                for result in results.values():
+                    self._assert_fallback(result)
+
+    @override_settings(CLUSTER_ENABLED=False, OPENAI_API_KEY="test")
+    def test_triage_batch_saves_each_ticket(self):
+        user = User.objects.create(username="owner")
+        tickets = [Ticket.objects.create(title=t, description=d, created_by=user) for _, t, d in self.TICKETS]
+        items = [_item(tickets[2].id, "FEATURE"), _item(tickets[0].id), _item(tickets[1].id, confidence="?")]
+        client = FakeBatchClient(json.dumps({"results": items}))
+        with mock.patch.object(tasks, "analyze_tickets", lambda rows: analyze_tickets(rows, client=client)):
+            tasks._triage_batch([t.id for t in tickets])
+
+        saved = {t.id: t for t in Ticket.objects.filter(id__in=[t.id for t in tickets])}
+        first, second, third = (saved[t.id] for t in tickets)
+        self.assertEqual((first.category, first.ai_source, first.ai_summary), ("BILLING", "model", f"Summary {first.id}"))
+        self.assertEqual((third.category, third.ai_source), ("FEATURE", "model"))
+        self.assertEqual((second.ai_status, second.ai_source, second.ai_version), ("DONE", "fallback", ""))
+        self.assertNotEqual(first.ai_version, "")
+
+
+class HangingAsyncClient:
+    """Async client whose calls never finish until cancelled."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.responses = SimpleNamespace(create=self._create)
+
+    async def _create(self, **kwargs):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+@override_settings(OPENAI_MAX_CONCURRENCY=1, OPENAI_RATE_LIMIT=0, OPENAI_TIMEOUT=30)
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        # The breaker is shared by the whole process; start and end closed.
+        provider.breaker.record_success()
+        self.addCleanup(provider.breaker.record_success)
+
+    def test_cancelled_while_waiting_for_a_slot_keeps_the_trial(self):
+        async def scenario():
+            client = HangingAsyncClient()
+            holder = asyncio.create_task(provider.acreate_response(client))
+            await client.started.wait()
+            # The breaker opens and cools down while the only slot is busy.
+            breaker = provider.breaker
+            breaker.opened_at = time.monotonic() - breaker.cooldown - 1
+            waiter = asyncio.create_task(provider.acreate_response(client))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(breaker.state, "half-open")
+            self.assertTrue(breaker.allow(), "the cancelled waiter kept the half-open trial")
+            breaker.release()
+            holder.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await holder
+
+        asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = "analytics:version"
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+def invalidate():
+    """Make every cached analytics response stale; called whenever a ticket changes."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+def cached_response(prefix: str, params: dict, compute):
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    key = f"analytics:{prefix}:{_version()}:{digest}"
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, timeout=settings.ANALYTICS_CACHE_TTL)
+    return data
@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from analytics_app import rollups
+from tickets.models import Ticket
+from tickets.seed import seed_tickets
+
+
+def _summary_from_tickets():
+    # The pre-rollup implementation of AnalyticsSummaryView, kept as the baseline.
+    total = Ticket.objects.count()
+    by_status = list(Ticket.objects.values("status").annotate(count=Count("id")).order_by("status"))
+    by_category = list(Ticket.objects.values("category").annotate(count=Count("id")).order_by("-count"))
+    by_sentiment = list(Ticket.objects.values("sentiment").annotate(count=Count("id")).order_by("-count"))
+    resolved = Ticket.objects.filter(status="RESOLVED", resolved_at__isnull=False)
+    avg_resolution_seconds = None
+    if resolved.exists():
+        duration = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
+        avg_duration = resolved.annotate(d=duration).aggregate(avg=Avg("d"))["avg"]
+        if avg_duration:
+            avg_resolution_seconds = avg_duration.total_seconds()
+    return {"total": total, "by_status": by_status, "by_category": by_category,
+            "by_sentiment": by_sentiment, "avg_resolution_seconds": avg_resolution_seconds}
+
+
+class Command(BaseCommand):
+    help = "Compare analytics summary latency: raw ticket aggregates vs rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded tickets.")
+
+    def _time(self, fn, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1e3
+
+    def handle(self, *args, **opts):
+        user, _ = User.objects.get_or_create(username="bench-analytics")
+        staff, _ = User.objects.get_or_create(username="bench-analytics-staff", defaults={"is_staff": True})
+        try:
+            start = time.perf_counter()
+            seed_tickets([user], opts["tickets"])
+            rollups.rebuild()
+            if rollups.drift():
+                raise CommandError("Rollups disagree with the ticket table")
+            self.stdout.write(f"Seeded {opts['tickets']} tickets in {time.perf_counter() - start:.1f}s")
+
+            client = APIClient()
+            client.force_authenticate(staff)
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                raw = self._time(_summary_from_tickets, opts["repeat"])
+                rolled = self._time(rollups.summary, opts["repeat"])
+                endpoint = self._time(lambda: client.get("/api/analytics/summary/"), opts["repeat"])
+            self.stdout.write(
+                f"tickets={Ticket.objects.count()} raw={raw:.2f}ms rollups={rolled:.2f}ms endpoint={endpoint:.2f}ms"
+            )
+        finally:
+            if not opts["keep"]:
+                with rollups.paused():
+                    user.delete()
+                    staff.delete()
+                rollups.rebuild()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics_app import rollups
+
+
+class Command(BaseCommand):
+    help = "Backfill or reconcile the analytics rollup table from the ticket table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report buckets that drifted; exit 1 if any.")
+
+    def handle(self, *args, **opts):
+        if opts["check"]:
+            drift = rollups.drift()
+            for key, (stored, expected) in sorted(drift.items(), key=lambda kv: str(kv[0])):
+                self.stdout.write(f"{key}: stored={stored} expected={expected}")
+            if drift:
+                raise CommandError(f"{len(drift)} rollup bucket(s) out of date")
+            self.stdout.write("Rollups are up to date.")
+            return
+
+        n = rollups.rebuild()
+        self.stdout.write(f"Rebuilt {n} rollup bucket(s).")
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="TicketRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("status", models.CharField(max_length=20)),
+                ("category", models.CharField(max_length=30)),
+                ("sentiment", models.CharField(max_length=20)),
+                ("priority", models.CharField(max_length=20)),
+                ("count", models.IntegerField(default=0)),
+                ("resolved_count", models.IntegerField(default=0)),
+                ("resolution_seconds", models.FloatField(default=0.0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("day", "status", "category", "sentiment", "priority"), name="unique_ticket_rollup_bucket"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Coalesce
+
+def backfill(apps, schema_editor):
+    Ticket = apps.get_model("tickets", "Ticket")
+    OpenIncident = apps.get_model("analytics_app", "OpenIncident")
+    rows = (
+        Ticket.objects.exclude(status="RESOLVED")
+        .values(key=Coalesce("cluster_id", "id", output_field=models.BigIntegerField()))
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    OpenIncident.objects.bulk_create(
+        [OpenIncident(key=r["key"], open_count=r["n"]) for r in rows.iterator()], batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics_app", "0002_archivedrollup"),
+        ("tickets", "0006_ticket_ai_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OpenIncident",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.BigIntegerField(unique=True)),
+                ("open_count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
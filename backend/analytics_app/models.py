@@ -0,0 +1,53 @@
+from django.db import models
+
+class TicketRollup(models.Model):
+    # Running ticket counts per (creation day, status, category, sentiment,
+    # priority), kept current by analytics_app.rollups.
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    category = models.CharField(max_length=30)
+    sentiment = models.CharField(max_length=20)
+    priority = models.CharField(max_length=20)
+
+    count = models.IntegerField(default=0)
+    resolved_count = models.IntegerField(default=0)
+    resolution_seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "status", "category", "sentiment", "priority"],
+                name="unique_ticket_rollup_bucket",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.category}/{self.sentiment}/{self.priority}: {self.count}"
+
+class ArchivedRollup(models.Model):
+    # The part of TicketRollup that belongs to archived tickets, added once
+    # when they are archived, so rebuilds need not scan the archive.
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    category = models.CharField(max_length=30)
+    sentiment = models.CharField(max_length=20)
+    priority = models.CharField(max_length=20)
+
+    count = models.IntegerField(default=0)
+    resolved_count = models.IntegerField(default=0)
+    resolution_seconds = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "status", "category", "sentiment", "priority"],
+                name="unique_archived_rollup_bucket",
+            ),
+        ]
+
+class OpenIncident(models.Model):
+    # Open tickets per incident (the tickets' cluster_id, or a ticket's own id
+    # until it is clustered), kept current by analytics_app.rollups. Only
+    # incidents with open tickets have a row, so counting them is cheap.
+    key = models.BigIntegerField(unique=True)
+    open_count = models.IntegerField(default=0)
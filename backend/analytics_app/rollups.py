@@ -0,0 +1,296 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from realtime import events
+from tickets.models import Ticket
+from . import cache as analytics_cache
+from .models import ArchivedRollup, OpenIncident, TicketRollup
+
+# id and cluster_id place open tickets in OpenIncident; the rest pick the bucket.
+ROLLUP_FIELDS = ("id", "created_at", "status", "category", "sentiment", "priority", "resolved_at", "cluster_id")
+BUCKET_FIELDS = ("day", "status", "category", "sentiment", "priority")
+
+_state = threading.local()
+
+
+@contextmanager
+def paused():
+    """Skip signal-driven rollup updates, e.g. around mass deletes followed by ``rebuild()``."""
+    _state.paused = True
+    try:
+        yield
+    finally:
+        _state.paused = False
+
+
+def is_paused():
+    return getattr(_state, "paused", False)
+
+
+def snapshot(ticket_id: int, lock: bool = False):
+    """Return the rollup-relevant fields of a ticket, or None if it is gone."""
+    qs = Ticket.objects.filter(id=ticket_id)
+    if lock:
+        qs = qs.select_for_update()
+    return qs.values(*ROLLUP_FIELDS).first()
+
+
+def values_of(ticket: Ticket):
+    return {f: getattr(ticket, f) for f in ROLLUP_FIELDS}
+
+
+def remember(ticket: Ticket):
+    """Mark ``ticket`` as matching its stored row, e.g. loaded with ``select_for_update``.
+
+    Saving it then moves its rollup bucket without reading the row again.
+    """
+    ticket._rollup_stored = values_of(ticket)
+    return ticket
+
+
+def _changed():
+    analytics_cache.invalidate()
+    events.analytics_updated()
+
+
+def _contribution(values):
+    if values is None or values["created_at"] is None:
+        return None
+    key = (timezone.localdate(values["created_at"]), values["status"], values["category"],
+           values["sentiment"], values["priority"])
+    resolved = values["status"] == "RESOLVED" and values["resolved_at"] is not None
+    seconds = (values["resolved_at"] - values["created_at"]).total_seconds() if resolved else 0.0
+    return key, (1, int(resolved), seconds)
+
+
+def _incident(values):
+    if values is None or values["status"] == "RESOLVED":
+        return None
+    return values["cluster_id"] or values["id"]
+
+
+def _add(deltas, contribution, sign):
+    if contribution is None:
+        return
+    key, (count, resolved, seconds) = contribution
+    d = deltas[key]
+    d[0] += sign * count
+    d[1] += sign * resolved
+    d[2] += sign * seconds
+
+
+def _apply(deltas, model=TicketRollup):
+    # Buckets are locked in key order, so two transactions moving tickets
+    # between the same buckets cannot deadlock.
+    for key, (count, resolved, seconds) in sorted(deltas.items()):
+        if not (count or resolved or seconds):
+            continue
+        row, _ = model.objects.get_or_create(**dict(zip(BUCKET_FIELDS, key)))
+        model.objects.filter(pk=row.pk).update(
+            count=F("count") + count,
+            resolved_count=F("resolved_count") + resolved,
+            resolution_seconds=F("resolution_seconds") + seconds,
+        )
+
+
+def _apply_incidents(deltas):
+    # Rows are deleted once an incident has no open tickets, so a key may
+    # have to be (re)created; in key order, like _apply.
+    for key, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        if not OpenIncident.objects.filter(key=key).update(open_count=F("open_count") + delta):
+            try:
+                with transaction.atomic():
+                    OpenIncident.objects.create(key=key, open_count=delta)
+            except IntegrityError:
+                OpenIncident.objects.filter(key=key).update(open_count=F("open_count") + delta)
+        if delta < 0:
+            OpenIncident.objects.filter(key=key, open_count__lte=0).delete()
+
+
+def record_change(old, new):
+    """Move a ticket's contribution from its ``old`` to its ``new`` bucket.
+
+    Either side may be None for a created or deleted ticket. Also invalidates
+    cached analytics responses.
+    """
+    record_changes([(old, new)])
+
+
+def record_changes(pairs):
+    """``record_change`` for many ``(old, new)`` pairs at once (e.g. after ``bulk_update``)."""
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    incidents = defaultdict(int)
+    for old, new in pairs:
+        _add(deltas, _contribution(old), -1)
+        _add(deltas, _contribution(new), 1)
+        if _incident(old) != _incident(new):
+            if _incident(old) is not None:
+                incidents[_incident(old)] -= 1
+            if _incident(new) is not None:
+                incidents[_incident(new)] += 1
+    with transaction.atomic():
+        _apply(deltas)
+        _apply_incidents(incidents)
+        transaction.on_commit(_changed)
+
+
+def record_created(values_list):
+    """Add many new tickets at once (e.g. after ``bulk_create``)."""
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    incidents = defaultdict(int)
+    for values in values_list:
+        _add(deltas, _contribution(values), 1)
+        if _incident(values) is not None:
+            incidents[_incident(values)] += 1
+    with transaction.atomic():
+        _apply(deltas)
+        _apply_incidents(incidents)
+        transaction.on_commit(_changed)
+
+
+def record_archived(values_list, sign=1):
+    """Move archived tickets' contributions into ``ArchivedRollup`` (or back out with ``sign=-1``).
+
+    ``TicketRollup`` keeps counting archived tickets; this records which part
+    of it the ticket table no longer holds.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0.0])
+    for values in values_list:
+        _add(deltas, _contribution(values), sign)
+    with transaction.atomic():
+        _apply(deltas, ArchivedRollup)
+
+
+def compute_from_tickets():
+    """Aggregate the ticket table into rollup rows with a single GROUP BY, plus the archived part."""
+    duration = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
+    resolved = Q(status="RESOLVED", resolved_at__isnull=False)
+    rows = (
+        Ticket.objects
+        .annotate(day=TruncDate("created_at"))
+        .values(*BUCKET_FIELDS)
+        .annotate(
+            count=Count("id"),
+            resolved_count=Count("id", filter=resolved),
+            resolution=Sum(duration, filter=resolved),
+        )
+        .order_by()
+    )
+    out = {
+        tuple(r[f] for f in BUCKET_FIELDS): (
+            r["count"], r["resolved_count"], r["resolution"].total_seconds() if r["resolution"] else 0.0,
+        )
+        for r in rows
+    }
+    for r in ArchivedRollup.objects.values(*BUCKET_FIELDS, "count", "resolved_count", "resolution_seconds"):
+        key = tuple(r[f] for f in BUCKET_FIELDS)
+        count, resolved_count, seconds = out.get(key, (0, 0, 0.0))
+        out[key] = (count + r["count"], resolved_count + r["resolved_count"], seconds + r["resolution_seconds"])
+    return out
+
+
+def open_incidents_from_tickets():
+    """``{incident key: open tickets}`` aggregated from the ticket table."""
+    rows = (
+        Ticket.objects.exclude(status="RESOLVED")
+        .values(key=Coalesce("cluster_id", "id", output_field=BigIntegerField()))
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    return {r["key"]: r["n"] for r in rows}
+
+
+def rebuild():
+    """Replace all rollup rows with fresh aggregates of the ticket table and ``ArchivedRollup``."""
+    expected = compute_from_tickets()
+    incidents = open_incidents_from_tickets()
+    with transaction.atomic():
+        OpenIncident.objects.all().delete()
+        OpenIncident.objects.bulk_create(
+            [OpenIncident(key=key, open_count=n) for key, n in incidents.items()], batch_size=1000,
+        )
+        TicketRollup.objects.all().delete()
+        TicketRollup.objects.bulk_create([
+            TicketRollup(
+                **dict(zip(BUCKET_FIELDS, key)),
+                count=count, resolved_count=resolved_count, resolution_seconds=seconds,
+            )
+            for key, (count, resolved_count, seconds) in expected.items()
+        ], batch_size=1000)
+        transaction.on_commit(_changed)
+    return len(expected)
+
+
+def drift():
+    """Return ``{bucket: (stored, expected)}`` for every bucket (or ``("incident", key)``) that disagrees."""
+    expected = compute_from_tickets()
+    stored = {
+        tuple(r[f] for f in BUCKET_FIELDS): (r["count"], r["resolved_count"], r["resolution_seconds"])
+        for r in TicketRollup.objects.values(*BUCKET_FIELDS, "count", "resolved_count", "resolution_seconds")
+        if r["count"] or r["resolved_count"]
+    }
+    out = {}
+    for key in stored.keys() | expected.keys():
+        a = stored.get(key, (0, 0, 0.0))
+        b = expected.get(key, (0, 0, 0.0))
+        if a[0] != b[0] or a[1] != b[1] or abs(a[2] - b[2]) > 1e-3:
+            out[key] = (a, b)
+    expected = open_incidents_from_tickets()
+    stored = dict(OpenIncident.objects.values_list("key", "open_count"))
+    for key in stored.keys() | expected.keys():
+        if stored.get(key, 0) != expected.get(key, 0):
+            out[("incident", key)] = (stored.get(key, 0), expected.get(key, 0))
+    return out
+
+
+def _summary_rows():
+    return (
+        TicketRollup.objects
+        .values("status", "category", "sentiment")
+        .annotate(count=Sum("count"), resolved=Sum("resolved_count"), seconds=Sum("resolution_seconds"))
+        .order_by()
+    )
+
+def _summary(rows, open_incidents):
+    total = 0
+    resolved = 0
+    seconds = 0.0
+    by_status = defaultdict(int)
+    by_category = defaultdict(int)
+    by_sentiment = defaultdict(int)
+    for r in rows:
+        total += r["count"]
+        resolved += r["resolved"]
+        seconds += r["seconds"]
+        by_status[r["status"]] += r["count"]
+        by_category[r["category"]] += r["count"]
+        by_sentiment[r["sentiment"]] += r["count"]
+
+    def listing(name, counts, key):
+        return [{name: k, "count": c} for k, c in sorted(counts.items(), key=key) if c]
+
+    return {
+        "total": total,
+        "open_tickets": sum(c for status, c in by_status.items() if status != "RESOLVED"),
+        "open_incidents": open_incidents,
+        "by_status": listing("status", by_status, lambda kv: kv[0]),
+        "by_category": listing("category", by_category, lambda kv: -kv[1]),
+        "by_sentiment": listing("sentiment", by_sentiment, lambda kv: -kv[1]),
+        "avg_resolution_seconds": seconds / resolved if resolved else None,
+    }
+
+def summary():
+    """Dashboard aggregates read from the rollup table, plus the open incident count."""
+    return _summary(_summary_rows(), OpenIncident.objects.count())
+
+async def asummary():
+    """``summary`` with the async ORM."""
+    return _summary([r async for r in _summary_rows()], await OpenIncident.objects.acount())
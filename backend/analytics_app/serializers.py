@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from tickets.models import Ticket
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    interval = serializers.ChoiceField(choices=["hour", "day", "week"], default="day")
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+    category = serializers.ChoiceField(choices=[c for c, _ in Ticket.CATEGORY_CHOICES], required=False)
+    assigned_to = serializers.IntegerField(required=False)
+
+    # Keep a single request from bucketing years of data by the hour.
+    MAX_BUCKETS = 2000
+    BUCKET_SIZE = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}
+
+    def validate(self, attrs):
+        end = attrs.get("end") or timezone.now()
+        start = attrs.get("start") or end - timedelta(days=30)
+        if start >= end:
+            raise serializers.ValidationError("start must be before end.")
+        if (end - start) / self.BUCKET_SIZE[attrs["interval"]] > self.MAX_BUCKETS:
+            raise serializers.ValidationError(f"Range too large for interval '{attrs['interval']}'.")
+        attrs["start"] = start
+        attrs["end"] = end
+        return attrs
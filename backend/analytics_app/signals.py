@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from tickets.models import ArchivedTicket, Ticket
+from . import cache as analytics_cache
+from . import rollups
+
+@receiver(pre_save, sender=Ticket)
+def remember_rollup_bucket(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._rollup_old = None
+    if raw or instance.pk is None or rollups.is_paused():
+        return
+    if update_fields is not None and not set(update_fields) & set(rollups.ROLLUP_FIELDS):
+        instance._rollup_skip = True
+        return
+    stored = instance.__dict__.get("_rollup_stored")
+    instance._rollup_old = stored if stored is not None else rollups.snapshot(instance.pk)
+
+@receiver(post_save, sender=Ticket)
+def update_rollup(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or rollups.is_paused():
+        return
+    if instance.__dict__.pop("_rollup_skip", False):
+        # Still matters for analytics filtered by e.g. assignee.
+        analytics_cache.invalidate()
+        return
+    new = rollups.values_of(instance)
+    rollups.record_change(instance.__dict__.pop("_rollup_old", None), new)
+    if update_fields is None and "_rollup_stored" in instance.__dict__:
+        instance._rollup_stored = new
+    else:
+        instance.__dict__.pop("_rollup_stored", None)
+
+@receiver(pre_delete, sender=Ticket)
+def remember_deleted_bucket(sender, instance, **kwargs):
+    # The in-memory instance may predate an AI update, so read the stored row.
+    if not rollups.is_paused():
+        instance._rollup_old = rollups.snapshot(instance.pk)
+
+@receiver(post_delete, sender=Ticket)
+def remove_from_rollup(sender, instance, **kwargs):
+    if rollups.is_paused():
+        return
+    rollups.record_change(instance.__dict__.pop("_rollup_old", None), None)
+
+@receiver(post_delete, sender=ArchivedTicket)
+def remove_archived_from_rollup(sender, instance, **kwargs):
+    # Archived rows never change, so the instance holds the counted values
+    # (deleted along with their user, for example).
+    if rollups.is_paused():
+        return
+    values = rollups.values_of(instance)
+    rollups.record_archived([values], sign=-1)
+    rollups.record_change(values, None)
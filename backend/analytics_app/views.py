@@ -1,31 +1,158 @@
-from django.db.models import Count, Avg, F, ExpressionWrapper, DurationField
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, DurationField, ExpressionWrapper, F
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
-from tickets.models import Ticket
+from tickets.etags import ConditionalGetMixin, conditional_get
+from tickets.models import ArchivedTicket, Ticket
+from ai_engine.cache import get_cache
+from . import rollups
+from .cache import cached_response
+from .serializers import TimeseriesQuerySerializer
+
+class AnalyticsSummaryView(ConditionalGetMixin, APIView):
+    permission_classes = [IsAdminUser]
+
+    def etag_key(self, request):
+        return "all"
+
+    @conditional_get
+    def get(self, request):
+        return Response(rollups.summary())
+
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+
+def _percentiles(values):
+    # Linear interpolation, like Postgres' percentile_cont.
+    values = sorted(values)
+    if not values:
+        return {name: None for name, _ in PERCENTILES}
+
+    def pct(q):
+        pos = (len(values) - 1) * q
+        lo = int(pos)
+        hi = min(lo + 1, len(values) - 1)
+        return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+    return {name: pct(q) for name, q in PERCENTILES}
+
+def _resolution_stats(resolved, tz):
+    """Resolved count and resolution-time percentiles per bucket, and over all buckets.
+
+    ``resolved`` are querysets of ``(bucket, d)`` rows. Postgres computes the
+    percentiles over a UNION ALL of them with ``percentile_cont``; other
+    databases (SQLite in development) sort the durations in Python.
+    Returns ``({bucket: (resolved, percentiles)}, percentiles)``.
+    """
+    if connection.vendor != "postgresql":
+        durations = defaultdict(list)
+        for qs in resolved:
+            for bucket, d in qs.iterator(chunk_size=2000):
+                durations[bucket].append(d.total_seconds())
+        overall = _percentiles([seconds for values in durations.values() for seconds in values])
+        return {bucket: (len(values), _percentiles(values)) for bucket, values in durations.items()}, overall
+
+    parts, params = [], []
+    for qs in resolved:
+        sql, qs_params = qs.query.sql_with_params()
+        parts.append(f"({sql})")
+        params.extend(qs_params)
+    fractions = ", ".join(str(q) for _, q in PERCENTILES)
+    with connection.cursor() as cursor:
+        # ROLLUP adds the all-buckets row, with a NULL bucket.
+        cursor.execute(
+            f"SELECT bucket, COUNT(*), percentile_cont(ARRAY[{fractions}]) "
+            f"WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM d)::float8) "
+            f"FROM ({' UNION ALL '.join(parts)}) AS resolved GROUP BY ROLLUP (bucket)",
+            params,
+        )
+        rows = cursor.fetchall()
+
+    stats = {}
+    overall = _percentiles([])
+    for bucket, n, values in rows:
+        percentiles = dict(zip((name for name, _ in PERCENTILES), values)) if values else _percentiles([])
+        if bucket is None:
+            overall = percentiles
+            continue
+        if settings.USE_TZ:
+            # Trunc() makes its buckets aware the same way.
+            bucket = timezone.make_aware(bucket.replace(tzinfo=None), tz)
+        stats[bucket] = (n, percentiles)
+    return stats, overall
+
+def _timeseries(params):
+    tz = timezone.get_current_timezone()
+    kind = params["interval"]
+    start, end = params["start"], params["end"]
+    duration = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
+
+    buckets = defaultdict(lambda: {"created": 0, "incidents": 0})
+    resolved = []
+    # Archived tickets count too. An incident with both hot and archived
+    # tickets in one bucket is counted once per table.
+    for qs in (Ticket.objects.all(), ArchivedTicket.objects.all()):
+        if "category" in params:
+            qs = qs.filter(category=params["category"])
+        if "assigned_to" in params:
+            qs = qs.filter(assigned_to_id=params["assigned_to"])
+
+        created = (
+            qs.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(bucket=Trunc("created_at", kind, tzinfo=tz))
+            .values("bucket")
+            .annotate(n=Count("id"), incidents=Count(Coalesce("cluster_id", "id"), distinct=True))
+            .order_by()
+        )
+        resolved.append(
+            qs.filter(status="RESOLVED", resolved_at__gte=start, resolved_at__lt=end)
+            .annotate(bucket=Trunc("resolved_at", kind, tzinfo=tz), d=duration)
+            .values_list("bucket", "d")
+            .order_by()
+        )
+
+        for row in created:
+            buckets[row["bucket"]]["created"] += row["n"]
+            buckets[row["bucket"]]["incidents"] += row["incidents"]
+
+    stats, overall = _resolution_stats(resolved, tz)
+    empty = (0, _percentiles([]))
+
+    return {
+        "interval": kind,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": [
+            {
+                "bucket": bucket.isoformat(),
+                "created": buckets[bucket]["created"],
+                "incidents": buckets[bucket]["incidents"],
+                "resolved": stats.get(bucket, empty)[0],
+                "resolution_seconds": stats.get(bucket, empty)[1],
+            }
+            for bucket in sorted(buckets.keys() | stats.keys())
+        ],
+        "resolution_seconds": overall,
+    }
+
+class AnalyticsTimeseriesView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        ser = TimeseriesQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        params = ser.validated_data
+        # Key on the raw query: defaulted start/end move with the clock.
+        key = request.query_params.dict()
+        return Response(cached_response("timeseries", key, lambda: _timeseries(params)))
 
-class AnalyticsSummaryView(APIView):
+class AICacheStatsView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        total = Ticket.objects.count()
-
-        by_status = list(Ticket.objects.values("status").annotate(count=Count("id")).order_by("status"))
-        by_category = list(Ticket.objects.values("category").annotate(count=Count("id")).order_by("-count"))
-        by_sentiment = list(Ticket.objects.values("sentiment").annotate(count=Count("id")).order_by("-count"))
-
-        resolved = Ticket.objects.filter(status="RESOLVED", resolved_at__isnull=False)
-        avg_resolution_seconds = None
-        if resolved.exists():
-            duration = ExpressionWrapper(F("resolved_at") - F("created_at"), output_field=DurationField())
-            avg_duration = resolved.annotate(d=duration).aggregate(avg=Avg("d"))["avg"]
-            if avg_duration:
-                avg_resolution_seconds = avg_duration.total_seconds()
-
-        return Response({
-            "total": total,
-            "by_status": by_status,
-            "by_category": by_category,
-            "by_sentiment": by_sentiment,
-            "avg_resolution_seconds": avg_resolution_seconds,
-        })
+        return Response(get_cache().stats())
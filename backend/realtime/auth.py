@@ -0,0 +1,26 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+@database_sync_to_async
+def _user_for(raw_token):
+    if not raw_token:
+        return AnonymousUser()
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+class JWTAuthMiddleware(BaseMiddleware):
+    # Browsers cannot set headers on a WebSocket handshake, so the access
+    # token is passed as ?token=<jwt>.
+    async def __call__(self, scope, receive, send):
+        params = parse_qs(scope.get("query_string", b"").decode())
+        scope["user"] = await _user_for(params.get("token", [None])[0])
+        return await super().__call__(scope, receive, send)
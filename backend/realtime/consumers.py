@@ -0,0 +1,38 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+STAFF_GROUP = "staff"
+
+def user_group(user_id: int):
+    return f"user.{user_id}"
+
+class UpdatesConsumer(AsyncJsonWebsocketConsumer):
+    """Push channel for the frontend.
+
+    Every user gets ``ticket`` and ``reply`` (suggested reply while it is
+    generated) events for their own tickets; staff also get them for all
+    tickets and ``analytics`` events with the dashboard summary.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.groups = [user_group(user.id)]
+        if user.is_staff:
+            self.groups.append(STAFF_GROUP)
+        for group in self.groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        await self.accept()
+
+    async def ticket_updated(self, event):
+        await self.send_json({"type": "ticket", "ticket": event["ticket"]})
+
+    async def ticket_reply(self, event):
+        await self.send_json({
+            "type": "reply", "ticket_id": event["ticket_id"],
+            "suggested_reply": event["suggested_reply"], "done": event["done"],
+        })
+
+    async def analytics_updated(self, event):
+        await self.send_json({"type": "analytics", "summary": event["summary"]})
@@ -0,0 +1,80 @@
+import logging
+import threading
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections
+
+from .consumers import STAFF_GROUP, user_group
+
+logger = logging.getLogger(__name__)
+
+_analytics_lock = threading.Lock()
+_analytics_scheduled = False
+
+def _send(groups, event):
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        for group in groups:
+            async_to_sync(layer.group_send)(group, event)
+    except Exception:
+        # A push is best effort; clients still see the change on their next fetch.
+        logger.warning("Could not publish %s", event["type"], exc_info=True)
+
+def ticket_updated(ticket_id: int):
+    """Push the ticket to its owner and to staff; call after the change is committed."""
+    from tickets.models import Ticket
+    from tickets.serializers import TicketSerializer
+
+    ticket = Ticket.objects.select_related("created_by", "assigned_to").filter(id=ticket_id).first()
+    if ticket is None:
+        return
+    data = TicketSerializer(ticket).data
+    _send([user_group(ticket.created_by_id), STAFF_GROUP], {"type": "ticket.updated", "ticket": data})
+
+def ticket_reply(ticket_id: int, owner_id: int, text: str, done: bool):
+    """Push the suggested reply generated so far while it streams."""
+    event = {"type": "ticket.reply", "ticket_id": ticket_id, "suggested_reply": text, "done": done}
+    _send([user_group(owner_id), STAFF_GROUP], event)
+
+def _publish_analytics():
+    from analytics_app import rollups
+
+    try:
+        summary = rollups.summary()
+    except Exception:
+        logger.exception("Could not compute the analytics summary")
+        return
+    _send([STAFF_GROUP], {"type": "analytics.updated", "summary": summary})
+
+def _flush_analytics():
+    global _analytics_scheduled
+    with _analytics_lock:
+        _analytics_scheduled = False
+    close_old_connections()
+    try:
+        _publish_analytics()
+    finally:
+        close_old_connections()
+
+def analytics_updated():
+    """Push the dashboard summary to staff.
+
+    Bursts of ticket changes (bulk imports, batch triage) are coalesced into
+    one push per ``REALTIME_ANALYTICS_INTERVAL`` seconds per process.
+    """
+    global _analytics_scheduled
+    interval = settings.REALTIME_ANALYTICS_INTERVAL
+    if interval <= 0:
+        _publish_analytics()
+        return
+    with _analytics_lock:
+        if _analytics_scheduled:
+            return
+        _analytics_scheduled = True
+    timer = threading.Timer(interval, _flush_analytics)
+    timer.daemon = True
+    timer.start()
@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from supportdesk.asgi import application
+from . import events
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    REALTIME_ANALYTICS_INTERVAL=0,
+)
+class UpdatesConsumerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="owner")
+        cls.staff = User.objects.create(username="staff", is_staff=True)
+
+    async def _connect(self, user=None, token=None):
+        if user is not None:
+            token = await sync_to_async(lambda: str(RefreshToken.for_user(user).access_token))()
+        path = "/ws/updates/" + (f"?token={token}" if token else "")
+        communicator = WebsocketCommunicator(application, path, headers=[(b"origin", b"http://localhost")])
+        connected, code = await communicator.connect()
+        return communicator, connected, code
+
+    async def test_rejects_missing_and_invalid_tokens(self):
+        for token in (None, "not-a-jwt"):
+            with self.subTest(token=token):
+                communicator, connected, code = await self._connect(token=token)
+                self.assertFalse(connected)
+                self.assertEqual(code, 4401)
+
+    async def test_owner_gets_their_reply_events(self):
+        communicator, connected, _ = await self._connect(self.user)
+        self.assertTrue(connected)
+        await sync_to_async(events.ticket_reply)(7, self.user.id, "Hello", False)
+        self.assertEqual(
+            await communicator.receive_json_from(),
+            {"type": "reply", "ticket_id": 7, "suggested_reply": "Hello", "done": False},
+        )
+        # Another user's ticket is not pushed to them.
+        await sync_to_async(events.ticket_reply)(8, self.staff.id, "Other", True)
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_only_staff_get_analytics(self):
+        staff, connected, _ = await self._connect(self.staff)
+        self.assertTrue(connected)
+        owner, connected, _ = await self._connect(self.user)
+        self.assertTrue(connected)
+
+        await sync_to_async(events.analytics_updated)()
+        event = await staff.receive_json_from()
+        self.assertEqual(event["type"], "analytics")
+        self.assertIn("total", event["summary"])
+        self.assertTrue(await owner.receive_nothing())
+        await staff.disconnect()
+        await owner.disconnect()
@@ -0,0 +1,162 @@
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from tickets.models import Comment, Ticket
+
+# Field order matches the FTS5 columns and the Postgres weights A-D.
+FIELDS = ("title", "ai_summary", "description", "comments")
+INDEXED_TICKET_FIELDS = ("title", "ai_summary", "description")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def documents(ticket_ids):
+    """Return ``{ticket_id: (owner_id, (title, ai_summary, description, comments))}``."""
+    docs = {
+        tid: (owner, [title, summary, description, []])
+        for tid, owner, title, summary, description in Ticket.objects
+        .filter(id__in=ticket_ids)
+        .values_list("id", "created_by_id", *INDEXED_TICKET_FIELDS)
+    }
+    comments = (
+        Comment.objects.filter(ticket_id__in=list(docs))
+        .order_by("ticket_id", "created_at")
+        .values_list("ticket_id", "message")
+    )
+    for tid, message in comments:
+        docs[tid][1][3].append(message)
+    return {tid: (owner, (t, s, d, "\n".join(c))) for tid, (owner, (t, s, d, c)) in docs.items()}
+
+
+class PostgresBackend:
+    def upsert(self, cursor, docs):
+        lang = settings.SEARCH_LANGUAGE
+        weighted = " || ".join(f"setweight(to_tsvector(%s::regconfig, %s), '{w}')" for w in "ABCD")
+        cursor.executemany(
+            f"INSERT INTO search_ticket_index (ticket_id, document) VALUES (%s, {weighted}) "
+            "ON CONFLICT (ticket_id) DO UPDATE SET document = EXCLUDED.document",
+            [[tid, *[v for text in fields for v in (lang, text)]] for tid, (_, fields) in docs.items()],
+        )
+
+    def delete(self, cursor, ticket_ids):
+        cursor.execute("DELETE FROM search_ticket_index WHERE ticket_id = ANY(%s)", [list(ticket_ids)])
+
+    def clear(self, cursor):
+        cursor.execute("TRUNCATE search_ticket_index")
+
+    def search(self, cursor, query, owner_id, limit):
+        owner_sql = " AND t.created_by_id = %s" if owner_id is not None else ""
+        cursor.execute(
+            "SELECT s.ticket_id, ts_rank(s.document, q) AS rank "
+            "FROM search_ticket_index s JOIN tickets_ticket t ON t.id = s.ticket_id, "
+            "websearch_to_tsquery(%s::regconfig, %s) q "
+            f"WHERE s.document @@ q{owner_sql} "
+            "ORDER BY rank DESC, s.ticket_id DESC LIMIT %s",
+            [settings.SEARCH_LANGUAGE, query, *([owner_id] if owner_id is not None else []), limit],
+        )
+        return cursor.fetchall()
+
+
+class SQLiteBackend:
+    def upsert(self, cursor, docs):
+        self.delete(cursor, docs.keys())
+        cursor.executemany(
+            "INSERT INTO search_ticket_fts (rowid, title, ai_summary, description, comments) VALUES (%s, %s, %s, %s, %s)",
+            [[tid, *fields] for tid, (_, fields) in docs.items()],
+        )
+
+    def delete(self, cursor, ticket_ids):
+        cursor.executemany("DELETE FROM search_ticket_fts WHERE rowid = %s", [[tid] for tid in ticket_ids])
+
+    def clear(self, cursor):
+        cursor.execute("DELETE FROM search_ticket_fts")
+
+    def search(self, cursor, query, owner_id, limit):
+        # Quote every word so user input is never parsed as FTS5 syntax;
+        # the words are ANDed, like websearch_to_tsquery without operators.
+        match = " ".join('"%s"' % w for w in _WORD.findall(query))
+        if not match:
+            return []
+        owner_sql = " AND t.created_by_id = %s" if owner_id is not None else ""
+        cursor.execute(
+            "SELECT search_ticket_fts.rowid, -bm25(search_ticket_fts, 4.0, 2.0, 1.0, 0.5) AS rank "
+            "FROM search_ticket_fts JOIN tickets_ticket t ON t.id = search_ticket_fts.rowid "
+            f"WHERE search_ticket_fts MATCH %s{owner_sql} "
+            "ORDER BY rank DESC, search_ticket_fts.rowid DESC LIMIT %s",
+            [match, *([owner_id] if owner_id is not None else []), limit],
+        )
+        return cursor.fetchall()
+
+
+class LikeBackend:
+    """No index: scan with LIKE, for databases without a full-text backend here."""
+
+    def upsert(self, cursor, docs):
+        pass
+
+    def delete(self, cursor, ticket_ids):
+        pass
+
+    def clear(self, cursor):
+        pass
+
+    def search(self, cursor, query, owner_id, limit):
+        qs = Ticket.objects.all()
+        for word in _WORD.findall(query):
+            qs = qs.filter(
+                Q(title__icontains=word) | Q(ai_summary__icontains=word)
+                | Q(description__icontains=word) | Q(comments__message__icontains=word)
+            )
+        if owner_id is not None:
+            qs = qs.filter(created_by_id=owner_id)
+        return [(tid, 1.0) for tid in qs.distinct().order_by("-id").values_list("id", flat=True)[:limit]]
+
+
+def get_backend():
+    if connection.vendor == "postgresql":
+        return PostgresBackend()
+    if connection.vendor == "sqlite":
+        return SQLiteBackend()
+    return LikeBackend()
+
+
+def update_tickets(ticket_ids, chunk=500):
+    """(Re)index the given tickets, dropping any that no longer exist."""
+    from . import similar
+
+    ticket_ids = list(ticket_ids)
+    backend = get_backend()
+    for i in range(0, len(ticket_ids), chunk):
+        part = ticket_ids[i:i + chunk]
+        docs = documents(part)
+        with transaction.atomic(), connection.cursor() as cursor:
+            gone = set(part) - docs.keys()
+            if gone:
+                backend.delete(cursor, gone)
+            if docs:
+                backend.upsert(cursor, docs)
+        similar.update(docs, gone)
+
+
+def search(query: str, owner_id=None, limit: int = 20):
+    """Return ``[(ticket_id, score)]``, best first; ``owner_id`` limits to one user's tickets."""
+    with connection.cursor() as cursor:
+        return get_backend().search(cursor, query, owner_id, limit)
+
+
+def rebuild(chunk=1000):
+    """Re-index every ticket; returns the number indexed."""
+    with connection.cursor() as cursor:
+        get_backend().clear(cursor)
+    n = 0
+    last = 0
+    while True:
+        ids = list(Ticket.objects.filter(id__gt=last).order_by("id").values_list("id", flat=True)[:chunk])
+        if not ids:
+            return n
+        update_tickets(ids, chunk=chunk)
+        n += len(ids)
+        last = ids[-1]
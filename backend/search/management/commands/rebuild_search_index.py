@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from search import index
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild the ticket full-text search index."
+
+    def handle(self, *args, **opts):
+        n = index.rebuild()
+        self.stdout.write(f"Indexed {n} ticket(s).")
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# The index lives outside the ORM because its storage is database specific:
+# a tsvector column with a GIN index on Postgres, an FTS5 table on SQLite.
+# Other databases get no table and search falls back to LIKE scans.
+# Existing tickets are indexed by `manage.py rebuild_search_index`.
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE search_ticket_index ("
+            " ticket_id bigint PRIMARY KEY REFERENCES tickets_ticket (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,"
+            " document tsvector NOT NULL)"
+        )
+        schema_editor.execute("CREATE INDEX search_ticket_index_gin ON search_ticket_index USING gin (document)")
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE search_ticket_fts USING fts5("
+            "title, ai_summary, description, comments, tokenize = 'porter unicode61')"
+        )
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS search_ticket_index")
+    elif vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS search_ticket_fts")
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("tickets", "0003_ticket_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,11 @@
+from django.conf import settings
+from rest_framework import serializers
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=500)
+    # "text": full-text index; "similar": TF-IDF cosine against the query text.
+    mode = serializers.ChoiceField(choices=["text", "similar"], default="text")
+    limit = serializers.IntegerField(min_value=1, max_value=settings.SEARCH_MAX_RESULTS, default=20)
+
+class SimilarQuerySerializer(serializers.Serializer):
+    k = serializers.IntegerField(min_value=1, max_value=settings.SEARCH_MAX_RESULTS, default=5)
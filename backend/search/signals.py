@@ -0,0 +1,44 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tickets.models import Comment, Ticket
+from . import index
+
+# Tickets to re-index once the current transaction commits. Every change
+# registers a callback, but the first one re-indexes the whole batch, so a
+# queryset delete of thousands of tickets costs a few statements, not one each.
+_pending = threading.local()
+
+def _flush():
+    ids = getattr(_pending, "ids", None)
+    if ids:
+        _pending.ids = set()
+        index.update_tickets(sorted(ids))
+
+def _schedule(ticket_id):
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    _pending.ids.add(ticket_id)
+    transaction.on_commit(_flush)
+
+@receiver(post_save, sender=Ticket)
+def index_ticket(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(index.INDEXED_TICKET_FIELDS):
+        return
+    _schedule(instance.pk)
+
+@receiver(post_delete, sender=Ticket)
+def unindex_ticket(sender, instance, **kwargs):
+    _schedule(instance.pk)
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def index_comment(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _schedule(instance.ticket_id)
@@ -0,0 +1,232 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from tickets.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by can for from has have i in is it its me my no not of on or our so "
+    "that the this to was we were what when with you your".split()
+)
+
+
+def tokenize(text: str):
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+class TfidfIndex:
+    """In-memory TF-IDF vectors of every ticket, for cosine "similar tickets".
+
+    Rows hold sublinear term frequencies; IDF weights and row norms are
+    applied at query time, so adding or replacing a ticket only touches its
+    own row and the document frequencies. The rows are packed into CSR-style
+    arrays lazily, on the first query after a change.
+    """
+
+    def __init__(self):
+        self.vocab = {}
+        self.df = np.zeros(0, dtype=np.int64)
+        self.rows = {}
+        self.owners = {}
+        self.built_at = time.monotonic()
+        self._packed = None
+        self._lock = threading.Lock()
+
+    def _terms(self, text, grow):
+        counts = Counter(tokenize(text))
+        cols = []
+        tfs = []
+        for term, count in counts.items():
+            col = self.vocab.get(term)
+            if col is None:
+                if not grow:
+                    continue
+                col = self.vocab[term] = len(self.vocab)
+            cols.append(col)
+            tfs.append(1.0 + math.log(count))
+        return np.array(cols, dtype=np.int64), np.array(tfs, dtype=np.float32)
+
+    def _remove(self, ticket_id):
+        row = self.rows.pop(ticket_id, None)
+        self.owners.pop(ticket_id, None)
+        if row is not None:
+            self.df[row[0]] -= 1
+
+    def update(self, docs):
+        """Add or replace tickets; ``docs`` is ``{ticket_id: (owner_id, text)}``."""
+        with self._lock:
+            for ticket_id, (owner_id, text) in docs.items():
+                self._remove(ticket_id)
+                cols, tfs = self._terms(text, grow=True)
+                if len(self.vocab) > len(self.df):
+                    self.df = np.concatenate([self.df, np.zeros(len(self.vocab) - len(self.df), dtype=np.int64)])
+                if not len(cols):
+                    continue
+                self.df[cols] += 1
+                self.rows[ticket_id] = (cols, tfs)
+                self.owners[ticket_id] = owner_id
+            self._packed = None
+
+    def remove(self, ticket_ids):
+        with self._lock:
+            for ticket_id in ticket_ids:
+                self._remove(ticket_id)
+            self._packed = None
+
+    def _pack(self):
+        if self._packed is None:
+            ids = np.fromiter(self.rows, dtype=np.int64, count=len(self.rows))
+            rows = list(self.rows.values())
+            lengths = np.fromiter((len(c) for c, _ in rows), dtype=np.int64, count=len(rows))
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+            indices = np.concatenate([c for c, _ in rows]) if rows else np.zeros(0, dtype=np.int64)
+            data = np.concatenate([t for _, t in rows]) if rows else np.zeros(0, dtype=np.float32)
+            owners = np.fromiter((self.owners[i] for i in self.rows), dtype=np.int64, count=len(rows))
+            self._packed = (ids, starts, indices, data, owners)
+        return self._packed
+
+    def query(self, text, k=5, owner_id=None, exclude=None):
+        """Return ``[(ticket_id, cosine)]`` for the ``k`` tickets most similar to ``text``."""
+        with self._lock:
+            ids, starts, indices, data, owners = self._pack()
+            if not len(ids):
+                return []
+            cols, tfs = self._terms(text, grow=False)
+            if not len(cols):
+                return []
+            idf = (np.log((1 + len(ids)) / (1 + self.df)) + 1).astype(np.float32)
+
+            q = np.zeros(len(self.vocab), dtype=np.float32)
+            q[cols] = tfs * idf[cols]
+            q /= np.linalg.norm(q)
+
+            weights = data * idf[indices]
+            norms = np.sqrt(np.add.reduceat(weights * weights, starts))
+            scores = np.add.reduceat(weights * q[indices], starts) / norms
+
+            if owner_id is not None:
+                scores[owners != owner_id] = 0.0
+            if exclude is not None:
+                scores[ids == exclude] = 0.0
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+
+def _text(fields):
+    return "\n".join(fields)
+
+
+_index = None
+_index_lock = threading.Lock()
+# While a build runs, changes seen by update() are kept here ({ticket_id:
+# (owner_id, text), or None if removed}) and replayed onto the new index.
+_building = None
+
+
+def build(chunk=2000):
+    """Index the newest tickets: created in the last ``SEARCH_SIMILAR_DAYS`` days,
+    at most ``SEARCH_SIMILAR_MAX_TICKETS`` of them."""
+    from .index import documents
+
+    idx = TfidfIndex()
+    qs = Ticket.objects.filter(created_at__gte=timezone.now() - timedelta(days=settings.SEARCH_SIMILAR_DAYS))
+    left = settings.SEARCH_SIMILAR_MAX_TICKETS
+    last = None
+    while left > 0:
+        page = qs if last is None else qs.filter(id__lt=last)
+        ids = list(page.order_by("-id").values_list("id", flat=True)[:min(chunk, left)])
+        if not ids:
+            break
+        idx.update({tid: (owner, _text(fields)) for tid, (owner, fields) in documents(ids).items()})
+        last = ids[-1]
+        left -= len(ids)
+    return idx
+
+
+def _rebuild():
+    global _index, _building
+    idx = None
+    try:
+        idx = build()
+    except Exception:
+        logger.exception("Could not build the similar tickets index")
+    finally:
+        connection.close()
+    with _index_lock:
+        changes, _building = _building, None
+        if idx is None:
+            return
+        idx.remove([tid for tid, doc in changes.items() if doc is None])
+        idx.update({tid: doc for tid, doc in changes.items() if doc is not None})
+        _index = idx
+
+
+def get_index():
+    """This process's index, or None until its first build has finished.
+
+    Builds run on a background thread, on first use and then once the index
+    is ``SEARCH_SIMILAR_REFRESH`` seconds old (to pick up changes made by
+    other processes, e.g. AI summaries saved by Celery), so a request never
+    waits for one.
+    """
+    global _building
+    with _index_lock:
+        idx = _index
+        due = idx is None or time.monotonic() - idx.built_at > settings.SEARCH_SIMILAR_REFRESH
+        if due and _building is None:
+            _building = {}
+            threading.Thread(target=_rebuild, name="similar-index", daemon=True).start()
+    return idx
+
+
+def update(docs, removed=()):
+    """Apply index changes to this process's vectors, if they have been built."""
+    texts = {tid: (owner, _text(fields)) for tid, (owner, fields) in docs.items()}
+    with _index_lock:
+        idx = _index
+        if _building is not None:
+            _building.update(dict.fromkeys(removed))
+            _building.update(texts)
+    if idx is None:
+        return
+    if removed:
+        idx.remove(removed)
+    if texts:
+        idx.update(texts)
+
+
+def similar_to_ticket(ticket_id: int, k: int = 5, owner_id=None):
+    from .index import documents
+
+    idx = get_index()
+    if idx is None:
+        return []
+    doc = documents([ticket_id]).get(ticket_id)
+    if doc is None:
+        return []
+    return idx.query(_text(doc[1]), k=k, owner_id=owner_id, exclude=ticket_id)
+
+
+def similar_to_text(text: str, k: int = 5, owner_id=None):
+    idx = get_index()
+    if idx is None:
+        # Still building: rank by full-text search meanwhile.
+        from .index import search
+
+        return search(text, owner_id=owner_id, limit=k)
+    return idx.query(text, k=k, owner_id=owner_id)
@@ -2,4 +2,25 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "supportdesk.settings")
-application = get_asgi_application()
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import OriginValidator  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+
+from realtime.auth import JWTAuthMiddleware  # noqa: E402
+from realtime.routing import websocket_urlpatterns  # noqa: E402
+
+if settings.ASYNC_API:
+    # Takes over from WhiteNoise (see settings.ASYNC_API) for admin/API assets.
+    django_asgi_app = ASGIStaticFilesHandler(django_asgi_app)
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    # The frontend is served from its own origin (CORS_ALLOWED_ORIGINS).
+    "websocket": OriginValidator(
+        JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+        [*settings.CORS_ALLOWED_ORIGINS, *settings.ALLOWED_HOSTS],
+    ),
+})
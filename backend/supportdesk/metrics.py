@@ -0,0 +1,192 @@
+import hmac
+import os
+import threading
+import time
+from datetime import datetime
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import before_task_publish
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+# Metrics live in process memory; an observation is a dict lookup and a
+# locked add, a few microseconds. With several processes per host (daphne
+# workers, Celery prefork children) set PROMETHEUS_MULTIPROC_DIR to a shared
+# empty directory so /metrics reports all of them.
+
+STAGE_SECONDS = Histogram(
+    "ai_triage_stage_seconds",
+    "Time spent in each stage of AI triage.",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+RESULTS = Counter("ai_triage_results_total", "Triage results by where they came from.", ["source"])
+FALLBACKS = Counter("ai_triage_fallbacks_total", "Triage results produced by the keyword fallback.", ["reason"])
+TOKENS = Counter("ai_tokens_total", "Tokens reported by the model provider.", ["kind"])
+CONFIDENCE = Histogram(
+    "ai_triage_confidence",
+    "Confidence of triage results.",
+    ["source"],
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+QUEUE_WAIT = Histogram(
+    "celery_queue_wait_seconds",
+    "Time tasks waited in each Celery queue before starting.",
+    ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600),
+)
+HTTP_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle HTTP requests, by view.",
+    ["method", "view", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def stage(name: str):
+    """Context manager timing one triage stage."""
+    return STAGE_SECONDS.labels(name).time()
+
+
+def record_result(result: dict, source: str, reason: str = ""):
+    RESULTS.labels(source).inc()
+    if source == "fallback":
+        FALLBACKS.labels(reason).inc()
+    CONFIDENCE.labels(source).observe(result["confidence"])
+
+
+def record_usage(resp):
+    usage = getattr(resp, "usage", None)
+    if usage is None:
+        return
+    for kind in ("input", "output"):
+        n = getattr(usage, f"{kind}_tokens", None)
+        if n:
+            TOKENS.labels(kind).inc(n)
+
+
+@before_task_publish.connect
+def _stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+def record_queue_wait(request):
+    """Observe how long a Celery task waited between publish (or its ETA) and start."""
+    # Workers expose custom headers as request attributes; eager runs keep
+    # them in request.headers.
+    since = getattr(request, "enqueued_at", None) or (getattr(request, "headers", None) or {}).get("enqueued_at")
+    if not since:
+        return
+    eta = request.eta
+    if eta:
+        if isinstance(eta, str):
+            eta = datetime.fromisoformat(eta)
+        since = max(since, eta.timestamp())
+    wait = max(time.time() - since, 0.0)
+    STAGE_SECONDS.labels("queue").observe(wait)
+    QUEUE_WAIT.labels((request.delivery_info or {}).get("routing_key") or "celery").observe(wait)
+
+
+class QueueDepthCollector:
+    """Read AI queue lengths from the broker at scrape time."""
+
+    def describe(self):
+        # Lets the registry skip calling collect(), and so Redis, on register.
+        return []
+
+    def collect(self):
+        from ai_engine import queues
+
+        try:
+            depths, dead = queues.depths()
+        except Exception:
+            return
+        depth = GaugeMetricFamily("celery_queue_depth", "Messages waiting in each AI queue.", labels=["queue"])
+        for name, count in depths.items():
+            depth.add_metric([name], count)
+        yield depth
+        yield GaugeMetricFamily("ai_dead_letters", "Entries in the AI dead-letter list.", value=dead)
+
+
+# Registered by the first scrape, so only the process serving /metrics talks
+# to Redis when a registry is collected.
+_queue_collector = None
+_queue_collector_lock = threading.Lock()
+
+
+def _register_queue_collector():
+    global _queue_collector
+    with _queue_collector_lock:
+        if _queue_collector is None:
+            _queue_collector = QueueDepthCollector()
+            REGISTRY.register(_queue_collector)
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    async def _acall(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, start)
+        return response
+
+    def _observe(self, request, response, start):
+        match = request.resolver_match
+        HTTP_SECONDS.labels(
+            request.method,
+            match.view_name if match is not None else "<unmatched>",
+            response.status_code,
+        ).observe(time.perf_counter() - start)
+
+
+def _is_staff(request):
+    """Whether the request carries a staff user's API credentials."""
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = auth_class().authenticate(request)
+        except APIException:
+            return False
+        if result is not None:
+            return result[0].is_active and result[0].is_staff
+    return False
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth, f"Bearer {token}"):
+            return HttpResponseForbidden()
+    elif not _is_staff(request):
+        return HttpResponseForbidden()
+
+    registry = REGISTRY
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        _register_queue_collector()
+    else:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(QueueDepthCollector())
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -14,8 +15,16 @@ SECRET_KEY = env("SECRET_KEY", "change-me")
 DEBUG = env("DEBUG", "0") == "1"
 ALLOWED_HOSTS = [h.strip() for h in env("ALLOWED_HOSTS", "127.0.0.1,localhost").split(",") if h.strip()]
 AI_ASYNC = os.getenv("AI_ASYNC", "1") == "1"
+# With AI_ASYNC=0, run triage on an in-process thread pool instead of inline.
+AI_BACKGROUND = env("AI_BACKGROUND", "1") == "1"
+AI_BACKGROUND_THREADS = int(env("AI_BACKGROUND_THREADS", "2"))
+AI_BACKGROUND_STALE_AFTER = int(env("AI_BACKGROUND_STALE_AFTER", "300"))
+AI_BACKGROUND_QUEUE_SIZE = int(env("AI_BACKGROUND_QUEUE_SIZE", "1000"))
+AI_MAX_ATTEMPTS = int(env("AI_MAX_ATTEMPTS", "3"))
+AI_RETRY_DELAY = float(env("AI_RETRY_DELAY", "5"))
 
 INSTALLED_APPS = [
+    "daphne",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -27,13 +36,17 @@ INSTALLED_APPS = [
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
+    "channels",
 
     "tickets",
     "ai_engine",
     "analytics_app",
+    "realtime",
+    "search",
 ]
 
 MIDDLEWARE = [
+    "supportdesk.metrics.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -45,6 +58,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# ASYNC_API=1 (under ASGI, e.g. uvicorn) serves ticket list/detail/create and
+# the analytics summary from async views. WhiteNoise is sync-only and would put
+# every request back on a thread, so static files are served by asgi.py then.
+ASYNC_API = env("ASYNC_API", "0") == "1"
+if ASYNC_API:
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 ROOT_URLCONF = "supportdesk.urls"
 
 TEMPLATES = [
@@ -67,11 +87,32 @@ WSGI_APPLICATION = "supportdesk.wsgi.application"
 DATABASES = {
     "default": dj_database_url.parse(
         os.getenv("DATABASE_URL", "sqlite:///db.sqlite3"),
-        conn_max_age=600,
+        # Under async views connections are per worker thread; do not keep them.
+        conn_max_age=0 if ASYNC_API else 600,
         ssl_require=True,
     )
 }
 
+# Shared cache for API responses. Without CACHE_URL each process keeps its own
+# in-memory cache, so invalidation only reaches the process that saw the change.
+CACHE_URL = env("CACHE_URL", "")
+if CACHE_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+ANALYTICS_CACHE_TTL = int(env("ANALYTICS_CACHE_TTL", "60"))
+
+# Ticket search. SEARCH_LANGUAGE is the Postgres text search configuration;
+# the TF-IDF vectors behind "similar tickets" cover the newest tickets (at most
+# SEARCH_SIMILAR_MAX_TICKETS from the last SEARCH_SIMILAR_DAYS days) and are
+# rebuilt in the background of each process every SEARCH_SIMILAR_REFRESH seconds.
+SEARCH_LANGUAGE = env("SEARCH_LANGUAGE", "english")
+SEARCH_MAX_RESULTS = int(env("SEARCH_MAX_RESULTS", "50"))
+SEARCH_SIMILAR_REFRESH = float(env("SEARCH_SIMILAR_REFRESH", "300"))
+SEARCH_SIMILAR_DAYS = float(env("SEARCH_SIMILAR_DAYS", "180"))
+SEARCH_SIMILAR_MAX_TICKETS = int(env("SEARCH_SIMILAR_MAX_TICKETS", "50000"))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -92,8 +133,22 @@ CORS_ALLOWED_ORIGINS = [o.strip() for o in os.getenv("CORS_ALLOWED_ORIGINS", "")
 CSRF_TRUSTED_ORIGINS = [o.strip() for o in os.getenv("CSRF_TRUSTED_ORIGINS", "").split(",") if o.strip()]
 
 
+# Access tokens carry username/is_staff/is_active claims. With JWT_CLAIMS_AUTH,
+# API requests build request.user from a user state cache (AUTH_USER_CACHE_TTL
+# seconds, cleared when the user changes) or, with a TTL of 0, from the
+# claims alone, instead of querying the user table on every request.
+# Revocation window: a deactivated user or removed staff flag can still be
+# honoured for up to AUTH_USER_CACHE_TTL seconds by other processes' cached
+# copies, or for the rest of the access token's lifetime (ACCESS_TOKEN_LIFETIME
+# below) with a TTL of 0.
+JWT_CLAIMS_AUTH = env("JWT_CLAIMS_AUTH", "1") == "1"
+AUTH_USER_CACHE_TTL = float(env("AUTH_USER_CACHE_TTL", "30"))
+
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "tickets.authentication.ClaimsJWTAuthentication" if JWT_CLAIMS_AUTH
+        else "rest_framework_simplejwt.authentication.JWTAuthentication",
+    ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
@@ -101,6 +156,8 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "TOKEN_OBTAIN_SERIALIZER": "tickets.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "tickets.authentication.ClaimsTokenRefreshSerializer",
 }
 
 SPECTACULAR_SETTINGS = {
@@ -109,8 +166,97 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "1.0.0",
 }
 
-CELERY_BROKER_URL = env("REDIS_URL", "redis://127.0.0.1:6379/0")
-CELERY_RESULT_BACKEND = env("REDIS_URL", "redis://127.0.0.1:6379/0")
+REDIS_URL = env("REDIS_URL", "redis://127.0.0.1:6379/0")
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
+# AI triage is routed to ai-high / ai-normal / ai-low; a worker started without
+# -Q consumes all of them, or run one worker per queue for separate concurrency.
+CELERY_TASK_QUEUES = {name: {} for name in ("celery", "ai-high", "ai-normal", "ai-low")}
+# Celery beat (`celery -A supportdesk beat`) archives tickets resolved more than
+# ARCHIVE_AFTER_DAYS days ago every night; 0 turns the schedule off.
+ARCHIVE_AFTER_DAYS = float(env("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(env("ARCHIVE_BATCH_SIZE", "500"))
+CELERY_BEAT_SCHEDULE = {
+    # Incident matching only needs the LSH bands of open tickets inside
+    # CLUSTER_WINDOW_HOURS; drop the rest every hour.
+    "prune-cluster-index": {
+        "task": "ai_engine.tasks.prune_cluster_index",
+        "schedule": crontab(minute=15),
+    },
+}
+if ARCHIVE_AFTER_DAYS > 0:
+    CELERY_BEAT_SCHEDULE["archive-resolved-tickets"] = {
+        "task": "tickets.tasks.archive_resolved_tickets",
+        "schedule": crontab(hour=3, minute=0),
+    }
+# How long a ticket stays marked as queued, so it is not enqueued twice.
+AI_DEDUPE_TTL = int(env("AI_DEDUPE_TTL", "3600"))
+
+# Push updates over /ws/updates/. Redis pub/sub fans events out to every web
+# process (and from Celery workers); REALTIME_LAYER=memory keeps them inside
+# one process, which suits tests and single-process deploys without Redis
+# (the default when REDIS_URL is not set).
+ASGI_APPLICATION = "supportdesk.asgi.application"
+REALTIME_LAYER = env("REALTIME_LAYER", "redis" if os.getenv("REDIS_URL") else "memory")
+if REALTIME_LAYER == "memory":
+    CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {"hosts": [REDIS_URL]},
+        }
+    }
+# Staff dashboards get at most one analytics push per this many seconds.
+REALTIME_ANALYTICS_INTERVAL = float(env("REALTIME_ANALYTICS_INTERVAL", "1"))
 
 OPENAI_API_KEY = env("OPENAI_API_KEY", "")
 OPENAI_MODEL = env("OPENAI_MODEL", "gpt-5.2")
+OPENAI_TIMEOUT = float(env("OPENAI_TIMEOUT", "30"))
+OPENAI_MAX_RETRIES = int(env("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONCURRENCY = int(env("OPENAI_MAX_CONCURRENCY", "8"))
+# After this many consecutive provider failures, triage uses the keyword
+# fallback for OPENAI_BREAKER_COOLDOWN seconds instead of calling OpenAI.
+OPENAI_BREAKER_THRESHOLD = int(env("OPENAI_BREAKER_THRESHOLD", "5"))
+OPENAI_BREAKER_COOLDOWN = float(env("OPENAI_BREAKER_COOLDOWN", "30"))
+# Max OpenAI calls per second across all processes (counted in Redis); 0 = no limit.
+OPENAI_RATE_LIMIT = int(env("OPENAI_RATE_LIMIT", "0"))
+
+# Micro-batching of AI triage: tickets are buffered in Redis and sent to the
+# model AI_BATCH_SIZE at a time, or after AI_BATCH_WINDOW seconds. 1 disables it.
+AI_BATCH_SIZE = int(env("AI_BATCH_SIZE", "1"))
+AI_BATCH_WINDOW = float(env("AI_BATCH_WINDOW", "2"))
+# Single-ticket triage in two calls: a short structured call for the fields,
+# saved at once, then the suggested reply streamed into the ticket and pushed
+# over the WebSocket every AI_STREAM_FLUSH_INTERVAL seconds.
+AI_STREAM_REPLY = env("AI_STREAM_REPLY", "0") == "1"
+AI_STREAM_FLUSH_INTERVAL = float(env("AI_STREAM_FLUSH_INTERVAL", "0.3"))
+# Group near-duplicate tickets into incidents after triage (MinHash/LSH).
+# A ticket joins the most similar open ticket from the last
+# CLUSTER_WINDOW_HOURS whose estimated text similarity is >= CLUSTER_THRESHOLD.
+CLUSTER_ENABLED = env("CLUSTER_ENABLED", "1") == "1"
+CLUSTER_THRESHOLD = float(env("CLUSTER_THRESHOLD", "0.4"))
+CLUSTER_WINDOW_HOURS = float(env("CLUSTER_WINDOW_HOURS", "72"))
+
+# Prometheus metrics at /metrics; when set, scrapes must send
+# "Authorization: Bearer <METRICS_TOKEN>". Unset, only requests with a staff
+# user's access token are served.
+METRICS_TOKEN = env("METRICS_TOKEN", "")
+
+# Tickets per Celery message when many are enqueued at once (bulk import).
+AI_ENQUEUE_CHUNK = int(env("AI_ENQUEUE_CHUNK", "100"))
+
+TICKET_BULK_MAX_ROWS = int(env("TICKET_BULK_MAX_ROWS", "10000"))
+TICKET_BULK_CHUNK_SIZE = int(env("TICKET_BULK_CHUNK_SIZE", "1000"))
+
+# Cache of LLM triage results keyed by normalized title/description, model and
+# prompt version. AI_CACHE_TTL=0 disables it.
+AI_CACHE_TTL = int(env("AI_CACHE_TTL", "86400"))
+AI_CACHE_LOCAL_SIZE = int(env("AI_CACHE_LOCAL_SIZE", "1024"))
+AI_CACHE_NEAR_DUP = env("AI_CACHE_NEAR_DUP", "0") == "1"
+AI_CACHE_NEAR_DUP_DISTANCE = int(env("AI_CACHE_NEAR_DUP_DISTANCE", "3"))
+
+# Local classifier tier (see `manage.py train_triage_model`): tickets it labels
+# with at least LOCAL_MODEL_THRESHOLD probability in every field skip the LLM.
+LOCAL_MODEL_PATH = env("LOCAL_MODEL_PATH", "")
+LOCAL_MODEL_THRESHOLD = float(env("LOCAL_MODEL_THRESHOLD", "0.9"))
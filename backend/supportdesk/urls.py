@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
@@ -5,8 +6,10 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from tickets.views import TicketViewSet, CommentViewSet
-from analytics_app.views import AnalyticsSummaryView
+from analytics_app.views import AnalyticsSummaryView, AnalyticsTimeseriesView, AICacheStatsView
 from tickets.auth_views import RegisterView, MeView
+from tickets import async_views
+from .metrics import metrics_view
 
 router = DefaultRouter()
 router.register(r"tickets", TicketViewSet, basename="tickets")
@@ -20,9 +23,19 @@ urlpatterns = [
     path("api/auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/auth/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
+    *([
+        # Ahead of the router: async handlers for the hot routes (see ASYNC_API).
+        path("api/tickets/", async_views.tickets, name="tickets-list"),
+        path("api/tickets/<int:pk>/", async_views.ticket_detail, name="tickets-detail"),
+        path("api/analytics/summary/", async_views.analytics_summary, name="analytics_summary"),
+    ] if settings.ASYNC_API else []),
     path("api/", include(router.urls)),
     path("api/analytics/summary/", AnalyticsSummaryView.as_view(), name="analytics_summary"),
+    path("api/analytics/timeseries/", AnalyticsTimeseriesView.as_view(), name="analytics_timeseries"),
+    path("api/analytics/ai-cache/", AICacheStatsView.as_view(), name="analytics_ai_cache"),
 
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("api/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
+
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Ticket, Comment
+from .models import ArchivedTicket, Ticket, Comment
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
@@ -11,3 +11,12 @@ class TicketAdmin(admin.ModelAdmin):
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("id", "ticket", "author", "created_at")
     search_fields = ("message", "author__username")
+
+@admin.register(ArchivedTicket)
+class ArchivedTicketAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "category", "priority", "created_by", "resolved_at", "archived_at")
+    list_filter = ("category", "priority")
+    search_fields = ("title", "created_by__username")
+
+    def has_change_permission(self, request, obj=None):
+        return False
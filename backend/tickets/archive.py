@@ -0,0 +1,78 @@
+import datetime
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from analytics_app import rollups
+from .models import ArchivedComment, ArchivedTicket, ArchivedTicketText, Comment, Ticket
+
+logger = logging.getLogger(__name__)
+
+# Ticket columns copied to ArchivedTicket as they are; the text goes to ArchivedTicketText.
+META_FIELDS = (
+    "title", "status", "category", "priority", "sentiment", "ai_confidence", "ai_status", "cluster_id",
+    "created_by_id", "assigned_to_id", "created_at", "updated_at", "resolved_at",
+)
+TEXT_FIELDS = ("description", "ai_summary", "ai_suggested_reply")
+
+
+def _archive_batch(cutoff, size):
+    with transaction.atomic():
+        # Locked and re-checked, so a ticket reopened meanwhile stays put.
+        tickets = list(
+            Ticket.objects.select_for_update()
+            .filter(status="RESOLVED", resolved_at__lt=cutoff)
+            .order_by("resolved_at", "id")[:size]
+        )
+        if not tickets:
+            return 0, 0
+        ids = [t.id for t in tickets]
+        comments = list(Comment.objects.filter(ticket_id__in=ids).values_list("id", "ticket_id", "author_id", "message", "created_at"))
+
+        ArchivedTicket.objects.bulk_create([
+            ArchivedTicket(id=t.id, **{f: getattr(t, f) for f in META_FIELDS}) for t in tickets
+        ])
+        ArchivedTicketText.objects.bulk_create([
+            ArchivedTicketText(ticket_id=t.id, **{f: getattr(t, f) for f in TEXT_FIELDS}) for t in tickets
+        ])
+        ArchivedComment.objects.bulk_create([
+            ArchivedComment(id=cid, ticket_id=tid, author_id=author_id, message=message, created_at=created_at)
+            for cid, tid, author_id, message, created_at in comments
+        ], batch_size=1000)
+
+        # The tickets stay counted in TicketRollup; ArchivedRollup records
+        # that the archive now holds them, so rebuilds still add up.
+        rollups.record_archived([rollups.values_of(t) for t in tickets])
+        with rollups.paused():
+            # Signals still drop the tickets from the search index and bump their ETags.
+            Ticket.objects.filter(id__in=ids).delete()
+    return len(tickets), len(comments)
+
+
+def archive_resolved(days: float, batch_size: int = 500, limit: int = None):
+    """Move tickets resolved more than ``days`` ago, with their comments, to the archive.
+
+    Works in transactions of ``batch_size`` tickets; returns the number of
+    tickets and comments moved.
+    """
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    tickets = comments = 0
+    while limit is None or tickets < limit:
+        size = batch_size if limit is None else min(batch_size, limit - tickets)
+        moved, moved_comments = _archive_batch(cutoff, size)
+        tickets += moved
+        comments += moved_comments
+        if moved < size:
+            break
+    if tickets:
+        logger.info("Archived %s tickets and %s comments resolved before %s", tickets, comments, cutoff.isoformat())
+    return tickets, comments
+
+
+def archived_tickets(user):
+    """Archived tickets visible to ``user``, newest first, with the text table joined."""
+    qs = ArchivedTicket.objects.select_related("created_by", "assigned_to", "text")
+    if not user.is_staff:
+        qs = qs.filter(created_by=user)
+    return qs.order_by("-created_at")
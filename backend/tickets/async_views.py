@@ -0,0 +1,140 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from ai_engine.tasks import triage_ticket_async
+from analytics_app import rollups
+from analytics_app.views import AnalyticsSummaryView
+from . import archive, etags
+from .models import Ticket
+from .pagination import TicketCursorPagination
+from .serializers import ArchivedTicketSerializer, TicketListSerializer, TicketSerializer
+from .views import TicketViewSet, create_ticket, visible_tickets
+
+
+def _json(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def _error(exc):
+    # Same bodies as DRF's exception handler.
+    data = exc.detail if isinstance(exc.detail, (dict, list)) else {"detail": exc.detail}
+    response = _json(data, exc.status_code)
+    if exc.status_code == 401:
+        response["WWW-Authenticate"] = 'Bearer realm="api"'
+    return response
+
+
+async def _authenticate(request):
+    # The DRF authentication classes only read headers, so they work on the
+    # plain Django request; a user cache miss queries the database.
+    for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        found = await sync_to_async(authenticator().authenticate)(request)
+        if found is not None:
+            return found[0]
+    raise exceptions.NotAuthenticated()
+
+
+async def _conditional(request, user, key, build):
+    # Same ETags as the DRF views (see tickets.etags), so either path can answer.
+    token = await sync_to_async(etags.version, thread_sensitive=False)(key)
+    if token is None:
+        return _json(await build())
+    etag = etags.etag_for(request, user, token, "json")
+    if etags.matches(request, etag):
+        return etags.set_headers(HttpResponse(status=304), etag)
+    return etags.set_headers(_json(await build()), etag)
+
+
+class AsyncAPIView(View):
+    """Async handlers for hot read/create endpoints under ASGI (``ASYNC_API=1``).
+
+    Handlers get the authenticated user and await the ORM and the model
+    instead of holding a thread. Methods without an async handler go to
+    ``fallback``, the regular DRF view, so the URL keeps its full API.
+    """
+
+    fallback = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if handler is None or request.method == "OPTIONS":
+            return await sync_to_async(self.fallback)(request, *args, **kwargs)
+        try:
+            user = await _authenticate(request)
+            return await handler(request, user, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return _error(exc)
+
+
+class TicketsView(AsyncAPIView):
+    fallback = staticmethod(TicketViewSet.as_view({"get": "list", "post": "create"}))
+
+    async def get(self, request, user):
+        if request.GET.get("archived") == "1":
+            return await sync_to_async(self.fallback)(request)
+        return await _conditional(request, user, etags.scope_key(user), lambda: self._page(request, user))
+
+    async def _page(self, request, user):
+        qs = visible_tickets(user, "list", request.GET)
+        # DRF's cursor pagination evaluates the page itself, so it runs on a thread.
+        paginator = TicketCursorPagination()
+        page = await sync_to_async(paginator.paginate_queryset)(qs, Request(request))
+        return {
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": TicketListSerializer(page, many=True).data,
+        }
+
+    async def post(self, request, user):
+        # The body is already in memory; DRF's parsers accept the same content
+        # types as the viewset.
+        drf_request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+        ser = TicketSerializer(data=drf_request.data, context={"request": drf_request})
+        ser.is_valid(raise_exception=True)
+        ticket, queued = await sync_to_async(create_ticket)(ser, user)
+        if not queued:
+            try:
+                await triage_ticket_async(ticket.id)
+            except Exception:
+                pass
+
+        ticket = await Ticket.objects.select_related("created_by", "assigned_to").aget(id=ticket.id)
+        return _json(TicketSerializer(ticket).data, status=201)
+
+
+class TicketDetailView(AsyncAPIView):
+    fallback = staticmethod(TicketViewSet.as_view({
+        "get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy",
+    }))
+
+    async def get(self, request, user, pk):
+        return await _conditional(request, user, f"ticket:{pk}", lambda: self._ticket(user, pk))
+
+    async def _ticket(self, user, pk):
+        ticket = await visible_tickets(user, "retrieve", {}).filter(id=pk).afirst()
+        if ticket is not None:
+            return TicketSerializer(ticket).data
+        archived = await archive.archived_tickets(user).filter(id=pk).afirst()
+        if archived is None:
+            raise exceptions.NotFound("No Ticket matches the given query.")
+        return ArchivedTicketSerializer(archived).data
+
+
+class AnalyticsSummaryAsyncView(AsyncAPIView):
+    fallback = staticmethod(AnalyticsSummaryView.as_view())
+
+    async def get(self, request, user):
+        if not user.is_staff:
+            raise exceptions.PermissionDenied()
+        return await _conditional(request, user, "all", rollups.asummary)
+
+
+tickets = csrf_exempt(TicketsView.as_view())
+ticket_detail = csrf_exempt(TicketDetailView.as_view())
+analytics_summary = csrf_exempt(AnalyticsSummaryAsyncView.as_view())
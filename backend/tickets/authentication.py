@@ -0,0 +1,139 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ai_engine.cache import LRUCache
+from ai_engine.redis_client import get_redis
+
+KEY_PREFIX = "auth:user:"
+# The fields request.user carries; anything else is loaded on first access.
+USER_FIELDS = ("id", "username", "is_staff", "is_active")
+
+
+def _load_state(user_id):
+    return User.objects.filter(id=user_id).values(*USER_FIELDS[1:]).first()
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry ``username``, ``is_staff`` and ``is_active``.
+
+    The claims are read from the database each time an access token is
+    issued (login and refresh), so they are at most one access token
+    lifetime old; deactivated users cannot refresh.
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        state = _load_state(self[api_settings.USER_ID_CLAIM])
+        if state is None or not state["is_active"]:
+            raise AuthenticationFailed("User not found or inactive", code="user_inactive")
+        access["username"] = state["username"]
+        access["is_staff"] = state["is_staff"]
+        access["is_active"] = state["is_active"]
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class UserStateCache:
+    """Two-tier (in-process, then Redis) cache of the fields in ``USER_FIELDS``.
+
+    Entries are dropped when the user is saved or deleted; other processes
+    keep their in-process copy for at most ``AUTH_USER_CACHE_TTL`` seconds.
+    Redis errors are treated as misses.
+    """
+
+    def __init__(self):
+        self.local = LRUCache(10000, settings.AUTH_USER_CACHE_TTL)
+
+    @property
+    def enabled(self):
+        return settings.AUTH_USER_CACHE_TTL > 0
+
+    def get(self, user_id):
+        state = self.local.get(user_id)
+        if state is not None:
+            return state
+        try:
+            raw = get_redis().get(f"{KEY_PREFIX}{user_id}")
+        except Exception:
+            raw = None
+        if raw:
+            state = json.loads(raw)
+        else:
+            state = _load_state(user_id)
+            if state is None:
+                return None
+            try:
+                get_redis().set(f"{KEY_PREFIX}{user_id}", json.dumps(state), ex=int(settings.AUTH_USER_CACHE_TTL))
+            except Exception:
+                pass
+        self.local.set(user_id, state)
+        return state
+
+    def invalidate(self, user_id):
+        self.local.delete(user_id)
+        try:
+            get_redis().delete(f"{KEY_PREFIX}{user_id}")
+        except Exception:
+            pass
+
+
+user_cache = UserStateCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    # After commit, so a concurrent request cannot cache the old row again.
+    if user_cache.enabled:
+        transaction.on_commit(lambda: user_cache.invalidate(instance.id))
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT authentication without a ``User`` query per request.
+
+    ``request.user`` is a ``User`` holding only ``USER_FIELDS`` (other fields
+    are deferred), taken from the user state cache or, with
+    ``AUTH_USER_CACHE_TTL=0``, straight from the token's claims. Tokens
+    issued without all the claims fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which only the full row has.
+            return super().get_user(validated_token)
+        if user_cache.enabled:
+            state = user_cache.get(user_id)
+        elif all(field in validated_token for field in USER_FIELDS[1:]):
+            state = {field: validated_token[field] for field in USER_FIELDS[1:]}
+        else:
+            return super().get_user(validated_token)
+
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not state["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, (user_id, *(state[field] for field in USER_FIELDS[1:])))
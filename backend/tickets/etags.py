@@ -0,0 +1,147 @@
+import functools
+import hashlib
+import logging
+import threading
+import uuid
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from ai_engine.redis_client import get_redis
+from .models import Comment, Ticket
+
+logger = logging.getLogger(__name__)
+
+# Version tokens in Redis: "all" changes with any ticket or comment, "user:<id>"
+# with that user's tickets, "ticket:<id>" with one ticket or its comments.
+# Tokens are random rather than counters, so a Redis restart can never make an
+# old ETag match again; expiry only costs one full response.
+KEY_PREFIX = "etag:"
+TOKEN_TTL = 7 * 86400
+
+_pending = threading.local()
+
+
+def scope_key(user):
+    return "all" if user.is_staff else f"user:{user.id}"
+
+
+def version(key: str):
+    """Current token for ``key``; None if Redis is unavailable (no ETag then)."""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.set(KEY_PREFIX + key, uuid.uuid4().hex, ex=TOKEN_TTL, nx=True)
+        pipe.get(KEY_PREFIX + key)
+        return pipe.execute()[1].decode()
+    except Exception:
+        return None
+
+
+def _flush():
+    tickets = getattr(_pending, "tickets", None)
+    if not tickets:
+        return
+    _pending.tickets = {}
+    unknown = [tid for tid, owner in tickets.items() if owner is None]
+    if unknown:
+        tickets.update(Ticket.objects.filter(id__in=unknown).values_list("id", "created_by_id"))
+    keys = ["all"]
+    keys += {f"user:{owner}" for owner in tickets.values() if owner is not None}
+    keys += [f"ticket:{tid}" for tid in tickets]
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.set(KEY_PREFIX + key, uuid.uuid4().hex, ex=TOKEN_TTL)
+        pipe.execute()
+    except Exception:
+        logger.warning("Could not invalidate ETags for tickets %s", sorted(tickets)[:20], exc_info=True)
+
+
+def touch(ticket_ids, owner_id=None):
+    """Invalidate ETags covering these tickets once the current transaction commits.
+
+    Like the search index signals, changes are collected and written in one
+    Redis round trip. Pass ``owner_id`` when known (and always for deletes).
+    """
+    if not hasattr(_pending, "tickets"):
+        _pending.tickets = {}
+    for ticket_id in ticket_ids:
+        if _pending.tickets.get(ticket_id) is None:
+            _pending.tickets[ticket_id] = owner_id
+    transaction.on_commit(_flush)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def _ticket_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch([instance.pk], instance.created_by_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def _comment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch([instance.ticket_id])
+
+
+def etag_for(request, user, token: str, fmt: str):
+    """Weak ETag for this URL, user and renderer format at version ``token``."""
+    raw = "\x1f".join([token, request.get_full_path(), str(user.id), str(user.is_staff), fmt])
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def matches(request, etag: str):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    # "*" is never honoured: it would answer 304 before the view has checked
+    # that the ticket exists and the user may see it.
+    # Weak comparison (RFC 9110): W/ prefixes are ignored.
+    return etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in parse_etags(header)}
+
+
+def set_headers(response, etag: str):
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        # Browsers keep the body and revalidate every time.
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+class ConditionalGetMixin:
+    """Answer ``If-None-Match`` with 304 before any rows are loaded.
+
+    Views return the version key for the current request from ``etag_key``
+    (None to skip) and wrap their GET handlers in ``conditional``. The ETag
+    hashes the version token with the URL, the user and the renderer.
+    """
+
+    def etag_key(self, request):
+        return None
+
+    def conditional(self, request, handler, *args, **kwargs):
+        key = self.etag_key(request)
+        token = version(key) if key else None
+        if token is None:
+            return handler(request, *args, **kwargs)
+
+        etag = etag_for(request, request.user, token, request.accepted_renderer.format)
+        if matches(request, etag):
+            return set_headers(Response(status=304), etag)
+        return set_headers(handler(request, *args, **kwargs), etag)
+
+
+def conditional_get(method):
+    """Decorator form of ``ConditionalGetMixin.conditional`` for view methods."""
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        return self.conditional(request, functools.partial(method, self), *args, **kwargs)
+
+    return wrapper
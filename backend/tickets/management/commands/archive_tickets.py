@@ -0,0 +1,30 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tickets import archive
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Move tickets resolved more than --days ago, with their comments, to the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=float, help="Defaults to ARCHIVE_AFTER_DAYS.")
+        parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE, help="Tickets per transaction.")
+        parser.add_argument("--limit", type=int, help="Stop after this many tickets.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the tickets that would move.")
+
+    def handle(self, *args, **opts):
+        days = opts["days"] if opts["days"] is not None else settings.ARCHIVE_AFTER_DAYS
+        if days <= 0 and opts["days"] is None:
+            raise CommandError("ARCHIVE_AFTER_DAYS is 0 (archiving off); pass --days to archive anyway.")
+        if opts["dry_run"]:
+            cutoff = timezone.now() - datetime.timedelta(days=days)
+            count = Ticket.objects.filter(status="RESOLVED", resolved_at__lt=cutoff).count()
+            self.stdout.write(f"{count} tickets resolved before {cutoff.isoformat()} would be archived")
+            return
+        tickets, comments = archive.archive_resolved(days, opts["batch_size"], opts["limit"])
+        self.stdout.write(f"Archived {tickets} tickets and {comments} comments")
@@ -0,0 +1,264 @@
+import json
+import random
+import statistics
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ai_engine import provider
+from ai_engine.fake_client import FakeOpenAI
+from analytics_app import rollups
+from search import index as search_index
+from supportdesk import metrics
+from supportdesk.celery import app as celery_app
+from tickets.authentication import ClaimsRefreshToken
+from tickets.models import Ticket
+from tickets.seed import seed_tickets
+
+ENDPOINTS = ("create", "list", "detail", "me", "search", "similar", "staff_list", "analytics", "timeseries")
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def _stage_totals():
+    totals = {}
+    for metric in metrics.STAGE_SECONDS.collect():
+        for s in metric.samples:
+            if s.name.endswith(("_sum", "_count")):
+                totals[(s.labels["stage"], s.name.rsplit("_", 1)[1])] = s.value
+    return totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed tickets, then load test the API routes and AI triage with a fake "
+        "OpenAI client. Prints p50/p99 latency and requests/s per endpoint as JSON. "
+        "Runs against the configured database (SQLite or Postgres)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=10000, help="Tickets to seed before measuring.")
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Client threads per endpoint.")
+        parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma separated subset of {', '.join(ENDPOINTS)}.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Fake model round trip in seconds.")
+        parser.add_argument(
+            "--auth", choices=["jwt", "force"], default="jwt",
+            help="jwt: send a bearer token through the configured authentication classes; "
+                 "force: skip authentication (force_authenticate).",
+        )
+        parser.add_argument(
+            "--worker", choices=["eager", "local"], default="eager",
+            help="eager: Celery tasks run inside the request; local: an in-process Celery worker "
+                 "consumes from the configured broker (needs Redis).",
+        )
+        parser.add_argument("--conditional", action="store_true",
+                            help="Repeat GETs with If-None-Match from the first response, like a browser cache.")
+        parser.add_argument("--worker-concurrency", type=int, default=4)
+        parser.add_argument("--ai-timeout", type=float, default=30, help="Stop waiting for the local worker after this many idle seconds.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded tickets.")
+
+    def _client(self, user):
+        client = APIClient()
+        if self.opts["auth"] == "jwt":
+            token = self.tokens.get(user.id)
+            if token is None:
+                token = self.tokens[user.id] = str(ClaimsRefreshToken.for_user(user).access_token)
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        else:
+            client.force_authenticate(user)
+        return client
+
+    def _requests(self, name, owner_ids, rng):
+        # Returns a list of (method, path, body) for one endpoint.
+        n = self.opts["requests"]
+        if name == "create":
+            return [("post", "/api/tickets/", {"title": f"Bench ticket {i}", "description": "Charged twice, refund asap"}) for i in range(n)]
+        if name in ("list", "staff_list"):
+            return [("get", "/api/tickets/", None)] * n
+        if name == "detail":
+            return [("get", f"/api/tickets/{rng.choice(owner_ids)}/", None) for _ in range(n)]
+        if name == "me":
+            return [("get", "/api/auth/me/", None)] * n
+        if name == "search":
+            words = ["refund", "login", "seeded", "charged twice", "benchmarks"]
+            return [("get", f"/api/tickets/search/?q={rng.choice(words)}", None) for _ in range(n)]
+        if name == "similar":
+            return [("get", f"/api/tickets/{rng.choice(owner_ids)}/similar/", None) for _ in range(n)]
+        if name == "analytics":
+            return [("get", "/api/analytics/summary/", None)] * n
+        return [("get", "/api/analytics/timeseries/?interval=day", None)] * n
+
+    def _drive(self, user, calls):
+        timings = []
+        errors = []
+        lock = threading.Lock()
+        calls = list(calls)
+
+        def work(part):
+            client = self._client(user)
+            local = []
+            seen = {}  # path -> ETag, like a browser cache
+            try:
+                for method, path, body in part:
+                    start = time.perf_counter()
+                    # The test client re-raises view exceptions (e.g. SQLite
+                    # "database is locked" under concurrent writes); count them.
+                    try:
+                        if method == "post":
+                            outcome = client.post(path, body, format="json").status_code
+                        elif path in seen:
+                            outcome = client.get(path, HTTP_IF_NONE_MATCH=seen[path]).status_code
+                        else:
+                            response = client.get(path)
+                            outcome = response.status_code
+                            if self.opts["conditional"] and response.has_header("ETag"):
+                                seen[path] = response["ETag"]
+                    except Exception as exc:
+                        outcome = type(exc).__name__
+                    local.append(time.perf_counter() - start)
+                    if not isinstance(outcome, int) or outcome >= 400:
+                        with lock:
+                            errors.append(f"{method.upper()} {path} -> {outcome}")
+            finally:
+                with lock:
+                    timings.extend(local)
+                connection.close()
+
+        workers = max(1, self.opts["concurrency"])
+        start = time.perf_counter()
+        if workers == 1:
+            work(calls)
+        else:
+            threads = [threading.Thread(target=work, args=(calls[i::workers],)) for i in range(workers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        elapsed = time.perf_counter() - start
+        timings.sort()
+        return {
+            "requests": len(timings),
+            "errors": len(errors),
+            "p50_ms": round(statistics.median(timings) * 1e3, 2) if timings else None,
+            "p99_ms": round(_percentile(timings, 0.99) * 1e3, 2) if timings else None,
+            "rps": round(len(timings) / elapsed, 1) if elapsed else None,
+        }, errors[:5]
+
+    def _wait_triaged(self, user, timeout):
+        """Wait for the benchmark's tickets to be triaged; returns how many were.
+
+        Gives up once no ticket has finished for ``timeout`` seconds (failed tasks never do).
+        """
+        qs = Ticket.objects.filter(created_by=user, title__startswith="Bench ticket")
+        total = qs.count()
+        done = -1
+        while True:
+            now_done = qs.filter(ai_status="DONE").count()
+            if now_done != done:
+                done, deadline = now_done, time.monotonic() + timeout
+            if done == total or time.monotonic() >= deadline:
+                return done
+            time.sleep(0.05)
+
+    def handle(self, *args, **opts):
+        self.opts = opts
+        self.tokens = {}
+        names = [n.strip() for n in opts["endpoints"].split(",") if n.strip()]
+        unknown = set(names) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        rng = random.Random(opts["seed"])
+
+        users = [User.objects.get_or_create(username=f"bench-api-{i}")[0] for i in range(max(1, opts["users"]))]
+        staff, _ = User.objects.get_or_create(username="bench-api-staff", defaults={"is_staff": True})
+        user = users[0]
+        report = {
+            "config": {
+                "database": connection.vendor,
+                "worker": opts["worker"],
+                **{k: opts[k] for k in ("tickets", "users", "requests", "concurrency", "latency", "auth", "conditional")},
+                "authentication": settings.REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"][0].rsplit(".", 1)[1],
+            },
+            "endpoints": {},
+        }
+        previous = provider.set_client(FakeOpenAI(latency=opts["latency"]))
+        eager = celery_app.conf.task_always_eager
+        try:
+            # Leftovers from an interrupted run would skew volumes and counts.
+            with rollups.paused():
+                Ticket.objects.filter(created_by__in=[*users, staff]).delete()
+            start = time.perf_counter()
+            seed_tickets(users, opts["tickets"], seed=opts["seed"])
+            rollups.rebuild()
+            search_index.update_tickets(Ticket.objects.filter(created_by__in=users).values_list("id", flat=True))
+            report["config"]["seed_seconds"] = round(time.perf_counter() - start, 2)
+
+            owner_ids = list(Ticket.objects.filter(created_by=user).values_list("id", flat=True)[:1000]) or [0]
+
+            with ExitStack() as stack:
+                stack.enter_context(override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                    AI_ASYNC=True, AI_BATCH_SIZE=1, OPENAI_API_KEY="bench", AI_CACHE_TTL=0,
+                ))
+                celery_app.conf.task_always_eager = opts["worker"] == "eager"
+                if opts["worker"] == "local":
+                    from celery.contrib.testing.worker import start_worker
+
+                    stack.enter_context(start_worker(
+                        celery_app, pool="threads", concurrency=opts["worker_concurrency"],
+                        perform_ping_check=False, shutdown_timeout=60,
+                    ))
+
+                stages_before = _stage_totals()
+                for name in names:
+                    who = staff if name in ("staff_list", "analytics", "timeseries") else user
+                    start = time.perf_counter()
+                    result, errors = self._drive(who, self._requests(name, owner_ids, rng))
+                    if name == "create":
+                        # Throughput from the first POST until the last ticket is triaged.
+                        # Eager tasks finish inside the request, so only a local worker is waited for.
+                        done = self._wait_triaged(user, opts["ai_timeout"] if opts["worker"] == "local" else 0)
+                        result["triaged"] = done
+                        result["triaged_per_s"] = round(done / (time.perf_counter() - start), 1)
+                    if errors:
+                        result["sample_errors"] = errors
+                    report["endpoints"][name] = result
+                    self.stderr.write(f"{name}: {json.dumps(result)}")
+
+                stages_after = _stage_totals()
+                report["ai_stages"] = {}
+                for (stage, kind), value in stages_after.items():
+                    if kind != "count":
+                        continue
+                    count = value - stages_before.get((stage, "count"), 0)
+                    if count:
+                        total = stages_after[(stage, "sum")] - stages_before.get((stage, "sum"), 0)
+                        report["ai_stages"][stage] = {"count": int(count), "mean_ms": round(total / count * 1e3, 2)}
+        finally:
+            celery_app.conf.task_always_eager = eager
+            provider.set_client(previous)
+            connections.close_all()
+            if not opts["keep"]:
+                with rollups.paused():
+                    Ticket.objects.filter(created_by__in=users).delete()
+                    User.objects.filter(id__in=[u.id for u in users] + [staff.id]).delete()
+                rollups.rebuild()
+
+        out = json.dumps(report, indent=2)
+        self.stdout.write(out)
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                f.write(out + "\n")
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import RequestFactory, override_settings
+
+from ai_engine import provider
+from ai_engine.fake_client import FakeAsyncOpenAI, FakeOpenAI
+from analytics_app import rollups
+from tickets import async_views
+from tickets.authentication import ClaimsRefreshToken
+from tickets.models import Ticket
+from tickets.views import TicketViewSet
+
+BODY = json.dumps({"title": "Bench async ticket", "description": "Charged twice, refund asap"})
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ticket creation with inline AI triage on the sync DRF view "
+        "(a pool of threads) and on the async view (one event loop), with a "
+        "fake OpenAI client of fixed latency. Prints requests/s and p50/p99 as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Threads for the sync view, like gunicorn --threads.")
+        parser.add_argument("--concurrency", type=int, default=64,
+                            help="Requests in flight on the event loop for the async view.")
+        parser.add_argument("--latency", type=float, default=0.2, help="Fake model round trip in seconds.")
+        parser.add_argument("--modes", default="sync,async")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def _request(self):
+        return self.factory.post("/api/tickets/", BODY, content_type="application/json",
+                                 HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def _run_sync(self, n, workers):
+        view = TicketViewSet.as_view({"post": "create"})
+        timings, errors = [], []
+        lock = threading.Lock()
+
+        def work(count):
+            local = []
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    try:
+                        status = view(self._request()).status_code
+                    except Exception as exc:
+                        status = type(exc).__name__
+                    local.append(time.perf_counter() - start)
+                    if status != 201:
+                        with lock:
+                            errors.append(str(status))
+            finally:
+                with lock:
+                    timings.extend(local)
+                connection.close()
+
+        threads = [threading.Thread(target=work, args=(n // workers + (i < n % workers),)) for i in range(workers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return timings, errors, time.perf_counter() - start
+
+    async def _run_async(self, n, concurrency):
+        provider.set_async_client(FakeAsyncOpenAI(latency=self.opts["latency"]))
+        gate = asyncio.Semaphore(concurrency)
+        timings, errors = [], []
+
+        async def one():
+            # Like Django's ASGIHandler: each request's sync ORM calls get their own thread.
+            async with gate, ThreadSensitiveContext():
+                start = time.perf_counter()
+                try:
+                    status = (await async_views.tickets(self._request())).status_code
+                except Exception as exc:
+                    status = type(exc).__name__
+                timings.append(time.perf_counter() - start)
+                if status != 201:
+                    errors.append(str(status))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(n)))
+        elapsed = time.perf_counter() - start
+        await sync_to_async(connections.close_all)()
+        return timings, errors, elapsed
+
+    def handle(self, *args, **opts):
+        self.opts = opts
+        self.factory = RequestFactory()
+        user, _ = User.objects.get_or_create(username="bench-async")
+        self.token = str(ClaimsRefreshToken.for_user(user).access_token)
+        n = opts["requests"]
+        report = {
+            "config": {
+                "database": connection.vendor,
+                **{k: opts[k] for k in ("requests", "workers", "concurrency", "latency")},
+            },
+            "modes": {},
+        }
+        previous = provider.set_client(FakeOpenAI(latency=opts["latency"]))
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                # Triage inside the request, so the model round trip is what holds a worker.
+                AI_ASYNC=False, AI_BACKGROUND=False, AI_CACHE_TTL=0, OPENAI_API_KEY="bench",
+                OPENAI_RATE_LIMIT=0, OPENAI_MAX_CONCURRENCY=max(opts["workers"], opts["concurrency"]),
+            ):
+                for mode in [m.strip() for m in opts["modes"].split(",") if m.strip()]:
+                    if mode == "sync":
+                        timings, errors, elapsed = self._run_sync(n, max(1, opts["workers"]))
+                    else:
+                        timings, errors, elapsed = asyncio.run(self._run_async(n, max(1, opts["concurrency"])))
+                    timings.sort()
+                    result = {
+                        "requests": len(timings),
+                        "errors": len(errors),
+                        "p50_ms": round(statistics.median(timings) * 1e3, 2) if timings else None,
+                        "p99_ms": round(_percentile(timings, 0.99) * 1e3, 2) if timings else None,
+                        "rps": round(len(timings) / elapsed, 1) if elapsed else None,
+                        "triaged": Ticket.objects.filter(created_by=user, ai_status="DONE").count(),
+                    }
+                    if errors:
+                        result["sample_errors"] = errors[:5]
+                    report["modes"][mode] = result
+                    self.stderr.write(f"{mode}: {json.dumps(result)}")
+                    with rollups.paused():
+                        Ticket.objects.filter(created_by=user).delete()
+        finally:
+            provider.set_client(previous)
+            with rollups.paused():
+                Ticket.objects.filter(created_by=user).delete()
+                user.delete()
+            rollups.rebuild()
+
+        out = json.dumps(report, indent=2)
+        self.stdout.write(out)
+        if opts["output"]:
+            with open(opts["output"], "w") as f:
+                f.write(out + "\n")
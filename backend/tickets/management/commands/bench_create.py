@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ai_engine import background, provider
+from ai_engine.fake_client import FakeOpenAI
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Load test POST /api/tickets/ with AI_ASYNC=0, inline triage vs the background runner."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=30)
+        parser.add_argument("--latency", type=float, default=0.3, help="Fake model round trip in seconds.")
+
+    def _run(self, client, n):
+        timings = []
+        for i in range(n):
+            start = time.perf_counter()
+            resp = client.post("/api/tickets/", {"title": f"Bench {i}", "description": "Charged twice, refund asap"}, format="json")
+            timings.append(time.perf_counter() - start)
+            if resp.status_code != 201:
+                raise CommandError(f"POST /api/tickets/ returned {resp.status_code}: {resp.content[:200]!r}")
+        return timings
+
+    def handle(self, *args, **opts):
+        user, _ = User.objects.get_or_create(username="bench-create")
+        client = APIClient()
+        client.force_authenticate(user)
+        previous = provider.set_client(FakeOpenAI(latency=opts["latency"]))
+        try:
+            for mode in (False, True):
+                with override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                    AI_ASYNC=False, AI_BACKGROUND=mode, OPENAI_API_KEY="bench", AI_CACHE_TTL=0,
+                ):
+                    start = time.perf_counter()
+                    timings = sorted(self._run(client, opts["requests"]))
+                    background.runner.join()
+                    elapsed = time.perf_counter() - start
+                done = Ticket.objects.filter(created_by=user, ai_status="DONE").count()
+                p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+                self.stdout.write(
+                    f"background={'on ' if mode else 'off'} p50={statistics.median(timings) * 1e3:7.1f}ms "
+                    f"p99={p99 * 1e3:7.1f}ms triaged={done}/{len(timings)} total={elapsed:5.2f}s"
+                )
+                Ticket.objects.filter(created_by=user).delete()
+        finally:
+            provider.set_client(previous)
+            user.delete()
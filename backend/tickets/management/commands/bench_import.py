@@ -0,0 +1,76 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from analytics_app import rollups
+from supportdesk.celery import app as celery_app
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Compare importing tickets one POST at a time with POST /api/tickets/bulk/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument("--format", choices=["json", "ndjson"], default="ndjson")
+
+    def _rows(self, n):
+        return [{"title": f"Import {i}", "description": f"Legacy ticket {i}: charged twice, refund asap"} for i in range(n)]
+
+    def _one_by_one(self, client, rows):
+        for row in rows:
+            resp = client.post("/api/tickets/", row, format="json")
+            if resp.status_code != 201:
+                raise CommandError(f"POST /api/tickets/ returned {resp.status_code}: {resp.content[:200]!r}")
+
+    def _bulk(self, client, rows, fmt):
+        for i in range(0, len(rows), settings.TICKET_BULK_MAX_ROWS):
+            part = rows[i:i + settings.TICKET_BULK_MAX_ROWS]
+            if fmt == "ndjson":
+                body = "\n".join(json.dumps(r) for r in part)
+                resp = client.post("/api/tickets/bulk/", body, content_type="application/x-ndjson")
+            else:
+                resp = client.post("/api/tickets/bulk/", part, format="json")
+            if resp.status_code != 201:
+                raise CommandError(f"POST /api/tickets/bulk/ returned {resp.status_code}: {resp.content[:200]!r}")
+
+    def handle(self, *args, **opts):
+        n = opts["tickets"]
+        rows = self._rows(n)
+        user, _ = User.objects.get_or_create(username="bench-import")
+        client = APIClient()
+        client.force_authenticate(user)
+
+        # Celery runs eagerly so AI work is part of the timing; with no API key
+        # triage uses the keyword fallback and the difference is request overhead.
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                AI_ASYNC=True, AI_BATCH_SIZE=1, OPENAI_API_KEY="",
+            ):
+                results = {}
+                for name, run in (
+                    ("one-by-one", lambda: self._one_by_one(client, rows)),
+                    ("bulk", lambda: self._bulk(client, rows, opts["format"])),
+                ):
+                    start = time.perf_counter()
+                    run()
+                    results[name] = time.perf_counter() - start
+                    done = Ticket.objects.filter(created_by=user, ai_status="DONE").count()
+                    self.stdout.write(
+                        f"{name:10} {results[name]:7.2f}s {n / results[name]:8.0f} tickets/s triaged={done}/{n}"
+                    )
+                    with rollups.paused():
+                        Ticket.objects.filter(created_by=user).delete()
+                    rollups.rebuild()
+                self.stdout.write(f"speedup: {results['one-by-one'] / results['bulk']:.1f}x")
+        finally:
+            celery_app.conf.task_always_eager = eager
+            user.delete()
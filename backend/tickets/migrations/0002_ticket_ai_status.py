@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0001_initial"),
+    ]
+
+    operations = [
+        # Existing tickets were already triaged, so backfill them as DONE
+        # before switching the default for new tickets to PENDING.
+        migrations.AddField(
+            model_name="ticket",
+            name="ai_status",
+            field=models.CharField(choices=[("PENDING", "Pending"), ("DONE", "Done"), ("FAILED", "Failed")], default="DONE", max_length=20),
+        ),
+        migrations.AlterField(
+            model_name="ticket",
+            name="ai_status",
+            field=models.CharField(choices=[("PENDING", "Pending"), ("DONE", "Done"), ("FAILED", "Failed")], default="PENDING", max_length=20),
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="ai_attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0002_ticket_ai_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["created_by", "-created_at"], name="ticket_owner_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["-created_at"], name="ticket_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(fields=["status", "resolved_at"], name="ticket_status_resolved_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(condition=~models.Q(status="RESOLVED"), fields=["-created_at"], name="ticket_open_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(condition=models.Q(ai_status="PENDING"), fields=["updated_at"], name="ticket_ai_pending_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["ticket", "-created_at"], name="comment_ticket_created_idx"),
+        ),
+    ]
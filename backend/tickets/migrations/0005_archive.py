@@ -0,0 +1,63 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("tickets", "0004_ticket_cluster_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTicket",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("title", models.CharField(max_length=200)),
+                ("status", models.CharField(choices=[("OPEN", "Open"), ("IN_PROGRESS", "In Progress"), ("RESOLVED", "Resolved")], max_length=20)),
+                ("category", models.CharField(choices=[("BILLING", "Billing"), ("LOGIN", "Login"), ("TECH", "Technical"), ("FEATURE", "Feature Request"), ("OTHER", "Other")], max_length=30)),
+                ("priority", models.CharField(choices=[("LOW", "Low"), ("MEDIUM", "Medium"), ("HIGH", "High"), ("CRITICAL", "Critical")], max_length=20)),
+                ("sentiment", models.CharField(max_length=20)),
+                ("ai_confidence", models.FloatField(default=0.0)),
+                ("ai_status", models.CharField(choices=[("PENDING", "Pending"), ("DONE", "Done"), ("FAILED", "Failed")], max_length=20)),
+                ("cluster_id", models.BigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("resolved_at", models.DateTimeField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("assigned_to", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="auth.user")),
+                ("created_by", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="archived_tickets", to="auth.user")),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["created_by", "-created_at"], name="archived_owner_created_idx"),
+                    models.Index(fields=["-created_at"], name="archived_created_idx"),
+                    models.Index(fields=["resolved_at"], name="archived_resolved_idx"),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedTicketText",
+            fields=[
+                ("ticket", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="text", serialize=False, to="tickets.archivedticket")),
+                ("description", models.TextField()),
+                ("ai_summary", models.TextField(blank=True, default="")),
+                ("ai_suggested_reply", models.TextField(blank=True, default="")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedComment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("message", models.TextField()),
+                ("created_at", models.DateTimeField()),
+                ("author", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="+", to="auth.user")),
+                ("ticket", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="comments", to="tickets.archivedticket")),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["ticket", "-created_at"], name="archived_comment_ticket_idx"),
+                ],
+            },
+        ),
+    ]
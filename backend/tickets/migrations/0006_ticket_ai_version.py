@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0005_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="ai_version",
+            field=models.CharField(blank=True, default="", max_length=120),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+def backfill(apps, schema_editor):
+    # ai_version names the LLM (":p<prompt version>") only when an API key was
+    # set and the result was not a fallback; without a "local:" part no local
+    # model was loaded, so those labels came from the LLM (or its cache).
+    Ticket = apps.get_model("tickets", "Ticket")
+    (
+        Ticket.objects.filter(ai_status="DONE", ai_version__contains=":p")
+        .exclude(ai_version__contains="local:")
+        .update(ai_source="model")
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0006_ticket_ai_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="ai_source",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,12 @@ class Ticket(models.Model):
         ("OTHER", "Other"),
     ]
 
+    AI_STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
     title = models.CharField(max_length=200)
     description = models.TextField()
 
@@ -35,6 +41,17 @@ class Ticket(models.Model):
     ai_summary = models.TextField(blank=True, default="")
     ai_suggested_reply = models.TextField(blank=True, default="")
     ai_confidence = models.FloatField(default=0.0)
+    ai_status = models.CharField(max_length=20, choices=AI_STATUS_CHOICES, default="PENDING")
+    ai_attempts = models.PositiveIntegerField(default=0)
+    # ai_client.triage_version() of the triage that set the AI fields; empty
+    # for untriaged tickets and fallback stand-ins for a failed model call.
+    ai_version = models.CharField(max_length=120, blank=True, default="")
+    # Where the AI fields came from: "model" (the LLM), "cache" (an earlier
+    # LLM answer), "local" (the local model) or "fallback" (keyword rules).
+    ai_source = models.CharField(max_length=20, blank=True, default="")
+    # Incident this ticket belongs to: the id of the first ticket in the
+    # cluster (its own id if nothing similar was open). Set after AI triage.
+    cluster_id = models.BigIntegerField(null=True, blank=True)
 
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_tickets")
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="assigned_tickets")
@@ -43,6 +60,26 @@ class Ticket(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # "My tickets" list and the staff list, both newest first.
+            models.Index(fields=["created_by", "-created_at"], name="ticket_owner_created_idx"),
+            models.Index(fields=["-created_at"], name="ticket_created_idx"),
+            # Resolved-ticket analytics filter on status and a resolved_at range.
+            models.Index(fields=["status", "resolved_at"], name="ticket_status_resolved_idx"),
+            # Agent work queue: only the (small) open part of the table.
+            models.Index(
+                fields=["-created_at"], name="ticket_open_idx",
+                condition=~models.Q(status="RESOLVED"),
+            ),
+            models.Index(fields=["cluster_id"], name="ticket_cluster_idx"),
+            # Recovery scan for tickets still waiting on AI triage.
+            models.Index(
+                fields=["updated_at"], name="ticket_ai_pending_idx",
+                condition=models.Q(ai_status="PENDING"),
+            ),
+        ]
+
     def __str__(self):
         return f"#{self.id} {self.title}"
 
@@ -51,3 +88,61 @@ class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ticket", "-created_at"], name="comment_ticket_created_idx"),
+        ]
+
+class ArchivedTicket(models.Model):
+    # Resolved tickets moved out of Ticket by tickets.archive, under their
+    # original id. Read-only. The large text lives in ArchivedTicketText so
+    # archive lists and analytics scan narrow rows.
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    category = models.CharField(max_length=30, choices=Ticket.CATEGORY_CHOICES)
+    priority = models.CharField(max_length=20, choices=Ticket.PRIORITY_CHOICES)
+
+    sentiment = models.CharField(max_length=20)
+    ai_confidence = models.FloatField(default=0.0)
+    ai_status = models.CharField(max_length=20, choices=Ticket.AI_STATUS_CHOICES)
+    cluster_id = models.BigIntegerField(null=True, blank=True)
+
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_tickets")
+    assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    # Copied from the ticket, so not auto_now.
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_by", "-created_at"], name="archived_owner_created_idx"),
+            models.Index(fields=["-created_at"], name="archived_created_idx"),
+            models.Index(fields=["resolved_at"], name="archived_resolved_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.title} (archived)"
+
+class ArchivedTicketText(models.Model):
+    ticket = models.OneToOneField(ArchivedTicket, on_delete=models.CASCADE, primary_key=True, related_name="text")
+    description = models.TextField()
+    ai_summary = models.TextField(blank=True, default="")
+    ai_suggested_reply = models.TextField(blank=True, default="")
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    ticket = models.ForeignKey(ArchivedTicket, on_delete=models.CASCADE, related_name="comments")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    message = models.TextField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["ticket", "-created_at"], name="archived_comment_ticket_idx"),
+        ]
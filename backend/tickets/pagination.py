@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+class TicketCursorPagination(CursorPagination):
+    # Keyset pagination: pages are fetched with WHERE created_at < cursor
+    # using the (created_by, -created_at) / (-created_at) indexes, so deep
+    # pages cost the same as the first one.
+    page_size = 25
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+class CommentCursorPagination(TicketCursorPagination):
+    page_size = 50
@@ -0,0 +1,26 @@
+import json
+
+from rest_framework.parsers import BaseParser
+
+class InvalidLine:
+    """Placeholder for an NDJSON line that is not valid JSON."""
+
+    def __init__(self, error):
+        self.error = error
+
+class NDJSONParser(BaseParser):
+    # One JSON object per line; bad lines are kept as InvalidLine so the
+    # caller can report them per row instead of rejecting the whole body.
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        rows = []
+        for raw in stream or []:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                rows.append(InvalidLine(f"Invalid JSON: {exc}"))
+        return rows
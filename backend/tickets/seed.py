@@ -0,0 +1,42 @@
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Ticket
+
+
+def seed_tickets(users, n, days=365, seed=0, batch_size=5000, pending_ratio=0.0, status_weights=None):
+    """Bulk insert ``n`` synthetic tickets owned by ``users``, spread over the last ``days`` days.
+
+    Signals do not fire for ``bulk_create``, so analytics rollups are not
+    maintained for seeded rows; call ``analytics_app.rollups.rebuild()`` after.
+    """
+    rng = random.Random(seed)
+    statuses = [c for c, _ in Ticket.STATUS_CHOICES]
+    categories = [c for c, _ in Ticket.CATEGORY_CHOICES]
+    priorities = [c for c, _ in Ticket.PRIORITY_CHOICES]
+    sentiments = ["ANGRY", "NEUTRAL", "POSITIVE"]
+    now = timezone.now()
+    created = 0
+    while created < n:
+        batch = []
+        created_ats = []
+        for _ in range(min(batch_size, n - created)):
+            created_at = now - timedelta(seconds=rng.randint(7 * 86400, days * 86400))
+            status = rng.choices(statuses, weights=status_weights)[0]
+            resolved_at = created_at + timedelta(seconds=rng.randint(60, 7 * 86400)) if status == "RESOLVED" else None
+            batch.append(Ticket(
+                title="Seeded ticket", description="Seeded for benchmarks",
+                status=status, category=rng.choice(categories), priority=rng.choice(priorities),
+                sentiment=rng.choice(sentiments), created_by=rng.choice(users), resolved_at=resolved_at,
+                ai_status="PENDING" if rng.random() < pending_ratio else "DONE",
+            ))
+            created_ats.append(created_at)
+        objs = Ticket.objects.bulk_create(batch)
+        # auto_now_add ignores the value passed in, so backdate after insert.
+        for obj, created_at in zip(objs, created_ats):
+            obj.created_at = created_at
+        Ticket.objects.bulk_update(objs, ["created_at"], batch_size=1000)
+        created += len(batch)
+    return created
@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Ticket, Comment
+from .models import ArchivedTicket, Ticket, Comment
 
 class UserMiniSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,12 +16,12 @@ class TicketSerializer(serializers.ModelSerializer):
         model = Ticket
         fields = [
             "id","title","description","status","category","priority",
-            "sentiment","ai_summary","ai_suggested_reply","ai_confidence",
+            "sentiment","ai_summary","ai_suggested_reply","ai_confidence","ai_status","cluster_id",
             "created_by","assigned_to","assigned_to_id",
             "created_at","updated_at","resolved_at",
         ]
         read_only_fields = [
-            "sentiment","ai_summary","ai_suggested_reply","ai_confidence",
+            "sentiment","ai_summary","ai_suggested_reply","ai_confidence","ai_status","cluster_id",
             "created_by","created_at","updated_at","resolved_at",
         ]
 
@@ -31,6 +31,55 @@ class TicketSerializer(serializers.ModelSerializer):
             instance.assigned_to = User.objects.filter(id=assigned_to_id).first()
         return super().update(instance, validated_data)
 
+class TicketListSerializer(serializers.ModelSerializer):
+    # List rows leave out the large text fields; fetch the detail for those.
+    created_by = UserMiniSerializer(read_only=True)
+    assigned_to = UserMiniSerializer(read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = [
+            "id","title","status","category","priority",
+            "sentiment","ai_summary","ai_confidence","ai_status","cluster_id",
+            "created_by","assigned_to",
+            "created_at","updated_at","resolved_at",
+        ]
+        read_only_fields = fields
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    # Same shape as TicketSerializer plus archived_at; the text comes from
+    # the joined ArchivedTicketText row.
+    description = serializers.CharField(source="text.description", read_only=True)
+    ai_summary = serializers.CharField(source="text.ai_summary", read_only=True)
+    ai_suggested_reply = serializers.CharField(source="text.ai_suggested_reply", read_only=True)
+    created_by = UserMiniSerializer(read_only=True)
+    assigned_to = UserMiniSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedTicket
+        fields = [
+            "id","title","description","status","category","priority",
+            "sentiment","ai_summary","ai_suggested_reply","ai_confidence","ai_status","cluster_id",
+            "created_by","assigned_to",
+            "created_at","updated_at","resolved_at","archived_at",
+        ]
+        read_only_fields = fields
+
+class ArchivedTicketListSerializer(serializers.ModelSerializer):
+    ai_summary = serializers.CharField(source="text.ai_summary", read_only=True)
+    created_by = UserMiniSerializer(read_only=True)
+    assigned_to = UserMiniSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedTicket
+        fields = [
+            "id","title","status","category","priority",
+            "sentiment","ai_summary","ai_confidence","ai_status","cluster_id",
+            "created_by","assigned_to",
+            "created_at","updated_at","resolved_at","archived_at",
+        ]
+        read_only_fields = fields
+
 class CommentSerializer(serializers.ModelSerializer):
     author = UserMiniSerializer(read_only=True)
 
@@ -0,0 +1,12 @@
+from celery import shared_task
+from django.conf import settings
+
+from . import archive
+
+
+@shared_task
+def archive_resolved_tickets():
+    if settings.ARCHIVE_AFTER_DAYS <= 0:
+        return 0
+    tickets, _ = archive.archive_resolved(settings.ARCHIVE_AFTER_DAYS, settings.ARCHIVE_BATCH_SIZE)
+    return tickets
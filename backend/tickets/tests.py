@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Comment, Ticket
+from .seed import seed_tickets
+
+
+def _hot_queries(user, ticket_id):
+    now = timezone.now()
+    # (name, queryset, index the plan must use, whether the index must also provide the ordering)
+    return [
+        ("owner ticket list", Ticket.objects.filter(created_by=user).order_by("-created_at")[:50],
+         "ticket_owner_created_idx", True),
+        ("staff ticket list", Ticket.objects.order_by("-created_at")[:50],
+         "ticket_created_idx", True),
+        ("resolved in range", Ticket.objects.filter(status="RESOLVED", resolved_at__gte=now - timedelta(days=30), resolved_at__lt=now),
+         "ticket_status_resolved_idx", False),
+        ("open ticket queue", Ticket.objects.exclude(status="RESOLVED").order_by("-created_at"),
+         "ticket_open_idx", True),
+        ("pending AI recovery", Ticket.objects.filter(ai_status="PENDING", updated_at__lt=now - timedelta(minutes=5)),
+         "ticket_ai_pending_idx", False),
+        ("ticket comments", Comment.objects.filter(ticket_id=ticket_id).order_by("-created_at"),
+         "comment_ticket_created_idx", True),
+    ]
+
+
+def _sorts(plan):
+    if connection.vendor == "sqlite":
+        return "TEMP B-TREE" in plan
+    return any(line.strip().lstrip("->").strip().startswith(("Sort", "Incremental Sort")) for line in plan.splitlines())
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN the hot ticket queries over a seeded table and check each is served by its index."""
+
+    TICKETS = 20000
+    USERS = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create([User(username=f"plan-check-{i}") for i in range(cls.USERS)])
+        # Most real tickets are resolved; keep the open and pending slices small.
+        seed_tickets(cls.users, cls.TICKETS, pending_ratio=0.01, status_weights=[5, 5, 90])
+        cls.ticket_id = Ticket.objects.values_list("id", flat=True).first()
+        Comment.objects.bulk_create([
+            Comment(ticket_id=ticket_id, author=cls.users[0], message="Seeded comment")
+            for ticket_id in Ticket.objects.values_list("id", flat=True)[:2000]
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def test_hot_queries_use_their_indexes(self):
+        for name, qs, index, ordered in _hot_queries(self.users[0], self.ticket_id):
+            with self.subTest(name):
+                plan = qs.explain()
+                self.assertIn(index, plan, f"{name} does not use {index}:\n{plan}")
+                if ordered:
+                    self.assertFalse(_sorts(plan), f"{name} sorts instead of reading {index} in order:\n{plan}")
+
+
+class ListQueryCountTests(TestCase):
+    """Ticket and comment lists cost the same number of queries whatever the page size."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username="staff", is_staff=True)
+        cls.owner = User.objects.create(username="owner")
+        agents = User.objects.bulk_create([User(username=f"agent-{i}") for i in range(5)])
+        tickets = Ticket.objects.bulk_create([
+            Ticket(title=f"Ticket {i}", description="Text", created_by=cls.owner, assigned_to=agents[i % 5])
+            for i in range(120)
+        ])
+        cls.ticket = tickets[0]
+        Comment.objects.bulk_create([
+            Comment(ticket=cls.ticket, author=agents[i % 5] if i % 2 else cls.owner, message=f"Comment {i}")
+            for i in range(120)
+        ])
+
+    def _get(self, user, url, page_size, queries, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.assertNumQueries(queries):
+            res = client.get(url, {"page_size": page_size, **params})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["results"]), page_size)
+        return res
+
+    def test_ticket_list(self):
+        for user in (self.staff, self.owner):
+            for page_size in (1, 25, 100):
+                with self.subTest(user=user.username, page_size=page_size):
+                    res = self._get(user, "/api/tickets/", page_size, 1)
+                    self.assertNotIn("description", res.data["results"][0])
+
+    def test_ticket_list_next_page(self):
+        first = self._get(self.owner, "/api/tickets/", 50, 1)
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        with self.assertNumQueries(1):
+            res = client.get(first.data["next"])
+        ids = {t["id"] for t in first.data["results"]} | {t["id"] for t in res.data["results"]}
+        self.assertEqual(len(ids), 100)
+
+    def test_comment_list(self):
+        for user in (self.staff, self.owner):
+            for page_size in (1, 50, 100):
+                with self.subTest(user=user.username, page_size=page_size):
+                    # The archive check, then one page with the authors joined.
+                    self._get(user, "/api/comments/", page_size, 2, ticket=self.ticket.id)
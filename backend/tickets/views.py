@@ -1,41 +1,308 @@
+import csv
+import json
+from datetime import datetime
+
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 
-from .models import Ticket, Comment
-from .serializers import TicketSerializer, CommentSerializer
+from . import archive
+from .etags import ConditionalGetMixin, conditional_get, scope_key, touch
+from .models import ArchivedComment, ArchivedTicket, Ticket, Comment
+from .parsers import InvalidLine, NDJSONParser
+from .pagination import TicketCursorPagination, CommentCursorPagination
+from .serializers import (
+    ArchivedTicketListSerializer, ArchivedTicketSerializer, CommentSerializer, TicketListSerializer, TicketSerializer,
+)
 from .permissions import IsStaffOrOwner
-from ai_engine.tasks import process_ticket_ai
+from ai_engine import background
+from ai_engine.tasks import process_ticket_ai, process_tickets_ai, enqueue_ticket_ai, enqueue_tickets_ai
+from analytics_app import rollups
+from search import index as search_index, similar as search_similar
+from search.serializers import SearchQuerySerializer, SimilarQuerySerializer
 from django.conf import settings
-from ai_engine.tasks import process_ticket_ai
-class TicketViewSet(viewsets.ModelViewSet):
+
+EXPORT_FIELDS = [
+    "id", "title", "description", "status", "category", "priority", "sentiment",
+    "ai_summary", "ai_suggested_reply", "ai_confidence", "ai_status", "cluster_id",
+    "created_by__username", "assigned_to__username",
+    "created_at", "updated_at", "resolved_at",
+]
+EXPORT_HEADER = [f.replace("__username", "") for f in EXPORT_FIELDS]
+EXPORT_CHUNK_SIZE = 2000
+
+class _Echo:
+    def write(self, value):
+        return value
+
+def _export_value(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow([_export_value(v) for v in row])
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_HEADER, map(_export_value, row)))) + "\n"
+
+def visible_tickets(user, action, params):
+    """Tickets ``user`` may see, shaped for ``action``; shared with the async views."""
+    qs = Ticket.objects.select_related("created_by", "assigned_to")
+    if action in ("update", "partial_update"):
+        qs = qs.select_for_update(of=("self",))
+    if action in ("list", "search"):
+        qs = qs.defer("description", "ai_suggested_reply")
+    cluster = params.get("cluster")
+    if action == "list" and cluster and cluster.isdigit():
+        qs = qs.filter(cluster_id=cluster)
+    if user.is_staff:
+        return qs.order_by("-created_at")
+    return qs.filter(created_by=user).order_by("-created_at")
+
+def create_ticket(serializer, user):
+    """Save a new ticket and queue its AI triage.
+
+    Returns ``(ticket, queued)``; when nothing is queued (no worker and no
+    background runner) the caller runs the triage inline.
+    """
+    ticket = serializer.save(created_by=user)
+    if getattr(settings, "AI_ASYNC", True):
+        enqueue_ticket_ai(ticket)               # local async (Celery)
+        return ticket, True
+    if getattr(settings, "AI_BACKGROUND", True):
+        transaction.on_commit(lambda: background.runner.submit(ticket.id))  # production (no worker)
+        return ticket, True
+    return ticket, False
+
+class TicketViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TicketSerializer
     permission_classes = [IsStaffOrOwner]
+    pagination_class = TicketCursorPagination
+
+    def _archived_list(self):
+        return self.action == "list" and self.request.query_params.get("archived") == "1"
+
+    def get_serializer_class(self):
+        if self._archived_list():
+            return ArchivedTicketListSerializer
+        if self.action in ("list", "search", "similar"):
+            return TicketListSerializer
+        return TicketSerializer
+
+    def etag_key(self, request):
+        if self.action == "retrieve":
+            # The router accepts any pk string; only ticket ids name a version key.
+            pk = self.kwargs["pk"]
+            return f"ticket:{pk}" if pk.isdigit() else None
+        if self.action == "list":
+            return scope_key(request.user)
+        return None
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Archived tickets keep their id and stay readable (not editable).
+            ticket = get_object_or_404(archive.archived_tickets(request.user), id=kwargs["pk"])
+            return Response(ArchivedTicketSerializer(ticket).data)
 
     def get_queryset(self):
         u = self.request.user
-        if u.is_staff:
-            return Ticket.objects.all().order_by("-created_at")
-        return Ticket.objects.filter(created_by=u).order_by("-created_at")
+        if self._archived_list():
+            # ?archived=1 lists the archive instead.
+            return archive.archived_tickets(u).defer("text__description", "text__ai_suggested_reply")
+        return visible_tickets(u, self.action, self.request.query_params)
 
     def perform_create(self, serializer):
-        ticket = serializer.save(created_by=self.request.user)
-
-        if getattr(settings, "AI_ASYNC", True):
-            process_ticket_ai.delay(ticket.id)      # local async (Celery)
-        else:
+        ticket, queued = create_ticket(serializer, self.request.user)
+        if not queued:
             try:
                 process_ticket_ai.run(ticket.id)    # production sync (no worker)
             except Exception:
                 pass
 
+    def update(self, request, *args, **kwargs):
+        # The ticket is locked from read to save, so the loaded values are
+        # what the rollups count and the save needs no extra snapshot query.
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def get_object(self):
+        ticket = super().get_object()
+        if self.action in ("update", "partial_update"):
+            rollups.remember(ticket)
+        return ticket
+
     def perform_update(self, serializer):
-        ticket = serializer.save()
-        if ticket.status == "RESOLVED" and ticket.resolved_at is None:
-            ticket.resolved_at = timezone.now()
-            ticket.save(update_fields=["resolved_at"])
+        ticket = serializer.instance
+        extra = {}
+        if serializer.validated_data.get("status", ticket.status) == "RESOLVED" and ticket.resolved_at is None:
+            extra["resolved_at"] = timezone.now()
+        serializer.save(**extra)
+
+    @action(detail=False, methods=["post"], url_path="bulk", parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        # Body is a JSON array of tickets or NDJSON (one ticket per line).
+        # Valid rows are inserted; invalid ones are reported by row index.
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"detail": "Expected a JSON array or an NDJSON body."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.TICKET_BULK_MAX_ROWS:
+            return Response(
+                {"detail": f"At most {settings.TICKET_BULK_MAX_ROWS} tickets per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate row by row with one serializer instance, like ListSerializer
+        # does, but keep the good rows instead of failing the whole batch.
+        child = TicketSerializer(context=self.get_serializer_context())
+        valid = []
+        errors = []
+        for i, row in enumerate(rows):
+            if isinstance(row, InvalidLine):
+                errors.append({"row": i, "errors": {"non_field_errors": [row.error]}})
+                continue
+            try:
+                valid.append(child.run_validation(row))
+            except ValidationError as exc:
+                errors.append({"row": i, "errors": exc.detail})
+
+        tickets = self._bulk_insert(valid)
+        ids = [t.id for t in tickets]
+
+        if ids:
+            if getattr(settings, "AI_ASYNC", True):
+                transaction.on_commit(lambda: enqueue_tickets_ai(tickets))
+            elif getattr(settings, "AI_BACKGROUND", True):
+                transaction.on_commit(lambda: [background.runner.submit(i) for i in ids])
+            else:
+                try:
+                    process_tickets_ai.run(ids)
+                except Exception:
+                    pass
+
+        code = status.HTTP_201_CREATED if not errors else (
+            status.HTTP_207_MULTI_STATUS if ids else status.HTTP_400_BAD_REQUEST
+        )
+        return Response({"created": len(ids), "ids": ids, "errors": errors}, status=code)
+
+    def _bulk_insert(self, rows):
+        user = self.request.user
+        assignees = set()
+        if user.is_staff:
+            wanted = {r["assigned_to_id"] for r in rows if r.get("assigned_to_id")}
+            assignees = set(User.objects.filter(id__in=wanted).values_list("id", flat=True))
+
+        now = timezone.now()
+        objs = []
+        for data in rows:
+            data = dict(data)
+            assigned_to_id = data.pop("assigned_to_id", None)
+            ticket = Ticket(**data, created_by=user, assigned_to_id=assigned_to_id if assigned_to_id in assignees else None)
+            if ticket.status == "RESOLVED":
+                ticket.resolved_at = now
+            objs.append(ticket)
+
+        created = []
+        chunk = settings.TICKET_BULK_CHUNK_SIZE
+        with transaction.atomic():
+            for i in range(0, len(objs), chunk):
+                created.extend(Ticket.objects.bulk_create(objs[i:i + chunk]))
+            # bulk_create skips model signals, so update the rollups, the
+            # search index and the ETags here.
+            rollups.record_created([rollups.values_of(t) for t in created])
+            search_index.update_tickets([t.id for t in created])
+            touch([t.id for t in created], user.id)
+        return created
+
+    def _ranked(self, hits):
+        # hits: [(ticket_id, score)] best first -> serialized tickets in that order.
+        tickets = Ticket.objects.select_related("created_by", "assigned_to").defer("description", "ai_suggested_reply")
+        by_id = tickets.in_bulk([tid for tid, _ in hits])
+        results = []
+        for tid, score in hits:
+            if tid in by_id:
+                results.append(dict(TicketListSerializer(by_id[tid]).data, score=round(score, 4)))
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        ser = SearchQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        params = ser.validated_data
+        owner_id = None if request.user.is_staff else request.user.id
+        if params["mode"] == "similar":
+            hits = search_similar.similar_to_text(params["q"], k=params["limit"], owner_id=owner_id)
+        else:
+            hits = search_index.search(params["q"], owner_id=owner_id, limit=params["limit"])
+        return self._ranked(hits)
+
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        ticket = self.get_object()
+        ser = SimilarQuerySerializer(data=request.query_params)
+        ser.is_valid(raise_exception=True)
+        owner_id = None if request.user.is_staff else request.user.id
+        return self._ranked(search_similar.similar_to_ticket(ticket.id, k=ser.validated_data["k"], owner_id=owner_id))
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        # ?type=csv (default) or ?type=ndjson. Rows are streamed from a
+        # server-side cursor so memory stays flat however many tickets match.
+        kind = request.query_params.get("type", "csv")
+        if kind not in ("csv", "ndjson"):
+            return Response({"detail": "type must be csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            self.get_queryset()
+            .order_by("-created_at", "-id")
+            .values_list(*EXPORT_FIELDS)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        if kind == "csv":
+            resp = StreamingHttpResponse(_csv_lines(rows), content_type="text/csv")
+        else:
+            resp = StreamingHttpResponse(_ndjson_lines(rows), content_type="application/x-ndjson")
+        resp["Content-Disposition"] = f'attachment; filename="tickets.{kind}"'
+        return resp
+
+    @action(detail=True, methods=["post"], url_path="incident-reply")
+    def incident_reply(self, request, pk=None):
+        # Post the same comment on every open ticket of this ticket's incident.
+        if not request.user.is_staff:
+            return Response({"detail": "Only staff can reply to incidents."}, status=status.HTTP_403_FORBIDDEN)
+        ticket = self.get_object()
+        message = str(request.data.get("message") or "").strip()
+        if not message:
+            return Response({"detail": "message is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = [ticket.id]
+        if ticket.cluster_id:
+            ids = list(
+                Ticket.objects.filter(cluster_id=ticket.cluster_id)
+                .exclude(status="RESOLVED").values_list("id", flat=True)
+            ) or ids
+        with transaction.atomic():
+            Comment.objects.bulk_create([Comment(ticket_id=i, author=request.user, message=message) for i in ids])
+            # bulk_create skips the signals that keep the search index and ETags current.
+            search_index.update_tickets(ids)
+            touch(ids)
+        return Response({"cluster_id": ticket.cluster_id, "tickets": ids}, status=status.HTTP_201_CREATED)
 
     @action(detail=True, methods=["post"], url_path="assign")
     def assign(self, request, pk=None):
@@ -47,12 +314,28 @@ class TicketViewSet(viewsets.ModelViewSet):
         ticket.save(update_fields=["assigned_to"])
         return Response(TicketSerializer(ticket).data)
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
+
+    def etag_key(self, request):
+        if self.action != "list":
+            return None
+        ticket_id = request.query_params.get("ticket")
+        if ticket_id and ticket_id.isdigit():
+            return f"ticket:{ticket_id}"
+        return scope_key(request.user)
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        qs = Comment.objects.select_related("ticket", "author").all().order_by("-created_at")
+        qs = Comment.objects.select_related("author").all().order_by("-created_at")
         ticket_id = self.request.query_params.get("ticket")
+        if self.action == "list" and ticket_id and ticket_id.isdigit() and ArchivedTicket.objects.filter(id=ticket_id).exists():
+            # Comments moved to the archive with their ticket.
+            qs = ArchivedComment.objects.select_related("author").order_by("-created_at")
         if ticket_id:
             qs = qs.filter(ticket_id=ticket_id)
         if self.request.user.is_staff:
@@ -1,10 +1,31 @@
 import api from "./client";
 
-export async function listTickets() {
-  const res = await api.get("/api/tickets/");
+// Paginated: returns { results, next }. Pass `next` back in to load the following page.
+export async function listTickets(next) {
+  const res = await api.get(next || "/api/tickets/");
   return res.data;
 }
 
+export async function searchTickets(q, mode = "text") {
+  const res = await api.get("/api/tickets/search/", { params: { q, mode, limit: 50 } });
+  return res.data.results;
+}
+
+export async function similarTickets(id, k = 5) {
+  const res = await api.get(`/api/tickets/${id}/similar/`, { params: { k } });
+  return res.data.results;
+}
+
+export async function exportTickets(type = "csv") {
+  const res = await api.get(`/api/tickets/export/?type=${type}`, { responseType: "blob" });
+  const url = URL.createObjectURL(res.data);
+  const a = document.createElement("a");
+  a.href = url;
+  a.download = `tickets.${type}`;
+  a.click();
+  URL.revokeObjectURL(url);
+}
+
 export async function getTicket(id) {
   const res = await api.get(`/api/tickets/${id}/`);
   return res.data;
@@ -20,8 +41,14 @@ export async function updateTicket(id, payload) {
   return res.data;
 }
 
-export async function listComments(ticketId) {
-  const res = await api.get(`/api/comments/?ticket=${ticketId}`);
+export async function replyToIncident(id, message) {
+  const res = await api.post(`/api/tickets/${id}/incident-reply/`, { message });
+  return res.data;
+}
+
+// Paginated like listTickets: returns { results, next }.
+export async function listComments(ticketId, next) {
+  const res = await api.get(next || `/api/comments/?ticket=${ticketId}`);
   return res.data;
 }
 
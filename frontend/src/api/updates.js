@@ -0,0 +1,32 @@
+// Push channel for ticket and analytics updates (replaces polling).
+// Calls onEvent with {type: "ticket", ticket}, {type: "analytics", summary} or,
+// while a suggested reply is generated, {type: "reply", ticket_id, suggested_reply, done}.
+// Reconnects with backoff; returns a function that closes the socket.
+export function subscribeUpdates(onEvent) {
+  const base = (import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:8000").replace(/^http/, "ws");
+  let ws = null;
+  let timer = null;
+  let delay = 1000;
+  let closed = false;
+
+  function connect() {
+    const token = localStorage.getItem("access") || "";
+    ws = new WebSocket(`${base}/ws/updates/?token=${encodeURIComponent(token)}`);
+    ws.onopen = () => {
+      delay = 1000;
+    };
+    ws.onmessage = (e) => onEvent(JSON.parse(e.data));
+    ws.onclose = () => {
+      if (closed) return;
+      timer = setTimeout(connect, delay);
+      delay = Math.min(delay * 2, 30000);
+    };
+  }
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    if (ws) ws.close();
+  };
+}
@@ -1,5 +1,6 @@
 import { useEffect, useState } from "react";
 import { analyticsSummary } from "../api/tickets";
+import { subscribeUpdates } from "../api/updates";
 import {
   BarChart,
   Bar,
@@ -26,6 +27,12 @@ export default function AdminDashboard() {
     })();
   }, []);
 
+  useEffect(() => {
+    return subscribeUpdates((event) => {
+      if (event.type === "analytics") setData(event.summary);
+    });
+  }, []);
+
   if (!data) return <div className="max-w-6xl mx-auto px-4 py-10">Loading...</div>;
 
   const category = data.by_category.map((x) => ({ name: x.category, value: x.count }));
@@ -49,8 +56,9 @@ export default function AdminDashboard() {
           </div>
         </div>
 
-        <div className="mt-5 grid md:grid-cols-3 gap-4">
+        <div className="mt-5 grid md:grid-cols-4 gap-4">
           <Stat label="Total tickets" value={data.total} />
+          <Stat label="Open incidents" value={`${data.open_incidents} (${data.open_tickets} tickets)`} />
           <Stat
             label="Avg resolution time (sec)"
             value={data.avg_resolution_seconds ? Math.round(data.avg_resolution_seconds) : "—"}
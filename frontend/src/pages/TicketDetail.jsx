@@ -5,28 +5,53 @@ import {
   createComment,
   getTicket,
   listComments,
+  replyToIncident,
+  similarTickets,
   updateTicket,
 } from "../api/tickets";
+import { subscribeUpdates } from "../api/updates";
 
 export default function TicketDetail({ user }) {
   const { id } = useParams();
   const [ticket, setTicket] = useState(null);
   const [comments, setComments] = useState([]);
+  const [commentsNext, setCommentsNext] = useState(null);
   const [message, setMessage] = useState("");
   const [err, setErr] = useState("");
   const [copied, setCopied] = useState("");
+  const [similar, setSimilar] = useState([]);
 
   async function refresh() {
     const t = await getTicket(id);
     setTicket(t);
     const c = await listComments(id);
-    setComments(c);
+    setComments(c.results);
+    setCommentsNext(c.next);
+    setSimilar(await similarTickets(id));
+  }
+
+  async function loadMoreComments() {
+    const c = await listComments(id, commentsNext);
+    setComments((prev) => [...prev, ...c.results]);
+    setCommentsNext(c.next);
   }
 
   useEffect(() => {
     refresh();
   }, [id]);
 
+  // AI triage lands after the ticket is created; the server pushes it.
+  useEffect(() => {
+    return subscribeUpdates((event) => {
+      if (event.type === "ticket" && String(event.ticket.id) === String(id)) {
+        setTicket((prev) => ({ ...prev, ...event.ticket }));
+      }
+      if (event.type === "reply" && String(event.ticket_id) === String(id)) {
+        setTicket((prev) => prev && { ...prev, ai_suggested_reply: event.suggested_reply });
+      }
+    });
+  }, [id]);
+
   const headerMeta = useMemo(() => {
     if (!ticket) return null;
     return {
@@ -74,6 +99,11 @@ export default function TicketDetail({ user }) {
                 <Pill type="priority" value={headerMeta.priority} />
                 <Pill type="sentiment" value={headerMeta.sentiment} />
                 <Pill type="ai" value={`AI conf: ${headerMeta.conf}`} />
+                {ticket.cluster_id && ticket.cluster_id !== ticket.id && (
+                  <Link to={`/tickets/${ticket.cluster_id}`} className="text-xs underline self-center">
+                    Part of incident #{ticket.cluster_id}
+                  </Link>
+                )}
               </div>
 
               <div className="mt-3 text-xs text-slate-500">
@@ -173,6 +203,12 @@ export default function TicketDetail({ user }) {
             {comments.length === 0 && (
               <div className="text-sm text-slate-600">No comments yet.</div>
             )}
+
+            {commentsNext && (
+              <button className="w-full text-sm underline py-2" onClick={loadMoreComments}>
+                Load more
+              </button>
+            )}
           </div>
 
           {/* Add comment */}
@@ -199,12 +235,51 @@ export default function TicketDetail({ user }) {
             >
               Send
             </button>
+            {user?.is_staff && ticket.cluster_id && (
+              <button
+                className="px-5 py-2 rounded-xl border bg-white hover:bg-slate-50 text-sm"
+                onClick={async () => {
+                  try {
+                    setErr("");
+                    if (!message.trim()) return;
+                    await replyToIncident(ticket.id, message);
+                    setMessage("");
+                    await refresh();
+                  } catch {
+                    setErr("Could not reply to incident.");
+                  }
+                }}
+              >
+                Send to incident
+              </button>
+            )}
           </div>
 
           <div className="mt-2 text-xs text-slate-500">
             Tip: Add internal notes / updates so the AI analytics reflect resolution patterns.
           </div>
         </div>
+
+        {/* Similar tickets */}
+        {similar.length > 0 && (
+          <div className="bg-white border rounded-2xl p-6 shadow-sm">
+            <h2 className="text-lg font-semibold">Similar tickets</h2>
+            <div className="mt-4 space-y-2">
+              {similar.map((t) => (
+                <Link
+                  key={t.id}
+                  to={`/tickets/${t.id}`}
+                  className="flex items-center justify-between border rounded-xl px-4 py-2 bg-slate-50 hover:bg-slate-100"
+                >
+                  <span className="text-sm text-slate-900">
+                    #{t.id} {t.title}
+                  </span>
+                  <span className="text-xs text-slate-500">{t.status}</span>
+                </Link>
+              ))}
+            </div>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -1,10 +1,12 @@
 import { useEffect, useMemo, useState } from "react";
 import { Link } from "react-router-dom";
-import { createTicket, listTickets } from "../api/tickets";
+import { createTicket, exportTickets, listTickets, searchTickets } from "../api/tickets";
+import { subscribeUpdates } from "../api/updates";
 import Badge from "../components/Badge";
 
 export default function Tickets() {
   const [tickets, setTickets] = useState([]);
+  const [next, setNext] = useState(null);
 
   // Create ticket form
   const [title, setTitle] = useState("");
@@ -15,41 +17,60 @@ export default function Tickets() {
   const [q, setQ] = useState("");
   const [status, setStatus] = useState("ALL");
   const [sort, setSort] = useState("NEWEST"); // NEWEST | OLDEST
+  const [hits, setHits] = useState(null); // server search results while q is set
 
   async function refresh() {
     const data = await listTickets();
-    setTickets(data);
+    setTickets(data.results);
+    setNext(data.next);
+  }
+
+  async function loadMore() {
+    const data = await listTickets(next);
+    setTickets((prev) => [...prev, ...data.results]);
+    setNext(data.next);
   }
 
   useEffect(() => {
     refresh();
   }, []);
 
+  useEffect(() => {
+    return subscribeUpdates((event) => {
+      if (event.type !== "ticket") return;
+      setTickets((prev) => prev.map((t) => (t.id === event.ticket.id ? { ...t, ...event.ticket } : t)));
+    });
+  }, []);
+
+  // Search runs on the server (full-text index), not just the loaded page.
+  useEffect(() => {
+    const s = q.trim();
+    if (!s) {
+      setHits(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      setHits(await searchTickets(s));
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [q]);
+
   // Filter + Sort in UI (fast enough for 100–500 items)
   const visibleTickets = useMemo(() => {
-    let out = [...tickets];
+    let out = [...(hits || tickets)];
 
     // filter by status
     if (status !== "ALL") out = out.filter((t) => t.status === status);
 
-    // search title/description
-    const s = q.trim().toLowerCase();
-    if (s) {
-      out = out.filter((t) => {
-        const text = `${t.title} ${t.description}`.toLowerCase();
-        return text.includes(s);
-      });
-    }
-
-    // sort
-    out.sort((a, b) => {
+    // sort (search results stay in relevance order)
+    if (!hits) out.sort((a, b) => {
       const da = new Date(a.created_at).getTime();
       const db = new Date(b.created_at).getTime();
       return sort === "NEWEST" ? db - da : da - db;
     });
 
     return out;
-  }, [tickets, q, status, sort]);
+  }, [tickets, hits, status, sort]);
 
   return (
     // Full-height app page, no crazy scrolling
@@ -112,9 +133,14 @@ export default function Tickets() {
             <div className="p-5 border-b bg-white sticky top-0 z-10">
               <div className="flex items-center justify-between gap-3">
                 <h2 className="text-lg font-semibold">My tickets</h2>
-                <button className="text-sm underline" onClick={refresh}>
-                  Refresh
-                </button>
+                <div className="flex items-center gap-3">
+                  <button className="text-sm underline" onClick={() => exportTickets("csv")}>
+                    Export CSV
+                  </button>
+                  <button className="text-sm underline" onClick={refresh}>
+                    Refresh
+                  </button>
+                </div>
               </div>
 
               {/* Controls */}
@@ -169,7 +195,7 @@ export default function Tickets() {
                   </div>
 
                   <div className="text-sm text-slate-600 mt-1 line-clamp-2">
-                    {t.description}
+                    {t.ai_summary}
                   </div>
 
                   <div className="mt-3 flex flex-wrap gap-2">
@@ -187,6 +213,12 @@ export default function Tickets() {
                   No tickets match your filters.
                 </div>
               )}
+
+              {next && !hits && (
+                <button className="w-full text-sm underline py-2" onClick={loadMore}>
+                  Load more
+                </button>
+              )}
             </div>
           </div>
         </div>